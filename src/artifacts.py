@@ -0,0 +1,284 @@
+import difflib
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+
+from workspace_store import touch_dir, workspace_dir, workspace_root
+
+# Working copy each kind of artifact is checked out to in the issue directory.
+WORKING_FILES = {"plan": "plan.md", "patch": "devin.patch"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisions (
+    repo TEXT NOT NULL,
+    issue INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    rev INTEGER NOT NULL,
+    blob TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (repo, issue, kind, rev)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS revisions_blob ON revisions (blob);
+CREATE TABLE IF NOT EXISTS patch_files (
+    blob TEXT NOT NULL,
+    path TEXT NOT NULL,
+    added INTEGER NOT NULL,
+    removed INTEGER NOT NULL,
+    PRIMARY KEY (blob, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS patch_files_path ON patch_files (path);
+"""
+
+
+def store_path() -> Path:
+    return workspace_root() / "artifacts.sqlite3"
+
+
+def objects_dir() -> Path:
+    return workspace_root() / "objects"
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    path = path or store_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _blob_path(digest: str) -> Path:
+    return objects_dir() / digest[:2] / digest[2:]
+
+
+def write_blob(text: str) -> str:
+    """Store text once under its sha256 and return the digest; identical content is never stored twice."""
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    path = _blob_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(zlib.compress(data))
+        os.replace(tmp, path)
+    return digest
+
+
+def read_blob(digest: str) -> str:
+    return zlib.decompress(_blob_path(digest).read_bytes()).decode("utf-8")
+
+
+def _index_patch(conn: sqlite3.Connection, digest: str, text: str):
+    if conn.execute("SELECT 1 FROM patch_files WHERE blob = ? LIMIT 1", (digest,)).fetchone():
+        return
+    from patches import diffstat, extract_diff
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO patch_files (blob, path, added, removed) VALUES (?, ?, ?, ?)",
+        [(digest, path, added, removed) for path, added, removed in diffstat(extract_diff(text))],
+    )
+
+
+def put(repo: str, issue: int | None, kind: str, text: str, source: str) -> int:
+    """Record text as the newest revision of an issue's plan or patch (none if it equals the head); returns its revision number."""
+    issue = issue if issue is not None else -1
+    conn = connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        # Written under the store lock so prune() cannot delete the blob between here and the INSERT.
+        digest = write_blob(text)
+        head = conn.execute(
+            "SELECT rev, blob FROM revisions WHERE repo = ? AND issue = ? AND kind = ? ORDER BY rev DESC LIMIT 1",
+            (repo, issue, kind),
+        ).fetchone()
+        if head is not None and head["blob"] == digest:
+            conn.execute("COMMIT")
+            return head["rev"]
+        rev = (head["rev"] if head else 0) + 1
+        conn.execute(
+            "INSERT INTO revisions (repo, issue, kind, rev, blob, size, source, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (repo, issue, kind, rev, digest, len(text.encode("utf-8")), source, time.time()),
+        )
+        if kind == "patch":
+            _index_patch(conn, digest, text)
+        conn.execute("COMMIT")
+        return rev
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def _adopt(repo: str, issue: int | None, kind: str):
+    """Bring a working file saved before the store existed into it as revision 1."""
+    path = workspace_dir(repo, issue) / WORKING_FILES[kind]
+    if path.exists():
+        put(repo, issue, kind, path.read_text(encoding="utf-8"), "import")
+
+
+def history(repo: str, issue: int | None, kind: str) -> list[dict]:
+    """Revisions oldest first, each with its diffstat totals (patches) but not its content."""
+    number = issue if issue is not None else -1
+    conn = connect()
+    try:
+        if not conn.execute(
+            "SELECT 1 FROM revisions WHERE repo = ? AND issue = ? AND kind = ? LIMIT 1", (repo, number, kind)
+        ).fetchone():
+            _adopt(repo, issue, kind)
+        rows = conn.execute(
+            "SELECT r.rev, r.blob, r.size, r.source, r.created,"
+            " COUNT(f.path) AS files, COALESCE(SUM(f.added), 0) AS added, COALESCE(SUM(f.removed), 0) AS removed"
+            " FROM revisions r LEFT JOIN patch_files f ON f.blob = r.blob"
+            " WHERE r.repo = ? AND r.issue = ? AND r.kind = ? GROUP BY r.rev ORDER BY r.rev",
+            (repo, number, kind),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def _blob_for(conn: sqlite3.Connection, repo: str, issue: int, kind: str, rev: int) -> str:
+    row = conn.execute(
+        "SELECT blob FROM revisions WHERE repo = ? AND issue = ? AND kind = ? AND rev = ?",
+        (repo, issue, kind, rev),
+    ).fetchone()
+    if row is None:
+        raise ValueError(f"No {kind} revision {rev} for {repo}#{issue}")
+    return row["blob"]
+
+
+def get(repo: str, issue: int | None, kind: str, rev: int) -> str:
+    conn = connect()
+    try:
+        digest = _blob_for(conn, repo, issue if issue is not None else -1, kind, rev)
+    finally:
+        conn.close()
+    return read_blob(digest)
+
+
+def files(repo: str, issue: int | None, rev: int) -> list[tuple[str, int, int]]:
+    """The precomputed diffstat of one patch revision."""
+    conn = connect()
+    try:
+        digest = _blob_for(conn, repo, issue if issue is not None else -1, "patch", rev)
+        rows = conn.execute("SELECT path, added, removed FROM patch_files WHERE blob = ? ORDER BY path", (digest,))
+        return [(row["path"], row["added"], row["removed"]) for row in rows]
+    finally:
+        conn.close()
+
+
+def compare(repo: str, issue: int | None, kind: str, old: int, new: int) -> str:
+    """Unified diff between two revisions; empty when their content is identical."""
+    conn = connect()
+    try:
+        number = issue if issue is not None else -1
+        a, b = _blob_for(conn, repo, number, kind, old), _blob_for(conn, repo, number, kind, new)
+    finally:
+        conn.close()
+    if a == b:
+        return ""
+    return "".join(
+        difflib.unified_diff(
+            read_blob(a).splitlines(keepends=True),
+            read_blob(b).splitlines(keepends=True),
+            fromfile=f"{kind}@{old}",
+            tofile=f"{kind}@{new}",
+        )
+    )
+
+
+def rollback(repo: str, issue: int | None, kind: str, rev: int) -> int:
+    """Make an old revision current again: check it out and record it as a new revision."""
+    text = get(repo, issue, kind, rev)
+    base_dir = workspace_dir(repo, issue)
+    base_dir.mkdir(parents=True, exist_ok=True)
+    touch_dir(base_dir)
+    (base_dir / WORKING_FILES[kind]).write_text(text, encoding="utf-8")
+    return put(repo, issue, kind, text, f"rollback:{rev}")
+
+
+def touching(path: str, repo: str | None = None) -> list[dict]:
+    """Issues whose patch revisions change path, newest first."""
+    query = (
+        "SELECT r.repo, r.issue, r.rev, f.added, f.removed, r.created FROM patch_files f"
+        " JOIN revisions r ON r.blob = f.blob AND r.kind = 'patch' WHERE f.path = ?"
+    )
+    params: list = [path]
+    if repo:
+        query += " AND r.repo = ?"
+        params.append(repo)
+    conn = connect()
+    try:
+        return [dict(row) for row in conn.execute(query + " ORDER BY r.created DESC", params)]
+    finally:
+        conn.close()
+
+
+def prune(evicted: list[str], dry_run: bool = False) -> dict:
+    """Forget revisions of evicted issue dirs and delete unreferenced blobs; returns {"revisions", "blobs", "bytes"}."""
+    conn = connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        doomed = set()
+        for rel in evicted:
+            slug, name = rel.split("/", 1)
+            number = name.split("-", 1)[1]
+            rows = conn.execute(
+                "SELECT repo, issue, kind, rev, blob FROM revisions WHERE replace(repo, '/', '_') = ? AND issue = ?",
+                (slug, int(number) if number.isdigit() else -1),
+            )
+            doomed.update(tuple(row) for row in rows)
+        dropped = Counter(item[4] for item in doomed)
+        unreferenced = [
+            digest
+            for digest, n in dropped.items()
+            if conn.execute("SELECT COUNT(*) FROM revisions WHERE blob = ?", (digest,)).fetchone()[0] == n
+        ]
+        if not dry_run:
+            conn.executemany(
+                "DELETE FROM revisions WHERE repo = ? AND issue = ? AND kind = ? AND rev = ?",
+                [item[:4] for item in doomed],
+            )
+            conn.executemany("DELETE FROM patch_files WHERE blob = ?", [(digest,) for digest in unreferenced])
+            # Under the store lock, so put() cannot reuse a blob that is about to go.
+            for digest in unreferenced:
+                _blob_path(digest).unlink(missing_ok=True)
+        conn.execute("COMMIT")
+        stored = 0
+        for row in conn.execute("SELECT DISTINCT blob FROM revisions"):
+            try:
+                stored += _blob_path(row["blob"]).stat().st_size
+            except OSError:
+                pass
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    for suffix in ("", "-wal"):
+        path = Path(f"{store_path()}{suffix}")
+        if path.exists():
+            stored += path.stat().st_size
+    return {"revisions": len(doomed), "blobs": len(unreferenced), "bytes": stored}
+
+
+def print_history(revisions: list[dict], kind: str):
+    if not revisions:
+        print(f"No {kind} revisions saved.")
+        return
+    for item in revisions:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(item["created"]))
+        stat = f"  {item['files']} files +{item['added']} -{item['removed']}" if kind == "patch" else ""
+        print(f"{item['rev']:>4}  {when}  {item['source']:<12} {item['size']:>7} B  {item['blob'][:12]}{stat}")
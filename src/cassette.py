@@ -0,0 +1,200 @@
+import atexit
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+import http_client
+from workspace_store import read_record, workspace_dir, workspace_root, write_record
+
+# Response headers the clients read; everything else is dropped to keep cassettes small.
+KEPT_HEADERS = {"content-type", "link", "retry-after", "x-ratelimit-remaining", "x-ratelimit-reset"}
+# What a run reads from the issue directory before making any request; saved
+# with the cassette so replay can start from the same workspace.
+INPUT_RECORDS = ("issue", "context")
+INPUT_FILES = ("plan.md", "session.json")
+
+class CassetteMiss(RuntimeError):
+    """Replay asked for a request the cassette has no (more) responses for."""
+
+
+def cassette_dir() -> Path:
+    return workspace_root() / "cassettes"
+
+
+def _key(method: str, url: str, body) -> str:
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query)))
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    return f"{method} {urlunsplit(parts._replace(query=query))} {body or ''}"
+
+
+def _inputs(repo: str, issue: int | None) -> dict:
+    base_dir = workspace_dir(repo, issue)
+    records = {name: read_record(base_dir, name) for name in INPUT_RECORDS}
+    files = {name: (base_dir / name).read_text(encoding="utf-8") for name in INPUT_FILES if (base_dir / name).exists()}
+    return {"repo": repo, "issue": issue, "records": {k: v for k, v in records.items() if v is not None}, "files": files}
+
+
+def _seed(inputs: dict):
+    base_dir = workspace_dir(inputs["repo"], inputs["issue"])
+    base_dir.mkdir(parents=True, exist_ok=True)
+    for name, data in inputs["records"].items():
+        write_record(base_dir, name, data)
+    for name, text in inputs["files"].items():
+        (base_dir / name).write_text(text, encoding="utf-8")
+
+
+class _Recorder:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.started = time.time()
+        self._fh = gzip.open(path, "at", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, entry: dict):
+        with self._lock:
+            self._fh.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            # Flushed per entry so a run that crashes still leaves a usable cassette.
+            self._fh.flush()
+
+
+class RecordingAdapter(HTTPAdapter):
+    recorder: _Recorder = None
+
+    def send(self, request, **kwargs):
+        sent = time.time()
+        response = super().send(request, **kwargs)
+        self.recorder.write({
+            "t": round(sent - self.recorder.started, 3),
+            "ms": round((time.time() - sent) * 1000, 1),
+            "method": request.method,
+            "url": request.url,
+            "body": request.body.decode("utf-8", errors="replace") if isinstance(request.body, bytes) else request.body,
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in KEPT_HEADERS},
+            "content": response.text,
+        })
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Serves recorded responses in order per (method, url, body); never touches the network."""
+
+    entries: dict[str, deque] = {}
+    realtime = False
+    started = 0.0
+    _lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        super().__init__()
+
+    def send(self, request, **kwargs):
+        key = _key(request.method, request.url, request.body)
+        with self._lock:
+            queue = self.entries.get(key)
+            if not queue:
+                raise CassetteMiss(f"No recorded response for {request.method} {request.url}")
+            # A replay may poll a different number of times than the recording
+            # did, so the last response to a GET keeps answering repeats of it.
+            entry = queue[0] if len(queue) == 1 and request.method == "GET" else queue.popleft()
+        if self.realtime:
+            # Recorded speed: hand the response back when the original one arrived.
+            due = self.started + entry["t"] + entry["ms"] / 1000
+            if due > time.time():
+                time.sleep(due - time.time())
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = entry["content"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class _VirtualClock:
+    """The time module as the Devin client sees it in a replay: sleeps return at once but advance time()."""
+
+    def __init__(self):
+        self.offset = 0.0
+        self._lock = threading.Lock()
+
+    def sleep(self, seconds: float):
+        with self._lock:
+            self.offset += max(0.0, seconds)
+
+    def time(self) -> float:
+        return time.time() + self.offset
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def record(name: str | None = None, repo: str | None = None, issue: int | None = None) -> Path:
+    """Record every GitHub/Devin request and response of this run, after the issue's saved inputs; returns the cassette path."""
+    name = name or time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+    path = cassette_dir() / f"{name}.jsonl.gz"
+    RecordingAdapter.recorder = _Recorder(path)
+    if repo and issue is not None:
+        RecordingAdapter.recorder.write({"inputs": _inputs(repo, issue)})
+    http_client.use_adapter(RecordingAdapter)
+    return path
+
+
+def load(path: Path) -> tuple[dict[str, deque], list[dict]]:
+    """(responses by request key, saved workspace inputs)."""
+    entries: dict[str, deque] = defaultdict(deque)
+    inputs = []
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            entry = json.loads(line)
+            if "inputs" in entry:
+                inputs.append(entry["inputs"])
+                continue
+            entries[_key(entry["method"], entry["url"], entry["body"])].append(entry)
+    return entries, inputs
+
+
+def replay(path: Path, realtime: bool = False) -> Path:
+    """Answer every request of this run from a cassette in a scratch workspace seeded with the recorded inputs; returns that workspace."""
+    import devin_client
+    import poll_schedule
+
+    scratch = Path(tempfile.mkdtemp(prefix="devin-replay-"))
+    os.environ["DEVIN_WORKSPACE"] = str(scratch)
+    atexit.register(shutil.rmtree, scratch, ignore_errors=True)
+    # Requests never leave the process, so no real key is needed (or sent).
+    os.environ.setdefault("DEVIN_API_KEY", "replay")
+    poll_schedule.record_enabled = False
+    ReplayAdapter.entries, inputs = load(path)
+    for saved in inputs:
+        _seed(saved)
+    ReplayAdapter.realtime = realtime
+    ReplayAdapter.started = time.time()
+    http_client.use_adapter(ReplayAdapter)
+    devin_client.time = _VirtualClock()
+    return scratch
+
+
+def resolve(name: str) -> Path:
+    """A cassette given as a path, or as a name under .devin-workspace/cassettes."""
+    path = Path(name)
+    if path.exists():
+        return path
+    return cassette_dir() / (name if name.endswith(".jsonl.gz") else f"{name}.jsonl.gz")
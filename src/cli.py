@@ -1,32 +1,100 @@
+from __future__ import annotations
+
 import argparse
 import json
+import os
 import re
 import sys
-from dotenv import load_dotenv
-
-from comment_selection import select_relevant_comments
-from devin_client import create_devin_session, devin_ui_url, poll_devin_session, send_devin_message
-from formatting import _format_structured_output, _print_devin_output
-from github_client import fetch_issue_comments, list_issues
-from prompt_builder import (
-    build_clarify_prompt,
-    build_devin_prompt,
-    build_execution_prompt,
-    build_pr_execution_prompt,
-    build_plan_prompt,
-    is_valid_clarify,
-    is_valid_plan,
-)
+import time
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+# Everything beyond the workspace store is imported where it is used, so --help
+# and cached plans start fast; import_budget.py guards this.
+from models import Comment, Issue
+from workspace_store import (
+    has_record,
+    load_context,
+    load_issue,
+    save_context,
+    save_issue,
+    touch_dir,
+    workspace_dir,
+    workspace_root,
+)
+
+if TYPE_CHECKING:
+    import job_queue
+    from locks import Flight
 
 
 def main(argv=None):
-    load_dotenv()
     args = _parse_args(argv)
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if args.repo_map:
+        # Read by repo_context in this process and in any worker threads it starts.
+        os.environ["DEVIN_REPO_MAP"] = "1"
+    if args.record or args.replay:
+        _setup_cassette(args)
+    try:
+        _dispatch(args)
+    except RuntimeError as exc:
+        # A DevinError or SessionPending can only have been raised if its module was loaded.
+        devin_client = sys.modules.get("devin_client")
+        job_queue = sys.modules.get("job_queue")
+        if job_queue is not None and isinstance(exc, job_queue.SessionPending):
+            print(exc)
+            return
+        if devin_client is None or not isinstance(exc, devin_client.DevinError):
+            raise
+        print(exc)
+        sys.exit(1)
+
+
+def _setup_cassette(args):
+    import cassette
+
+    if args.record and args.replay:
+        print("--record and --replay cannot be combined.")
+        sys.exit(1)
+    # A replayed run must not hand its work to a live daemon.
+    args.no_daemon = True
+    if args.record:
+        path = cassette.record(None if args.record is True else args.record, args.repo, args.issue)
+        print(f"Recording HTTP traffic to {path}")
+        return
+    path = cassette.resolve(args.replay)
+    if not path.exists():
+        print(f"Cassette not found: {path}")
+        sys.exit(1)
+    cassette.replay(path, realtime=args.replay_speed == "recorded")
+    print(f"Replaying HTTP traffic from {path}")
+
+
+def _dispatch(args):
+    if args.migrate_workspace:
+        _run_migrate_workspace(args.compression)
+        return
+    if args.gc:
+        _run_gc(args)
+        return
+    if args.index_similar:
+        import similar
+
+        stats = similar.index_workspace()
+        print(
+            f"Similar-issue index: {stats['indexed']} updated, {stats['unchanged']} unchanged, {stats['removed']} removed."
+        )
+        return
     if args.mode:
         _run_mode(args)
         return
 
+    from comment_selection import select_relevant_comments
+    from github_client import fetch_issue_comments, list_issues
+
     repo = input("Repo (owner/name): ").strip()
     if not repo:
         print("Repo is required.")
@@ -49,9 +117,9 @@ def main(argv=None):
 
     selected = issues[idx]
     print("\nSelected issue:")
-    print(f"#{selected['number']}  {selected['title']}")
+    print(f"#{selected.number}  {selected.title}")
 
-    comments = fetch_issue_comments(repo, selected.get("number"))
+    comments = fetch_issue_comments(repo, selected.number)
     selected_comments = select_relevant_comments(comments, max_count=3)
     if comments is not None:
         print(f"Fetched {len(comments)} comments, selected {len(selected_comments)}")
@@ -61,12 +129,41 @@ def main(argv=None):
 
 
 def _run_mode(args):
+    # Modes that do not act on a single --repo/--issue; each handler imports what it needs.
+    handler = {
+        "ingest": _run_ingest_mode,
+        "webhook": _run_webhook_mode,
+        "webhook-replay": _run_webhook_replay_mode,
+        "worker": _run_worker_mode,
+        "enqueue": _run_enqueue_mode,
+        "triage": _run_triage_mode,
+        "execute-batch": _run_execute_batch_mode,
+        "budget": _run_budget_mode,
+        "history": _run_history_mode,
+        "rollback": _run_rollback_mode,
+        "daemon": _run_daemon_mode,
+    }.get(args.mode)
+    if handler is not None:
+        handler(args)
+        return
+    if args.jsonl:
+        _run_jsonl_mode(args)
+        return
+
     if not args.repo or args.issue is None:
         print("Both --repo and --issue are required when --mode is set.")
         sys.exit(1)
 
     repo = args.repo
     issue_number = args.issue
+    if not args.no_daemon and _needs_session(repo, issue_number, args.mode, args.fresh):
+        import daemon
+
+        url = daemon.find_running()
+        if url:
+            _run_via_daemon(url, repo, issue_number, args.mode, args.fresh)
+            return
+
     if args.mode == "execute":
         _run_execute_mode(repo, issue_number)
         return
@@ -78,17 +175,15 @@ def _run_mode(args):
 
 
 def _run_plan_mode(repo: str, issue_number: int, fresh: bool):
-    base_dir = _workspace_dir(repo, issue_number)
-    issue_path = base_dir / "issue.json"
-    context_path = base_dir / "context.json"
+    base_dir = workspace_dir(repo, issue_number)
+    touch_dir(base_dir)
     plan_path = base_dir / "plan.md"
 
     selected = None
     selected_comments = []
-    if not fresh and issue_path.exists() and context_path.exists():
-        selected = _load_json(issue_path)
-        context_data = _load_json(context_path)
-        selected_comments = context_data.get("comments") or []
+    if not fresh and has_record(base_dir, "issue") and has_record(base_dir, "context"):
+        selected = load_issue(base_dir)
+        selected_comments = load_context(base_dir) or []
         if plan_path.exists():
             plan_text = plan_path.read_text(encoding="utf-8")
             print("\nCurrent plan:\n")
@@ -98,99 +193,621 @@ def _run_plan_mode(repo: str, issue_number: int, fresh: bool):
             _run_menu(repo, selected, selected_comments, session_id, data, status="blocked")
             return
 
+    if selected is None and not fresh and has_record(base_dir, "issue"):
+        # Saved by --mode ingest; only the comments still need fetching.
+        selected = load_issue(base_dir)
+
+    import job_queue
+    from comment_selection import select_relevant_comments
+    from github_client import fetch_issue_comments, find_issue
+
+    steps = job_queue.resume_or_start(repo, issue_number, "plan")
+    if steps.get("fetched") and has_record(base_dir, "issue") and has_record(base_dir, "context"):
+        # An earlier run crashed after fetching; reuse what it saved.
+        _run_plan_flow(repo, load_issue(base_dir), load_context(base_dir) or [], steps=steps)
+        return
+
     if selected is None:
-        issues = list_issues(repo)
-        if not issues:
-            return
-        match = None
-        for it in issues:
-            if it.get("number") == issue_number:
-                match = it
-                break
-        if match is None:
+        selected = find_issue(repo, issue_number)
+        if selected is None:
             print("Issue not found in list.")
+            steps.finish(error="issue not found")
             return
-        selected = match
 
-    comments = fetch_issue_comments(repo, selected.get("number"))
+    comments = fetch_issue_comments(repo, selected.number)
     selected_comments = select_relevant_comments(comments, max_count=3)
     if comments is not None:
         print(f"Fetched {len(comments)} comments, selected {len(selected_comments)}")
         _save_issue_and_context(repo, selected, selected_comments)
+        steps.record("fetched")
+
+    _run_plan_flow(repo, selected, selected_comments, steps=steps)
+
+
+def _run_ingest_mode(args):
+    from ingest import ingest, print_summary
+
+    repos = [r.strip() for r in (args.repos or "").split(",") if r.strip()]
+    if args.repo:
+        repos.append(args.repo)
+    if not args.org and not repos:
+        print("--org or --repos is required when --mode ingest is set.")
+        sys.exit(1)
+    summary = ingest(org=args.org, repos=repos or None, strategy=args.strategy, max_workers=args.workers)
+    print_summary(summary)
+
+
+def _run_triage_mode(args):
+    import triage
+
+    if not args.repo:
+        print("--repo is required when --mode triage is set.")
+        sys.exit(1)
+    ranked = triage.rank(args.repo, top=args.top, refresh=args.fresh)
+    triage.print_ranking(ranked)
+    if not args.enqueue or not ranked:
+        return
+    import workers
+
+    try:
+        backend = workers.open_backend(args.queue)
+    except (RuntimeError, ValueError) as exc:
+        print(exc)
+        sys.exit(1)
+    for score, issue, _ in ranked:
+        backend.enqueue(args.repo, issue.number, "plan", source="triage", options={"priority": score})
+    print(f"Queued plan jobs for the top {len(ranked)} issues.")
+
+
+def _run_webhook_mode(args):
+    import webhook
+
+    try:
+        webhook.serve(_run_job, host=args.host, port=args.port or 8787)
+    except RuntimeError as exc:
+        print(exc)
+        sys.exit(1)
+
+
+def _run_webhook_replay_mode(args):
+    import webhook
+
+    if not args.payload or not args.event:
+        print("--payload and --event are required when --mode webhook-replay is set.")
+        sys.exit(1)
+    try:
+        status, message = webhook.replay(Path(args.payload), args.event, args.delivery, url=args.url)
+    except RuntimeError as exc:
+        print(exc)
+        sys.exit(1)
+    print(f"{status} {message}")
+
+
+def _run_worker_mode(args):
+    import workers
+
+    try:
+        backend = workers.open_backend(args.queue)
+    except (RuntimeError, ValueError) as exc:
+        print(exc)
+        sys.exit(1)
+    modes = {m.strip() for m in args.job.split(",")} if args.job else None
+    print(f"Running {args.workers} workers against {args.queue or 'the local queue'}. Press Ctrl-C to stop.")
+    workers.run_workers(_run_job, backend, args.workers, lease_seconds=args.lease, modes=modes)
+
+
+def _run_enqueue_mode(args):
+    import workers
+
+    if not args.repo or args.issue is None or args.job not in {"plan", "execute", "execute-pr"}:
+        print("--repo, --issue and --job (plan, execute or execute-pr) are required when --mode enqueue is set.")
+        sys.exit(1)
+    try:
+        backend = workers.open_backend(args.queue)
+    except (RuntimeError, ValueError) as exc:
+        print(exc)
+        sys.exit(1)
+    job_id = backend.enqueue(args.repo, args.issue, args.job, source="cli", options={"fresh": args.fresh})
+    print(f"Queued job {job_id}")
+
+
+def _run_jsonl_mode(args):
+    import pipeline
+
+    if args.mode not in {"plan", "execute", "execute-pr"}:
+        print("--jsonl works with --mode plan, execute or execute-pr.", file=sys.stderr)
+        sys.exit(1)
+    pipeline.run(_run_job, args.mode, args.workers, default_repo=args.repo, fresh=args.fresh)
+
+
+def _run_budget_mode(args):
+    import governor
+
+    governor.print_status(governor.status())
+
+
+def _run_history_mode(args):
+    import artifacts
+
+    if args.file:
+        for hit in artifacts.touching(args.file, args.repo):
+            print(f"{hit['repo']}#{hit['issue']} patch@{hit['rev']}  +{hit['added']} -{hit['removed']}")
+        return
+    if not args.repo or args.issue is None:
+        print("--repo and --issue (or --file) are required when --mode history is set.")
+        sys.exit(1)
+    try:
+        if args.rev is not None and args.compare is not None:
+            print(artifacts.compare(args.repo, args.issue, args.kind, args.rev, args.compare), end="")
+        elif args.rev is not None:
+            if args.kind == "patch":
+                for path, added, removed in artifacts.files(args.repo, args.issue, args.rev):
+                    print(f"{added:>5} {removed:>5}  {path}", file=sys.stderr)
+            print(artifacts.get(args.repo, args.issue, args.kind, args.rev), end="")
+        else:
+            artifacts.print_history(artifacts.history(args.repo, args.issue, args.kind), args.kind)
+    except ValueError as exc:
+        print(exc)
+        sys.exit(1)
+
+
+def _run_rollback_mode(args):
+    import artifacts
+    import similar
+
+    if not args.repo or args.issue is None or args.rev is None:
+        print("--repo, --issue and --rev are required when --mode rollback is set.")
+        sys.exit(1)
+    try:
+        rev = artifacts.rollback(args.repo, args.issue, args.kind, args.rev)
+    except ValueError as exc:
+        print(exc)
+        sys.exit(1)
+    if args.kind == "plan":
+        similar.update(args.repo, args.issue)
+    print(f"Restored {args.kind} revision {args.rev} as revision {rev}.")
+
+
+def _run_daemon_mode(args):
+    import daemon
+
+    daemon.serve(_run_job, host=args.host, port=args.port or 0, workers=args.workers)
+
+
+def _needs_session(repo: str, issue_number: int, mode: str, fresh: bool) -> bool:
+    if mode != "plan" or fresh:
+        return True
+    base_dir = workspace_dir(repo, issue_number)
+    cached = has_record(base_dir, "issue") and has_record(base_dir, "context")
+    return not (cached and (base_dir / "plan.md").exists())
 
-    _run_plan_flow(repo, selected, selected_comments)
+
+def _run_via_daemon(url: str, repo: str, issue_number: int, mode: str, fresh: bool):
+    import daemon
+
+    try:
+        job_id = daemon.submit(url, repo, issue_number, mode, options={"fresh": fresh})
+        print(f"Submitted job {job_id} to daemon at {url}, waiting...")
+        job = daemon.wait(url, job_id)
+    except daemon.DaemonError as exc:
+        print(exc)
+        sys.exit(1)
+    if job["state"] == "failed":
+        print(f"Job failed: {job['error']}")
+        sys.exit(1)
+    if job["state"] != "done":
+        session = f"; Devin session {job['session_id']} is still running" if job.get("session_id") else ""
+        print(f"Job {job_id} is pending ({job['state']}{session}).")
+        print("The daemon keeps working on it; rerun the same command to check again.")
+        return
+
+    if mode == "plan":
+        _run_plan_mode(repo, issue_number, fresh=False)
+        return
+    _show_saved_execution(job)
+
+
+def _show_saved_execution(job, saved: dict | None = None):
+    """Print what a finished execute or execute-pr job produced, from its output_saved step (saved, if already read)."""
+    import job_queue
+
+    if saved is None:
+        saved = job_queue.Steps(job["id"]).get("output_saved") or {}
+    if job["mode"] == "execute":
+        if saved.get("path"):
+            print(f"Saved patch: {saved['path']}")
+            print("Inspect: git apply --stat devin.patch")
+            print("Apply: git apply devin.patch")
+        else:
+            print("Execution finished without a patch.")
+        return
+    if saved.get("pr_url"):
+        print(f"PR URL: {saved['pr_url']}")
+        return
+    reason = saved.get("reason")
+    if reason is None:
+        files = (json.loads(job["result"]) if job.get("result") else {}).get("files") or {}
+        reason = _extract_pr_failure_reason(files.get("devin_final.md", ""))
+    print("PR creation failed.")
+    print(f"Reason: {reason}")
+
+
+def _adopt_result(steps: job_queue.Steps | None, job: dict, step: str) -> dict | None:
+    """Finish our job with the result step of the job we waited on; returns that step ({} if it has none)."""
+    if steps is None:
+        return None
+    saved = steps.adopt(job["id"], step) or {}
+    steps.finish()
+    return saved
+
+
+def _run_job(repo: str, issue_number: int, mode: str, options: dict, steps: job_queue.Steps):
+    """Run one queued job without prompting, resuming from its recorded steps."""
+    import governor
+
+    # Queued work yields to interactive runs unless the job says otherwise.
+    with governor.priority(int(options.get("priority") or 0)):
+        _run_queued_job(repo, issue_number, mode, options, steps)
+
+
+def _run_queued_job(repo: str, issue_number: int, mode: str, options: dict, steps: job_queue.Steps):
+    base_dir = workspace_dir(repo, issue_number)
+    touch_dir(base_dir)
+    if mode in {"execute", "execute-pr"}:
+        plan_path = base_dir / "plan.md"
+        if not plan_path.exists():
+            raise ValueError("No saved plan found. Run plan mode first.")
+        issue = load_issue(base_dir) or Issue(number=issue_number)
+        context_comments = load_context(base_dir) or []
+        plan_text = plan_path.read_text(encoding="utf-8")
+        if mode == "execute":
+            _execute_patch(repo, issue_number, issue, context_comments, plan_text, steps=steps)
+            return
+        _run_execute_pr_flow(repo, issue_number, issue, context_comments, plan_text, interactive=False, steps=steps)
+        return
+    if mode != "plan":
+        raise ValueError(f"Unsupported job mode: {mode}")
+    resuming = steps.get("plan_session") is not None
+    if not resuming and not options.get("fresh") and (base_dir / "plan.md").exists():
+        print(f"Plan already saved for {repo}#{issue_number}, skipping.")
+        steps.record("plan_saved", cached=True)
+        return
+    if steps.get("fetched") and has_record(base_dir, "context"):
+        selected = load_issue(base_dir) or Issue(number=issue_number)
+        selected_comments = load_context(base_dir) or []
+    else:
+        from comment_selection import select_relevant_comments
+        from github_client import fetch_issue_comments, find_issue
+
+        selected = load_issue(base_dir) or find_issue(repo, issue_number)
+        if selected is None:
+            raise ValueError(f"Issue {repo}#{issue_number} not found")
+        comments = fetch_issue_comments(repo, selected.number)
+        selected_comments = select_relevant_comments(comments, max_count=3)
+        _save_issue_and_context(repo, selected, selected_comments)
+        steps.record("fetched")
+    _run_plan_flow(repo, selected, selected_comments, interactive=False, steps=steps)
 
 
 def _run_execute_mode(repo: str, issue_number: int):
-    base_dir = _workspace_dir(repo, issue_number)
+    base_dir = workspace_dir(repo, issue_number)
+    touch_dir(base_dir)
     plan_path = base_dir / "plan.md"
     if not plan_path.exists():
         print("No saved plan found. Run with --mode plan first.")
         sys.exit(1)
 
     plan_text = plan_path.read_text(encoding="utf-8")
-    issue = {}
-    context_comments = []
-    issue_path = base_dir / "issue.json"
-    context_path = base_dir / "context.json"
-    if issue_path.exists():
-        issue = _load_json(issue_path)
-    if context_path.exists():
-        context_data = _load_json(context_path)
-        context_comments = context_data.get("comments") or []
-
-    exec_prompt = build_execution_prompt(issue, repo, context_comments, plan_text)
-    print("Starting execution session...")
-    exec_session_id = create_devin_session(exec_prompt)
-    exec_status, exec_data = poll_devin_session(exec_session_id, max_wait=600)
-    exec_output = _extract_final_text(exec_data)
-    if "REPO_ACCESS: FAILED" in exec_output:
-        print("Repo access failed. Execution aborted.")
-        print(exec_output)
-        return
-    patch_path = _write_patch_file(repo, issue_number, exec_output)
-    print(f"Saved patch: {patch_path}")
-    print("Inspect: git apply --stat devin.patch")
-    print("Apply: git apply devin.patch")
+    issue = load_issue(base_dir) or Issue(number=issue_number)
+    context_comments = load_context(base_dir) or []
+
+    _execute_patch(repo, issue_number, issue, context_comments, plan_text)
 
 
 def _run_execute_pr_mode(repo: str, issue_number: int):
-    base_dir = _workspace_dir(repo, issue_number)
+    base_dir = workspace_dir(repo, issue_number)
+    touch_dir(base_dir)
     plan_path = base_dir / "plan.md"
     if not plan_path.exists():
         print("No saved plan found. Run plan mode first.")
         sys.exit(1)
 
     plan_text = plan_path.read_text(encoding="utf-8")
-    issue = {}
-    context = {}
-    issue_path = base_dir / "issue.json"
-    context_path = base_dir / "context.json"
-    if issue_path.exists():
-        issue = _load_json(issue_path)
-    if context_path.exists():
-        context = _load_json(context_path)
+    issue = load_issue(base_dir) or Issue(number=issue_number)
+    context_comments = load_context(base_dir) or []
+
+    _run_execute_pr_flow(repo, issue_number, issue, context_comments, plan_text)
+
+
+def _run_execute_batch_mode(args):
+    from concurrent.futures import ThreadPoolExecutor
+
+    import job_queue
+    import patches
+
+    if not args.repo:
+        print("--repo is required when --mode execute-batch is set.")
+        sys.exit(1)
+    repo = args.repo
+    if args.issues:
+        try:
+            numbers = sorted({int(n.strip().lstrip("#")) for n in args.issues.split(",") if n.strip()})
+        except ValueError:
+            print(f"--issues must be comma-separated issue numbers, got: {args.issues}")
+            sys.exit(1)
+    else:
+        repo_dir = workspace_root() / repo.replace("/", "_")
+        numbers = sorted(
+            int(d.name.split("-", 1)[1]) for d in repo_dir.glob("issue-*") if d.name.split("-", 1)[1].isdigit()
+        )
+    numbers = [n for n in numbers if (workspace_dir(repo, n) / "plan.md").exists()]
+    if not numbers:
+        print("No issues with saved plans to execute.")
+        return
+
+    def patched(issue_number: int) -> bool:
+        """A finished execute job already saved a patch for the current plan."""
+        conn = job_queue.connect()
+        try:
+            saved = job_queue.saved_output(conn, repo, issue_number, "execute")
+        finally:
+            conn.close()
+        if saved is None or not saved["data"].get("path"):
+            return False
+        plan_path = workspace_dir(repo, issue_number) / "plan.md"
+        return Path(saved["data"]["path"]).exists() and saved["at"] >= plan_path.stat().st_mtime
+
+    def run(issue_number: int):
+        try:
+            _run_execute_mode(repo, issue_number)
+        except Exception as exc:
+            print(f"#{issue_number}: {exc}")
+        except SystemExit:
+            print(f"#{issue_number}: stopped")
+
+    if not args.fresh:
+        done = [n for n in numbers if patched(n)]
+        if done:
+            print(f"Reusing saved patches for {', '.join(f'#{n}' for n in done)} (--fresh to redo).")
+        todo = [n for n in numbers if n not in done]
+    else:
+        todo = numbers
+    if todo:
+        print(f"Executing {len(todo)} plans with up to {args.workers} sessions at once...")
+        with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(todo)))) as pool:
+            list(pool.map(run, todo))
+
+    diffs = {}
+    for n in numbers:
+        path = workspace_dir(repo, n) / "devin.patch"
+        diff = patches.extract_diff(path.read_text(encoding="utf-8")) if path.exists() else ""
+        if diff:
+            diffs[n] = diff
+        else:
+            print(f"#{n}: no patch produced")
+    if not diffs:
+        return
 
-    _run_execute_pr_flow(repo, issue_number, issue, context, plan_text)
+    index = patches.hunk_index(diffs)
+    shared = {path: sorted({i for i, _ in entries}) for path, entries in index.items()}
+    shared = {path: issues for path, issues in shared.items() if len(issues) > 1}
+    print(f"\nPatches touch {len(index)} files; {len(shared)} are touched by more than one issue.")
+    for path, issue_a, hunk_a, issue_b, hunk_b in patches.overlaps(index):
+        print(f"  conflict: {path} #{issue_a} lines {hunk_a.start}-{hunk_a.end} vs #{issue_b} lines {hunk_b.start}-{hunk_b.end}")
 
+    try:
+        applied, failed, combined = patches.combined_apply(repo, diffs)
+    except RuntimeError as exc:
+        print(f"Combined apply check skipped: {exc}")
+        return
+    for n, error in failed.items():
+        print(f"#{n} does not apply on top of the others: {error.splitlines()[-1] if error else ''}")
+    if applied:
+        batch_path = workspace_root() / repo.replace("/", "_") / "batch.patch"
+        batch_path.write_text(combined, encoding="utf-8")
+        print(f"Combined patch for {', '.join(f'#{n}' for n in applied)}: {batch_path}")
+
+
+def _acquire_flight(
+    repo: str, issue_number: int | None, mode: str, steps: job_queue.Steps | None = None
+) -> tuple[Flight, dict | None]:
+    """Take the single-flight lock; returns (flight, attached), attached being the job if another holder finished this work while we waited."""
+    import job_queue
+    from devin_client import devin_ui_url
+    from locks import single_flight
+
+    started = time.time()
+
+    def on_wait(owner: dict):
+        session = f", session {devin_ui_url(owner['session_id'])}" if owner.get("session_id") else ""
+        print(
+            f"{repo}#{issue_number} {mode} is already running "
+            f"(pid {owner.get('pid')} on {owner.get('host')}{session}); waiting for it..."
+        )
+
+    flight = single_flight(repo, issue_number, mode, on_wait=on_wait)
+    if not flight.waited:
+        return flight, None
+    if steps is not None:
+        return flight, steps.finished_job(started)
+    conn = job_queue.connect()
+    try:
+        job = job_queue.latest_job(conn, repo, issue_number, mode)
+    finally:
+        conn.close()
+    attached = job is not None and job["state"] == "done" and job["updated_at"] >= started
+    return flight, dict(job) if attached else None
+
+
+def _start_session(
+    steps: job_queue.Steps,
+    step: str,
+    prompt: str,
+    flight: Flight | None,
+    repo: str,
+    kind: str,
+) -> tuple[str, bool, float | None]:
+    """Create a Devin session once the governor allows it, or reuse the one this step recorded; returns (session_id, resumed, created_at)."""
+    import governor
+    from devin_client import create_devin_session
+
+    prior = steps.get(step)
+    if prior and prior.get("session_id"):
+        session_id, resumed, created = prior["session_id"], True, prior.get("created_at")
+        governor.resume(repo, kind, session_id)
+    else:
+        segment = governor.acquire(repo, kind)
+        created = time.time()
+        try:
+            session_id, resumed = create_devin_session(prompt), False
+        except BaseException:
+            governor.cancel(segment)
+            raise
+        governor.bind(segment, session_id)
+        steps.record(step, session_id=session_id, created_at=created)
+    if flight is not None:
+        flight.note(session_id=session_id)
+    return session_id, resumed, created
+
+
+def _poll(session_id: str, repo: str, kind: str, **kwargs):
+    """poll_devin_session, handing the session's governor slot back once we stop watching it."""
+    import governor
+    from devin_client import poll_devin_session
 
-def _run_plan_flow(repo: str, selected: dict, selected_comments: list):
-    prompt = build_devin_prompt(selected, repo, selected_comments)
-    session_id = create_devin_session(prompt)
+    try:
+        return poll_devin_session(session_id, kind=kind, repo=repo, **kwargs)
+    finally:
+        governor.release(session_id)
+
+
+def _run_plan_flow(
+    repo: str,
+    selected: Issue,
+    selected_comments: list[Comment],
+    interactive: bool = True,
+    steps: job_queue.Steps | None = None,
+):
+    reference_plan = None
+    if interactive and (steps is None or steps.get("plan_session") is None):
+        offered = _offer_similar_plan(repo, selected)
+        if offered is not None:
+            action, plan_text = offered
+            if action == "reuse":
+                if steps is not None:
+                    steps.finish()
+                print("\nCurrent plan:\n")
+                print(plan_text)
+                _run_menu(repo, selected, selected_comments, None, {"output_text": plan_text}, "blocked")
+                return
+            reference_plan = plan_text
+
+    flight, attached = _acquire_flight(repo, selected.number, "plan", steps)
+    if attached:
+        flight.release()
+        _adopt_result(steps, attached, "plan_saved")
+        plan_text = (workspace_dir(repo, selected.number) / "plan.md").read_text(encoding="utf-8")
+        print("\nCurrent plan:\n")
+        print(plan_text)
+        session_id = _load_session_id(repo, selected.number)
+        data = {"output_text": plan_text}
+        status = "blocked"
+    else:
+        try:
+            session_id, status, data = _plan_session(repo, selected, selected_comments, steps, flight, reference_plan)
+        finally:
+            flight.release()
+
+    if interactive:
+        _run_menu(repo, selected, selected_comments, session_id, data, status)
+
+
+def _plan_session(
+    repo: str,
+    selected: Issue,
+    selected_comments: list[Comment],
+    steps: job_queue.Steps | None,
+    flight: Flight,
+    reference_plan: str | None = None,
+):
+    import job_queue
+    from devin_client import devin_ui_url
+    from formatting import _print_devin_output
+    from prompt_builder import build_devin_prompt, is_valid_plan
+
+    steps = steps or job_queue.resume_or_start(repo, selected.number, "plan")
+    # Under the flight now: a run that held it and died left its session to resume.
+    steps.take_over()
+    repo_map = None if steps.get("plan_session") else _repo_map(repo, selected, selected_comments)
+    prompt = build_devin_prompt(selected, repo, selected_comments, reference_plan=reference_plan, repo_map=repo_map)
+    session_id, resumed, created = _start_session(steps, "plan_session", prompt, flight, repo, "plan")
     session_url = devin_ui_url(session_id)
-    print(f"Devin session created: {session_id}")
+    print(f"Devin session {'resumed' if resumed else 'created'}: {session_id}")
     print(f"Session URL: {session_url}")
-    _save_session(repo, selected.get("number"), session_id)
-
-    status, data = poll_devin_session(session_id, validator=is_valid_plan, required_status={"finished", "blocked"})
+    _save_session(repo, selected.number, session_id)
+
+    status, data = _poll(
+        session_id,
+        repo,
+        "plan",
+        validator=is_valid_plan,
+        required_status={"finished", "blocked"},
+        started_at=created,
+        history=not resumed,
+    )
+    if status == "timeout":
+        raise job_queue.SessionPending(session_id)
     _print_devin_output(data)
-    _save_plan(repo, selected.get("number"), data)
+    _save_plan(repo, selected.number, data)
+    steps.record("plan_saved")
+    steps.finish()
     print(f"Final status: {status}")
+    return session_id, status, data
+
+
+def _repo_map(repo: str, issue: Issue, comments: list[Comment] | None) -> str | None:
+    """Precomputed repo context for the prompt when --repo-map is on; None if off or unavailable."""
+    import repo_context
+
+    if not repo_context.enabled():
+        return None
+    try:
+        return repo_context.context_pack(repo, issue, comments)
+    except (RuntimeError, OSError) as exc:
+        print(f"Skipping repo map: {exc}")
+        return None
 
-    _run_menu(repo, selected, selected_comments, session_id, data, status)
 
+def _offer_similar_plan(repo: str, selected: Issue):
+    """Offer a saved plan from a near-duplicate issue; returns (action, plan_text) or None."""
+    import similar
 
-def _run_menu(repo: str, selected: dict, selected_comments: list, session_id, data: dict, status: str):
+    matches = similar.lookup(repo, selected)
+    matches = [(score, n) for score, n in matches if (workspace_dir(repo, n) / "plan.md").exists()]
+    if not matches:
+        return None
+    print("\nSimilar issues with saved plans:")
+    for score, number in matches:
+        other = load_issue(workspace_dir(repo, number))
+        print(f"  #{number} ({score:.0%} similar): {other.title if other else ''}")
+    number = matches[0][1]
+    while True:
+        choice = input(
+            f"Use the plan from #{number}? (U) Reuse as-is, (S) Seed a new session with it, (N) Plan from scratch: "
+        ).strip().lower()
+        if choice == "n":
+            return None
+        if choice in {"u", "s"}:
+            break
+        print("Invalid choice. Please enter U, S, or N.")
+    plan_text = (workspace_dir(repo, number) / "plan.md").read_text(encoding="utf-8")
+    if choice == "u":
+        _save_plan(repo, selected.number, {"output_text": plan_text}, source=f"reuse:{number}")
+        return "reuse", plan_text
+    return "seed", plan_text
+
+
+def _run_menu(repo: str, selected: Issue, selected_comments: list[Comment], session_id, data: dict, status: str):
     while status == "blocked":
         choice = input(
             "\nNext action: (A) Approve, (R) Revise, (Q) Ask clarifying questions, (D) Deny: "
@@ -203,30 +820,17 @@ def _run_menu(repo: str, selected: dict, selected_comments: list, session_id, da
                 return
             if next_action == "e":
                 approved_plan = _extract_plan_text(data)
-                exec_prompt = build_execution_prompt(selected, repo, selected_comments, approved_plan)
-                print("Starting execution session...")
-                exec_session_id = create_devin_session(exec_prompt)
-                exec_status, exec_data = poll_devin_session(exec_session_id, max_wait=600)
-                exec_output = _extract_final_text(exec_data)
-                if "REPO_ACCESS: FAILED" in exec_output:
-                    print("Repo access failed. Execution aborted.")
-                    print(exec_output)
-                    return
-                patch_path = _write_patch_file(repo, selected.get("number"), exec_output)
-                print(f"Saved patch: {patch_path}")
-                print("Inspect: git apply --stat devin.patch")
-                print("Apply: git apply devin.patch")
+                _execute_patch(repo, selected.number, selected, selected_comments, approved_plan)
                 return
             if next_action == "p":
                 approved_plan = _extract_plan_text(data)
-                context = {"comments": selected_comments}
-                _run_execute_pr_flow(repo, selected.get("number"), selected, context, approved_plan)
+                _run_execute_pr_flow(repo, selected.number, selected, selected_comments, approved_plan)
                 return
             print("Invalid choice. Please enter E, P, or X.")
             continue
         if choice == "d":
             print("Denied.")
-            _delete_plan(repo, selected.get("number"))
+            _delete_plan(repo, selected.number)
             return
         if choice == "r":
             if session_id is None:
@@ -236,22 +840,43 @@ def _run_menu(repo: str, selected: dict, selected_comments: list, session_id, da
             if not feedback:
                 print("No feedback provided, skipping.")
                 continue
+            import governor
+            from devin_client import send_devin_message
+            from formatting import _print_devin_output
+            from prompt_builder import build_plan_prompt, is_valid_plan
+
             revision_message = build_plan_prompt(selected, repo, feedback=feedback)
+            governor.resume(repo, "revise", session_id)
             send_devin_message(session_id, revision_message)
-            status, data = poll_devin_session(session_id, validator=is_valid_plan, required_status={"blocked", "finished"})
+            status, data = _poll(
+                session_id, repo, "revise", validator=is_valid_plan, required_status={"blocked", "finished"}, history=False
+            )
             _print_devin_output(data)
-            _save_plan(repo, selected.get("number"), data)
+            _save_plan(repo, selected.number, data, source="revise")
             print(f"Status: {status}")
             continue
         if choice == "q":
             if session_id is None:
                 print("No active planning session. Run with --fresh to regenerate.")
                 continue
+            import governor
+            from devin_client import send_devin_message
+            from formatting import _print_devin_output
+            from prompt_builder import build_clarify_prompt, is_valid_clarify
+
             clarify_prompt = build_clarify_prompt()
+            governor.resume(repo, "clarify", session_id)
             send_devin_message(session_id, clarify_prompt)
-            status, data = poll_devin_session(session_id, validator=is_valid_clarify, required_status={"blocked", "finished"})
+            status, data = _poll(
+                session_id,
+                repo,
+                "clarify",
+                validator=is_valid_clarify,
+                required_status={"blocked", "finished"},
+                history=False,
+            )
             _print_devin_output(data)
-            _save_clarifying_questions(repo, selected.get("number"), data)
+            _save_clarifying_questions(repo, selected.number, data)
             print(f"Status: {status}")
             continue
 
@@ -262,12 +887,99 @@ def _parse_args(argv):
     parser = argparse.ArgumentParser(add_help=True)
     parser.add_argument("--repo", help="owner/repo")
     parser.add_argument("--issue", type=int, help="issue number")
-    parser.add_argument("--mode", choices=["plan", "execute", "execute-pr"])
+    parser.add_argument("--issues", help="comma-separated issue numbers (with --mode execute-batch; default: all planned)")
+    parser.add_argument(
+        "--mode",
+        choices=[
+            "plan",
+            "execute",
+            "execute-pr",
+            "execute-batch",
+            "ingest",
+            "webhook",
+            "webhook-replay",
+            "worker",
+            "enqueue",
+            "triage",
+            "daemon",
+            "budget",
+            "history",
+            "rollback",
+        ],
+    )
     parser.add_argument("--fresh", action="store_true")
+    parser.add_argument("--kind", choices=["plan", "patch"], default="plan", help="artifact for --mode history/rollback")
+    parser.add_argument("--rev", type=int, help="revision to show (--mode history) or restore (--mode rollback)")
+    parser.add_argument("--compare", type=int, metavar="REV", help="with --mode history --rev, diff against REV")
+    parser.add_argument("--file", help="with --mode history, list issues whose patches touch this path")
+    parser.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="read issue refs (owner/name#N, URLs, {\"repo\", \"issue\"} or N with --repo) from stdin, "
+        "write one JSON result per issue to stdout as each finishes",
+    )
+    parser.add_argument(
+        "--repo-map",
+        action="store_true",
+        help="clone the repo and attach a file/symbol map to planning and execution prompts",
+    )
+    parser.add_argument("--no-daemon", action="store_true", help="run in this process even if a daemon is up")
+    parser.add_argument("--org", help="GitHub org to ingest (with --mode ingest)")
+    parser.add_argument("--repos", help="comma-separated owner/repo list to ingest (with --mode ingest)")
+    parser.add_argument("--strategy", choices=["auto", "search", "concurrent"], default="auto")
+    parser.add_argument("--workers", type=int, default=8, help="parallel requests for ingest / jobs for worker, daemon, --jsonl")
+    parser.add_argument("--queue", help="queue URL for worker/enqueue: sqlite:///path or redis://host:port/db")
+    parser.add_argument("--job", help="job mode to enqueue, or comma-separated modes a worker accepts")
+    parser.add_argument("--lease", type=float, default=120.0, help="worker lease length in seconds")
+    parser.add_argument("--top", type=int, default=10, help="issues to keep (with --mode triage)")
+    parser.add_argument("--enqueue", action="store_true", help="queue plan jobs for the top issues (with --mode triage)")
+    parser.add_argument("--host", default="127.0.0.1", help="listen address for --mode webhook/daemon")
+    parser.add_argument("--port", type=int, help="listen port (webhook default 8787, daemon default random)")
+    parser.add_argument("--payload", help="saved webhook payload (with --mode webhook-replay)")
+    parser.add_argument("--event", help="X-GitHub-Event of the payload (with --mode webhook-replay)")
+    parser.add_argument("--delivery", help="X-GitHub-Delivery id to replay under (default: random)")
+    parser.add_argument("--url", help="POST the replay to a running listener instead of handling it in-process")
+    parser.add_argument(
+        "--record",
+        nargs="?",
+        const=True,
+        metavar="NAME",
+        help="save every GitHub/Devin request and response of this run to .devin-workspace/cassettes",
+    )
+    parser.add_argument("--replay", metavar="CASSETTE", help="answer all GitHub/Devin requests from a recorded cassette")
+    parser.add_argument("--replay-speed", choices=["fast", "recorded"], default="fast")
+    parser.add_argument(
+        "--migrate-workspace",
+        action="store_true",
+        help="rewrite saved issue/context files in the compact schema and exit",
+    )
+    parser.add_argument(
+        "--index-similar",
+        action="store_true",
+        help="index every saved issue for near-duplicate plan lookup and exit",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=["none", "gzip", "zstd"],
+        help="codec for --migrate-workspace (default: DEVIN_WORKSPACE_COMPRESSION or none)",
+    )
+    parser.add_argument(
+        "--gc",
+        action="store_true",
+        help="archive stale/closed issue dirs, prune worktrees, repack clones and fit the disk budget, then exit",
+    )
+    parser.add_argument("--budget", help="disk budget for --gc, e.g. 20G (default: DEVIN_WORKSPACE_BUDGET)")
+    parser.add_argument(
+        "--max-age", type=float, help="with --gc, archive issue dirs untouched for this many days (closed ones after 7)"
+    )
+    parser.add_argument("--full", action="store_true", help="with --gc, re-measure every entry instead of the journal")
+    parser.add_argument("--dry-run", action="store_true", help="with --gc, report what would go without deleting")
     return parser.parse_args(argv)
 
 
 def _extract_plan_text(data: dict) -> str:
+    from formatting import _format_structured_output
+
     so = data.get("structured_output")
     formatted = _format_structured_output(so)
     if formatted:
@@ -298,36 +1010,90 @@ def _load_json(path: Path) -> dict:
 
 
 def _write_patch_file(repo: str, issue_number: int | None, diff_text: str) -> Path:
-    root = Path(__file__).resolve().parent.parent
-    repo_slug = repo.replace("/", "_")
-    issue_part = f"issue-{issue_number}" if issue_number is not None else "issue-unknown"
-    patch_dir = root / ".devin-workspace" / repo_slug / issue_part
+    import artifacts
+
+    patch_dir = workspace_dir(repo, issue_number)
     patch_dir.mkdir(parents=True, exist_ok=True)
+    touch_dir(patch_dir)
     patch_path = patch_dir / "devin.patch"
-    patch_path.write_text(diff_text)
+    patch_path.write_text(diff_text, encoding="utf-8")
+    artifacts.put(repo, issue_number, "patch", diff_text, "execute")
     return patch_path
 
 
-def _run_execute_pr_flow(repo: str, issue_number: int | None, issue: dict, context: dict, plan_text: str):
-    exec_prompt = build_pr_execution_prompt(issue, repo, context, plan_text)
-    print("Starting execution session...")
-    exec_session_id = create_devin_session(exec_prompt)
-    exec_status, exec_data = poll_devin_session(exec_session_id, max_wait=3600)
-    exec_output = _extract_final_text(exec_data)
-    pr_url = _extract_pr_url(exec_output)
-    _write_pr_outputs(repo, issue_number, exec_output, pr_url)
+def _run_execute_pr_flow(
+    repo: str,
+    issue_number: int | None,
+    issue: Issue,
+    comments: list[Comment],
+    plan_text: str,
+    interactive: bool = True,
+    steps: job_queue.Steps | None = None,
+):
+    flight, attached = _acquire_flight(repo, issue_number, "execute-pr", steps)
+    if attached:
+        flight.release()
+        _show_saved_execution(attached, _adopt_result(steps, attached, "output_saved"))
+        return
+    try:
+        pr_url, exec_output = _pr_session(repo, issue_number, issue, comments, plan_text, steps, flight)
+    finally:
+        flight.release()
     if pr_url:
         print(f"PR URL: {pr_url}")
     else:
         reason = _extract_pr_failure_reason(exec_output)
         print("PR creation failed.")
         print(f"Reason: {reason}")
+        if not interactive:
+            return
         choice = input("Would you like to generate a patch instead using the existing plan? [y/N] ").strip().lower()
         if choice == "y":
-            _run_execute_patch_from_plan(repo, issue_number, issue, context, plan_text)
+            _execute_patch(repo, issue_number, issue, comments, plan_text)
         return
 
 
+def _pr_session(
+    repo: str,
+    issue_number: int | None,
+    issue: Issue,
+    comments: list[Comment],
+    plan_text: str,
+    steps: job_queue.Steps | None,
+    flight: Flight,
+) -> tuple[str | None, str | None]:
+    import job_queue
+    from prompt_builder import build_pr_execution_prompt
+
+    steps = steps or job_queue.resume_or_start(repo, issue_number, "execute-pr")
+    steps.take_over()
+    saved = steps.get("output_saved")
+    if saved is not None:
+        final_path = workspace_dir(repo, issue_number) / "devin_final.md"
+        exec_output = final_path.read_text(encoding="utf-8") if final_path.exists() else ""
+        pr_url = saved.get("pr_url")
+        steps.finish()
+    else:
+        exec_prompt = build_pr_execution_prompt(issue, repo, comments, plan_text)
+        print("Starting execution session...")
+        exec_session_id, resumed, created = _start_session(
+            steps, "exec_session", exec_prompt, flight, repo, "execute-pr"
+        )
+        if resumed:
+            print(f"Resuming execution session: {exec_session_id}")
+        exec_status, exec_data = _poll(
+            exec_session_id, repo, "execute-pr", max_wait=3600, started_at=created, history=not resumed
+        )
+        if exec_status == "timeout":
+            raise job_queue.SessionPending(exec_session_id)
+        exec_output = _extract_final_text(exec_data)
+        pr_url = _extract_pr_url(exec_output)
+        _write_pr_outputs(repo, issue_number, exec_output, pr_url)
+        steps.record("output_saved", pr_url=pr_url, reason=None if pr_url else _extract_pr_failure_reason(exec_output))
+        steps.finish()
+    return pr_url, exec_output
+
+
 def _extract_pr_url(text: str) -> str | None:
     if not text:
         return None
@@ -346,64 +1112,132 @@ def _extract_pr_failure_reason(text: str) -> str:
     return "unknown reason"
 
 
-def _run_execute_patch_from_plan(repo: str, issue_number: int | None, issue: dict, context: dict, plan_text: str):
-    comments = context.get("comments") if isinstance(context, dict) else []
-    exec_prompt = build_execution_prompt(issue, repo, comments, plan_text)
+def _execute_patch(
+    repo: str,
+    issue_number: int | None,
+    issue: Issue,
+    comments: list[Comment],
+    plan_text: str,
+    steps: job_queue.Steps | None = None,
+):
+    flight, attached = _acquire_flight(repo, issue_number, "execute", steps)
+    if attached:
+        flight.release()
+        _show_saved_execution(attached, _adopt_result(steps, attached, "output_saved"))
+        return
+    try:
+        _patch_session(repo, issue_number, issue, comments, plan_text, steps, flight)
+    finally:
+        flight.release()
+
+
+def _patch_session(
+    repo: str,
+    issue_number: int | None,
+    issue: Issue,
+    comments: list[Comment],
+    plan_text: str,
+    steps: job_queue.Steps | None,
+    flight: Flight,
+):
+    import job_queue
+    from prompt_builder import build_execution_prompt
+
+    steps = steps or job_queue.resume_or_start(repo, issue_number, "execute")
+    steps.take_over()
+    saved = steps.get("output_saved")
+    if saved is not None:
+        steps.finish()
+        if saved.get("path"):
+            print(f"Saved patch: {saved['path']}")
+        return
+    repo_map = None if steps.get("exec_session") else _repo_map(repo, issue, comments)
+    exec_prompt = build_execution_prompt(issue, repo, comments, plan_text, repo_map=repo_map)
     print("Starting execution session...")
-    exec_session_id = create_devin_session(exec_prompt)
-    exec_status, exec_data = poll_devin_session(exec_session_id, max_wait=600)
+    exec_session_id, resumed, created = _start_session(steps, "exec_session", exec_prompt, flight, repo, "execute")
+    if resumed:
+        print(f"Resuming execution session: {exec_session_id}")
+    exec_status, exec_data = _poll(
+        exec_session_id, repo, "execute", max_wait=600, started_at=created, history=not resumed
+    )
+    if exec_status == "timeout":
+        raise job_queue.SessionPending(exec_session_id)
     exec_output = _extract_final_text(exec_data)
     if "REPO_ACCESS: FAILED" in exec_output:
+        steps.record("output_saved", path=None)
+        steps.finish()
         print("Repo access failed. Execution aborted.")
         print(exec_output)
         return
     patch_path = _write_patch_file(repo, issue_number, exec_output)
+    steps.record("output_saved", path=str(patch_path))
+    steps.finish()
     print(f"Saved patch: {patch_path}")
     print("Inspect: git apply --stat devin.patch")
     print("Apply: git apply devin.patch")
 
 
 def _write_pr_outputs(repo: str, issue_number: int | None, final_text: str, pr_url: str | None):
-    base_dir = _workspace_dir(repo, issue_number)
+    base_dir = workspace_dir(repo, issue_number)
     base_dir.mkdir(parents=True, exist_ok=True)
+    touch_dir(base_dir)
     (base_dir / "devin_final.md").write_text(final_text, encoding="utf-8")
     if pr_url:
         (base_dir / "pr.txt").write_text(pr_url, encoding="utf-8")
 
 
-def _workspace_dir(repo: str, issue_number: int | None) -> Path:
-    root = Path(__file__).resolve().parent.parent
-    repo_slug = repo.replace("/", "_")
-    issue_part = f"issue-{issue_number}" if issue_number is not None else "issue-unknown"
-    return root / ".devin-workspace" / repo_slug / issue_part
+def _save_issue_and_context(repo: str, issue: Issue, comments: list[Comment] | None):
+    base_dir = workspace_dir(repo, issue.number)
+    touch_dir(base_dir)
+    save_issue(base_dir, issue)
+    save_context(base_dir, comments)
 
 
-def _save_issue_and_context(repo: str, issue: dict, comments: list | None):
-    base_dir = _workspace_dir(repo, issue.get("number"))
-    base_dir.mkdir(parents=True, exist_ok=True)
-    issue_data = {
-        "title": issue.get("title"),
-        "body": issue.get("body"),
-        "number": issue.get("number"),
-        "url": issue.get("html_url"),
-    }
-    (base_dir / "issue.json").write_text(json.dumps(issue_data, indent=2), encoding="utf-8")
-    context_data = {
-        "comments": comments or [],
-    }
-    (base_dir / "context.json").write_text(json.dumps(context_data, indent=2), encoding="utf-8")
-
-
-def _save_plan(repo: str, issue_number: int | None, data: dict):
-    base_dir = _workspace_dir(repo, issue_number)
+def _run_migrate_workspace(codec: str | None):
+    from workspace_store import migrate_workspace, resolve_codec
+
+    if codec and resolve_codec(codec) != codec:
+        print(f"{codec} is not available (is the zstandard package installed?); using {resolve_codec(codec)}.")
+        codec = resolve_codec(codec)
+    stats = migrate_workspace(workspace_root(), codec=codec)
+    before = stats["bytes_before"]
+    after = stats["bytes_after"]
+    saved = (1 - after / before) * 100 if before else 0.0
+    print(f"Migrated {stats['issues']} issue directories.")
+    print(f"Disk: {before} -> {after} bytes ({saved:.1f}% smaller)")
+    print(f"Load time: {stats['load_before'] * 1000:.1f} ms -> {stats['load_after'] * 1000:.1f} ms")
+
+
+def _run_gc(args):
+    import workspace_gc
+
+    try:
+        budget = workspace_gc.parse_size(args.budget or os.getenv("DEVIN_WORKSPACE_BUDGET"))
+    except ValueError as exc:
+        print(exc)
+        sys.exit(1)
+    stats = workspace_gc.collect(budget, max_age_days=args.max_age, dry_run=args.dry_run, full=args.full)
+    workspace_gc.print_stats(stats, budget, dry_run=args.dry_run)
+
+
+def _save_plan(repo: str, issue_number: int | None, data: dict, source: str = "plan"):
+    import artifacts
+    import similar
+
+    base_dir = workspace_dir(repo, issue_number)
     base_dir.mkdir(parents=True, exist_ok=True)
+    touch_dir(base_dir)
     plan_text = _extract_plan_text(data)
     (base_dir / "plan.md").write_text(plan_text, encoding="utf-8")
+    artifacts.put(repo, issue_number, "plan", plan_text, source)
+
+    similar.update(repo, issue_number)
 
 
 def _save_clarifying_questions(repo: str, issue_number: int | None, data: dict):
-    base_dir = _workspace_dir(repo, issue_number)
+    base_dir = workspace_dir(repo, issue_number)
     base_dir.mkdir(parents=True, exist_ok=True)
+    touch_dir(base_dir)
     so = data.get("structured_output") or {}
     clarify = so.get("clarify") or {}
     questions = clarify.get("questions")
@@ -415,21 +1249,25 @@ def _save_clarifying_questions(repo: str, issue_number: int | None, data: dict):
 
 
 def _delete_plan(repo: str, issue_number: int | None):
-    base_dir = _workspace_dir(repo, issue_number)
+    base_dir = workspace_dir(repo, issue_number)
     plan_path = base_dir / "plan.md"
     if plan_path.exists():
         plan_path.unlink()
+        import similar
+
+        similar.update(repo, issue_number)
 
 
 def _save_session(repo: str, issue_number: int | None, session_id: str):
-    base_dir = _workspace_dir(repo, issue_number)
+    base_dir = workspace_dir(repo, issue_number)
     base_dir.mkdir(parents=True, exist_ok=True)
+    touch_dir(base_dir)
     payload = {"session_id": session_id}
     (base_dir / "session.json").write_text(json.dumps(payload, indent=2), encoding="utf-8")
 
 
 def _load_session_id(repo: str, issue_number: int | None) -> str | None:
-    base_dir = _workspace_dir(repo, issue_number)
+    base_dir = workspace_dir(repo, issue_number)
     path = base_dir / "session.json"
     if not path.exists():
         return None
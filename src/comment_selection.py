@@ -1,53 +1,70 @@
 import re
 
+from models import Comment
 
-def select_relevant_comments(comments: list | None, max_count: int = 3):
+
+KEYWORDS = [
+    "repro",
+    "reproduce",
+    "steps",
+    "example",
+    "curl",
+    "snippet",
+    "traceback",
+    "stack trace",
+    "error",
+    "failing",
+    "regression",
+    "bisect",
+    "workaround",
+    "patch",
+    "fix",
+    "pr",
+]
+
+MAINTAINER_ASSOCIATIONS = {"OWNER", "MEMBER", "COLLABORATOR"}
+
+
+def text_signals(body: str | None, association: str | None = None) -> dict[str, bool]:
+    """Cheap yes/no signals about a comment or issue body, shared with triage."""
+    body = body or ""
+    body_lower = body.lower()
+    return {
+        "maintainer": association in MAINTAINER_ASSOCIATIONS,
+        "keywords": any(k in body_lower for k in KEYWORDS),
+        "code": "```" in body or "traceback" in body_lower or "exception" in body_lower,
+        "sized": 40 < len(body) < 4000,
+    }
+
+
+def is_bot(author: str | None, author_type: str | None = None) -> bool:
+    return "bot" in (author or "").lower() or author_type == "Bot"
+
+
+def select_relevant_comments(comments: list[Comment] | None, max_count: int = 3):
     if not comments:
         return []
 
-    keywords = [
-        "repro",
-        "reproduce",
-        "steps",
-        "example",
-        "curl",
-        "snippet",
-        "traceback",
-        "stack trace",
-        "error",
-        "failing",
-        "regression",
-        "bisect",
-        "workaround",
-        "patch",
-        "fix",
-        "pr",
-    ]
-
     scored = []
     for c in comments:
-        user = c.get("user") or {}
-        login = (user.get("login") or "").lower()
-        if "bot" in login or user.get("type") == "Bot":
+        if is_bot(c.author, c.author_type):
             continue
-        body = c.get("body") or ""
-        body_lower = body.lower()
+        signals = text_signals(c.body, c.association)
 
         score = 0
-        assoc = c.get("author_association")
-        if assoc in {"OWNER", "MEMBER", "COLLABORATOR"}:
+        if signals["maintainer"]:
             score += 5
-        if any(k in body_lower for k in keywords):
+        if signals["keywords"]:
             score += 3
-        if "```" in body or "traceback" in body_lower or "exception" in body_lower:
+        if signals["code"]:
             score += 2
-        if 40 < len(body) < 4000:
+        if signals["sized"]:
             score += 1
 
         scored.append((score, c))
 
     scored.sort(
-        key=lambda item: (item[0], item[1].get("created_at") or ""),
+        key=lambda item: (item[0], item[1].created_at or ""),
         reverse=True,
     )
 
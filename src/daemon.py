@@ -0,0 +1,246 @@
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import governor
+import job_queue
+from workspace_store import workspace_root
+
+JOB_MODES = {"plan", "execute", "execute-pr"}
+# How long a client waits for its job before reporting it as pending, and how
+# many failed status requests in a row it tolerates (e.g. a daemon restart).
+WAIT_SECONDS = 2 * 3600
+MAX_MISSES = 5
+
+
+class DaemonError(RuntimeError):
+    """The daemon could not be reached or answered with an error."""
+
+
+def state_path() -> Path:
+    return workspace_root() / "daemon.json"
+
+
+class WorkspaceIndex:
+    """Which artifacts exist per (repo slug, issue number): scanned once at startup, refreshed per issue as jobs finish."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, int], set[str]] = {}
+        self._scan()
+
+    def _scan(self):
+        if not self.root.exists():
+            return
+        for repo_dir in self.root.iterdir():
+            if not repo_dir.is_dir():
+                continue
+            for issue_dir in repo_dir.glob("issue-*"):
+                self._load(repo_dir.name, issue_dir)
+
+    def _load(self, slug: str, issue_dir: Path):
+        try:
+            number = int(issue_dir.name.split("-", 1)[1])
+        except ValueError:
+            return
+        names = {p.name for p in issue_dir.iterdir()} if issue_dir.is_dir() else set()
+        with self._lock:
+            self._entries[(slug, number)] = names
+
+    def refresh(self, repo: str, issue_number: int):
+        slug = repo.replace("/", "_")
+        self._load(slug, self.root / slug / f"issue-{issue_number}")
+
+    def artifacts(self, repo: str, issue_number: int) -> list[str]:
+        with self._lock:
+            return sorted(self._entries.get((repo.replace("/", "_"), issue_number), set()))
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    index: WorkspaceIndex = None
+    started = 0.0
+
+    def do_GET(self):
+        if self.path == "/status":
+            conn = job_queue.connect()
+            try:
+                jobs = job_queue.count_by_state(conn)
+            finally:
+                conn.close()
+            self._reply(200, {
+                "pid": os.getpid(),
+                "uptime": time.time() - self.started,
+                "jobs": jobs,
+                "workspace_issues": self.index.size(),
+                "budget": governor.status(),
+            })
+            return
+        if self.path.startswith("/jobs/"):
+            try:
+                job_id = int(self.path.rsplit("/", 1)[1])
+            except ValueError:
+                self._reply(400, {"error": "bad job id"})
+                return
+            conn = job_queue.connect()
+            try:
+                job = job_queue.get_job(conn, job_id)
+            finally:
+                conn.close()
+            if job is None:
+                self._reply(404, {"error": "no such job"})
+                return
+            data = dict(job)
+            data["artifacts"] = self.index.artifacts(job["repo"], job["issue"])
+            self._reply(200, data)
+            return
+        self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            self._reply(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            repo = body["repo"]
+            issue = int(body["issue"])
+            mode = body["mode"]
+        except (ValueError, KeyError, TypeError):
+            self._reply(400, {"error": "repo, issue and mode are required"})
+            return
+        if mode not in JOB_MODES:
+            self._reply(400, {"error": f"mode must be one of {sorted(JOB_MODES)}"})
+            return
+        conn = job_queue.connect()
+        try:
+            job_id = job_queue.enqueue(conn, repo, issue, mode, source="daemon", options=body.get("options"))
+        finally:
+            conn.close()
+        self._reply(202, {"id": job_id})
+
+    def _reply(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+GC_INTERVAL = 3600
+
+
+def _gc_loop(stop: threading.Event):
+    """Keep the workspace inside DEVIN_WORKSPACE_BUDGET while the daemon runs."""
+    import workspace_gc
+
+    while not stop.wait(GC_INTERVAL):
+        try:
+            workspace_gc.collect(workspace_gc.parse_size(os.getenv("DEVIN_WORKSPACE_BUDGET")))
+        except Exception as exc:  # a failed pass must not take the daemon down
+            print(f"Workspace GC failed: {exc}")
+
+
+def serve(run_job, host: str = "127.0.0.1", port: int = 0, workers: int = 4):
+    """Run the job API and a pool of queue consumers (run_job as in workers.worker_loop) until interrupted."""
+    from workers import worker_loop
+
+    index = WorkspaceIndex(workspace_root())
+    _Handler.index = index
+    _Handler.started = time.time()
+
+    def run_and_index(repo, issue, mode, options, steps):
+        try:
+            run_job(repo, issue, mode, options, steps)
+        finally:
+            index.refresh(repo, issue)
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    host, port = server.server_address[:2]
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=worker_loop, args=(run_and_index, stop), kwargs={"name": str(i)}, daemon=True)
+        for i in range(max(1, workers))
+    ]
+    if os.getenv("DEVIN_WORKSPACE_BUDGET"):
+        threads.append(threading.Thread(target=_gc_loop, args=(stop,), daemon=True))
+    for t in threads:
+        t.start()
+
+    path = state_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"host": host, "port": port, "pid": os.getpid()}), encoding="utf-8")
+    print(f"Daemon listening on http://{host}:{port}/ with {max(1, workers)} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if path.exists():
+            path.unlink()
+
+
+def find_running() -> str | None:
+    """Return the base URL of a live daemon, or None."""
+    path = state_path()
+    if not path.exists():
+        return None
+    try:
+        info = json.loads(path.read_text(encoding="utf-8"))
+        url = f"http://{info['host']}:{info['port']}"
+        with urllib.request.urlopen(f"{url}/status", timeout=1):
+            return url
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _request(url: str, payload: dict | None = None) -> dict:
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except urllib.error.HTTPError as exc:
+        raise DaemonError(f"Daemon request {url} failed: HTTP {exc.code}") from exc
+    except (urllib.error.URLError, OSError, ValueError) as exc:
+        raise DaemonError(f"Daemon at {url} is unreachable: {getattr(exc, 'reason', exc)}") from exc
+
+
+def submit(base_url: str, repo: str, issue: int, mode: str, options: dict | None = None) -> int:
+    return _request(f"{base_url}/jobs", {"repo": repo, "issue": issue, "mode": mode, "options": options or {}})["id"]
+
+
+def wait(base_url: str, job_id: int, interval: float = 1.0, timeout: float = WAIT_SECONDS) -> dict:
+    """Poll until the job is done, failed or requeued pending its session, or timeout passes; returns the job as last seen."""
+    deadline = time.time() + timeout
+    job, misses = None, 0
+    while True:
+        try:
+            job = _request(f"{base_url}/jobs/{job_id}")
+            misses = 0
+        except DaemonError:
+            misses += 1
+            if misses >= MAX_MISSES:
+                raise
+        if job is not None and (
+            job["state"] in {"done", "failed"} or (job["state"] == "queued" and job.get("retry_at"))
+        ):
+            return job
+        if time.time() >= deadline and job is not None:
+            return job
+        time.sleep(interval)
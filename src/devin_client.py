@@ -1,11 +1,21 @@
 import os
-import sys
 import time
-import requests
+
+from http_client import get_session
+from poll_schedule import record, schedule_for
 
 API_BASE = "https://api.devin.ai/v1"
 
 
+class DevinError(RuntimeError):
+    """A Devin API call failed; the message is what the CLI prints before exiting."""
+
+
+def _check_response(resp, label: str):
+    if resp.status_code < 200 or resp.status_code >= 300:
+        raise DevinError(f"{label}: {resp.status_code}\n{resp.text}")
+
+
 def devin_ui_url(session_id: str) -> str:
     sid = session_id.rsplit("/", 1)[-1]
     if sid.startswith("devin-"):
@@ -16,89 +26,187 @@ def devin_ui_url(session_id: str) -> str:
 def _get_devin_headers():
     api_key = os.getenv("DEVIN_API_KEY")
     if not api_key:
-        print("DEVIN_API_KEY is missing. Please set it in your environment.")
-        sys.exit(1)
+        raise DevinError("DEVIN_API_KEY is missing. Please set it in your environment.")
     return {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
     }
 
 
-def create_devin_session(prompt: str):
-    url = f"{API_BASE}/sessions"
-    headers = _get_devin_headers()
-    resp = requests.post(url, headers=headers, json={"prompt": prompt}, timeout=60)
-    if resp.status_code < 200 or resp.status_code >= 300:
-        print("Devin session creation failed:", resp.status_code)
-        print(resp.text)
-        sys.exit(1)
-    data = resp.json()
+def _session_id(data: dict) -> str:
     session_id = data.get("session_id") or data.get("id")
     if not session_id:
-        print("Devin response missing session_id.")
-        print(data)
-        sys.exit(1)
+        raise DevinError(f"Devin response missing session_id.\n{data}")
     return session_id
 
 
+def create_devin_session(prompt: str):
+    url = f"{API_BASE}/sessions"
+    headers = _get_devin_headers()
+    resp = get_session().post(url, headers=headers, json={"prompt": prompt}, timeout=60)
+    _check_response(resp, "Devin session creation failed")
+    return _session_id(resp.json())
+
+
 def send_devin_message(session_id: str, message: str):
     url = f"{API_BASE}/sessions/{session_id}/message"
     headers = _get_devin_headers()
-    resp = requests.post(url, headers=headers, json={"message": message}, timeout=60)
-    if resp.status_code < 200 or resp.status_code >= 300:
-        print("Failed to send message to Devin:", resp.status_code)
-        print(resp.text)
-        sys.exit(1)
+    resp = get_session().post(url, headers=headers, json={"message": message}, timeout=60)
+    _check_response(resp, "Failed to send message to Devin")
     return resp.json()
 
 
+class _Poll:
+    """Status handling shared by poll_devin_session and poll_devin_session_async, which differ only in how they fetch and wait."""
+
+    def __init__(self, session_id, max_wait, validator, required_status, kind, repo, started_at, history):
+        self.api_url = f"{API_BASE}/sessions/{session_id}"
+        self.headers = _get_devin_headers()
+        self.validator = validator
+        self.target_status = required_status or {"finished", "blocked"}
+        self.kind = kind
+        self.repo = repo
+        self.history = history
+        self.schedule = schedule_for(kind, repo, max_wait)
+        # The timeout counts from this poll; the schedule and the history from session creation.
+        self.start = time.time()
+        self.created = started_at or self.start
+        self.saw_working = False
+
+    def fetch(self) -> dict:
+        resp = get_session().get(self.api_url, headers=self.headers, timeout=60)
+        _check_response(resp, "Devin session poll failed")
+        return resp.json()
+
+    def ready(self, data: dict) -> bool:
+        """Whether this status calls for the final fetch."""
+        status = data.get("status_enum")
+        if status == "working":
+            self.saw_working = True
+        return self.saw_working and status in self.target_status
+
+    def accepts(self, final_data: dict) -> bool:
+        return not (self.validator and not self.validator(final_data.get("structured_output")))
+
+    def done(self, data: dict, final_data: dict):
+        self._record(time.time() - self.created, "done")
+        return final_data.get("status_enum") or data.get("status_enum"), final_data
+
+    def timed_out(self) -> bool:
+        return time.time() - self.start > self.schedule.timeout
+
+    def timeout(self, data: dict):
+        self._record(time.time() - self.created, "timeout")
+        print("Polling timed out. You can check the session here:")
+        print(self.api_url)
+        return "timeout", data
+
+    def interval(self) -> float:
+        return self.schedule.next_interval(time.time() - self.created, self.saw_working)
+
+    def _record(self, seconds: float, outcome: str):
+        if self.kind and self.history:
+            record(self.kind, self.repo or "", seconds, outcome)
+
+
 def poll_devin_session(
     session_id: str,
     max_wait: int = 300,
     validator=None,
     required_status: set[str] | None = None,
+    kind: str | None = None,
+    repo: str | None = None,
+    started_at: float | None = None,
+    history: bool = True,
 ):
-    api_url = f"{API_BASE}/sessions/{session_id}"
-    headers = _get_devin_headers()
+    """Poll until the session reaches required_status (and validator passes) or times out; with kind and repo, timing follows that kind's history."""
+    poll = _Poll(session_id, max_wait, validator, required_status, kind, repo, started_at, history)
+    while True:
+        data = poll.fetch()
+        if poll.ready(data):
+            final_data = poll.fetch()
+            if poll.accepts(final_data):
+                return poll.done(data, final_data)
+        if poll.timed_out():
+            return poll.timeout(data)
+        time.sleep(poll.interval())
+
+
+# Async twins of the calls above: only the HTTP round trip holds a worker thread,
+# and asyncio is imported inside them to keep CLI startup fast.
+
+
+def _create_bound(prompt: str, segment: int, state: dict) -> str:
+    import governor
+
+    try:
+        session_id = create_devin_session(prompt)
+    except BaseException:
+        governor.cancel(segment)
+        raise
+    governor.bind(segment, session_id)
+    with state["lock"]:
+        state["session_id"] = session_id
+        if state["abandoned"]:
+            governor.release(session_id)
+    return session_id
 
-    start = time.time()
-    backoff = 1
-    target_status = required_status or {"finished", "blocked"}
-    saw_working = False
 
-    while True:
-        resp = requests.get(api_url, headers=headers, timeout=60)
-        if resp.status_code < 200 or resp.status_code >= 300:
-            print("Devin session poll failed:", resp.status_code)
-            print(resp.text)
-            sys.exit(1)
+async def create_devin_session_async(prompt: str, repo: str, kind: str) -> str:
+    """create_devin_session once the governor has a slot; the wait for one is an asyncio sleep, not a thread."""
+    import asyncio
+    import threading
 
-        data = resp.json()
-        status = data.get("status_enum")
+    import governor
 
-        if status == "working":
-            saw_working = True
-
-        # print(f"Status after {backoff} seconds: ", status)
-        if saw_working and status in target_status:
-            final_resp = requests.get(api_url, headers=headers, timeout=60)
-            if final_resp.status_code < 200 or final_resp.status_code >= 300:
-                print("Devin final fetch failed:", final_resp.status_code)
-                print(final_resp.text)
-                sys.exit(1)
-            final_data = final_resp.json()
-            final_status = final_data.get("status_enum") or status
-            so = final_data.get("structured_output")
-            if validator and not validator(so):
-                time.sleep(min(backoff, 30))
-                backoff = min(30, backoff * 2)
-                continue
-            return final_status, final_data
-
-        if time.time() - start > max_wait:
-            print("Polling timed out. You can check the session here:")
-            print(api_url)
-            return "timeout", data
-
-        time.sleep(min(backoff, 30))
-        backoff *= 2
+    segment = await governor.acquire_async(repo, kind)
+    state = {"lock": threading.Lock(), "session_id": None, "abandoned": False}
+    try:
+        return await asyncio.to_thread(_create_bound, prompt, segment, state)
+    except asyncio.CancelledError:
+        # The request may still create a session nobody will poll; its slot goes back either way.
+        with state["lock"]:
+            state["abandoned"] = True
+            if state["session_id"]:
+                governor.release(state["session_id"])
+        raise
+
+
+async def send_devin_message_async(session_id: str, message: str):
+    import asyncio
+
+    return await asyncio.to_thread(send_devin_message, session_id, message)
+
+
+async def poll_devin_session_async(
+    session_id: str,
+    max_wait: int = 300,
+    validator=None,
+    required_status: set[str] | None = None,
+    kind: str | None = None,
+    repo: str | None = None,
+    started_at: float | None = None,
+    history: bool = True,
+):
+    """poll_devin_session without blocking the event loop; the session's governor slot goes back when it stops."""
+    import asyncio
+
+    import governor
+
+    try:
+        poll = await asyncio.to_thread(
+            _Poll, session_id, max_wait, validator, required_status, kind, repo, started_at, history
+        )
+        while True:
+            data = await asyncio.to_thread(poll.fetch)
+            if poll.ready(data):
+                final_data = await asyncio.to_thread(poll.fetch)
+                if poll.accepts(final_data):
+                    # done/timeout write the poll history, which is SQLite.
+                    return await asyncio.to_thread(poll.done, data, final_data)
+            if poll.timed_out():
+                return await asyncio.to_thread(poll.timeout, data)
+            await asyncio.sleep(poll.interval())
+    finally:
+        # As the blocking CLI's _poll does: the slot goes back once we stop watching the session.
+        governor.release(session_id)
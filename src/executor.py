@@ -1,15 +1,16 @@
 import subprocess
 from pathlib import Path
 
+from workspace_store import touch, workspace_root
 
-def prepare_workspace(repo_full_name: str, issue_number: int, ref: str | None = None) -> Path:
-    workspace_root = Path(".devin-workspace").resolve()
-    repo_slug = repo_full_name.replace("/", "_")
-    base_dir = workspace_root / repo_slug
-    repo_dir = base_dir / "repo"
-    issue_dir = base_dir / f"issue-{issue_number}"
 
-    workspace_root.mkdir(parents=True, exist_ok=True)
+def prepare_checkout(repo_full_name: str, ref: str | None = None) -> tuple[Path, str]:
+    """Clone or fetch the shared checkout of a repo, reset it to ref (default branch); returns (repo_dir, target_branch)."""
+    root = workspace_root()
+    repo_dir = root / repo_full_name.replace("/", "_") / "repo"
+    touch(f"{repo_full_name.replace('/', '_')}/repo")
+
+    root.mkdir(parents=True, exist_ok=True)
 
     repo_url = f"https://github.com/{repo_full_name}.git"
 
@@ -25,6 +26,12 @@ def prepare_workspace(repo_full_name: str, issue_number: int, ref: str | None =
 
     _run_git(["-C", str(repo_dir), "checkout", target_branch])
     _run_git(["-C", str(repo_dir), "reset", "--hard", f"origin/{target_branch}"])
+    return repo_dir, target_branch
+
+
+def prepare_workspace(repo_full_name: str, issue_number: int, ref: str | None = None) -> Path:
+    repo_dir, target_branch = prepare_checkout(repo_full_name, ref)
+    issue_dir = repo_dir.parent / f"issue-{issue_number}"
 
     branch_name = f"devin/issue-{issue_number}"
     if issue_dir.exists():
@@ -1,77 +1,192 @@
 import os
-import requests
+from typing import AsyncIterator, Iterator
 
+from http_client import get_session
+from models import Comment, Issue
+
+API_BASE = "https://api.github.com"
+PER_PAGE = 100  # max GitHub allows
+
+
+class GitHubError(RuntimeError):
+    """Raised by the streaming iterators when GitHub returns a non-200 page."""
 
-def list_issues(repo: str, limit: int = 10):
-    owner, name = repo.split("/", 1)
 
+def _github_headers():
     token = os.getenv("GITHUB_TOKEN")
     headers = {
         "Accept": "application/vnd.github+json",
     }
     if token:
         headers["Authorization"] = f"Bearer {token}"
+    return headers
 
-    url = f"https://api.github.com/repos/{owner}/{name}/issues"
 
-    issues = []
-    page = 1
-    per_page = 100  # max GitHub allows
-
-    while len(issues) < limit:
-        params = {
-            "state": "open",
-            "per_page": per_page,
-            "page": page,
-        }
-
-        r = requests.get(url, headers=headers, params=params, timeout=30)
-        if r.status_code != 200:
-            print("GitHub error:", r.status_code)
-            print(r.text)
+def _parse_issue_page(items: list) -> list[Issue]:
+    return [Issue.from_github(it) for it in items if "pull_request" not in it]
+
+
+def _parse_comment_page(items: list) -> list[Comment]:
+    return [Comment.from_github(it) for it in items]
+
+
+def _page(r, error_label: str) -> tuple[list, str | None]:
+    """Items of one listing response and the next page's URL; prints and raises GitHubError on an HTTP error."""
+    if r.status_code != 200:
+        print(error_label, r.status_code)
+        print(r.text)
+        raise GitHubError(f"{error_label} {r.status_code}")
+    return r.json(), (r.links.get("next") or {}).get("url")
+
+
+def _iter_pages(url: str, params: dict, error_label: str) -> Iterator[list]:
+    """Yield each page of a paginated GitHub listing as it arrives, following the Link header; prints and raises GitHubError on an HTTP error."""
+    headers = _github_headers()
+    while url:
+        r = get_session().get(url, headers=headers, params=params, timeout=30)
+        items, url = _page(r, error_label)
+        if not items:
             return
+        yield items
+        params = None  # the next link already carries the query string
+
+
+async def _aiter_pages(url: str, params: dict, error_label: str) -> AsyncIterator[list]:
+    """_iter_pages for an event loop: each request runs in a worker thread, the loop stays free."""
+    import asyncio  # only async callers pay for it
 
-        items = r.json()
+    headers = _github_headers()
+    while url:
+        r = await asyncio.to_thread(get_session().get, url, headers=headers, params=params, timeout=30)
+        items, url = _page(r, error_label)
         if not items:
-            break  # no more pages
+            return
+        yield items
+        params = None
 
-        for it in items:
-            if "pull_request" in it:
-                continue
-            issues.append(it)
-            if len(issues) >= limit:
-                break
 
-        page += 1
+def _issues_url(repo: str) -> str:
+    owner, name = repo.split("/", 1)
+    return f"{API_BASE}/repos/{owner}/{name}/issues"
+
+
+def iter_issues(repo: str, limit: int | None = None) -> Iterator[Issue]:
+    """Yield open issues (pull requests excluded) page by page, up to limit."""
+    params = {"state": "open", "per_page": PER_PAGE}
+    count = 0
+    for items in _iter_pages(_issues_url(repo), params, "GitHub error:"):
+        for issue in _parse_issue_page(items):
+            yield issue
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
 
+def _show_issues(issues: list[Issue]) -> list[Issue] | None:
     if not issues:
         print("No open issues found.")
-        return
+        return None
     print("\nIndex | GitHub # | Title")
     print("------+----------+---------------------------")
 
     for i, it in enumerate(issues, start=1):
-        print(f"{i:^5} | {it['number']:^8} | {it['title']}")
+        print(f"{i:^5} | {it.number:^8} | {it.title}")
 
     return issues
 
 
-def fetch_issue_comments(repo: str, issue_number: int | None):
-    if issue_number is None:
-        return []
-    owner, name = repo.split("/", 1)
-    token = os.getenv("GITHUB_TOKEN")
-    headers = {
-        "Accept": "application/vnd.github+json",
-    }
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
+def list_issues(repo: str, limit: int = 10):
+    issues = []
+    try:
+        for issue in iter_issues(repo, limit=limit):
+            issues.append(issue)
+    except GitHubError:
+        return
+    return _show_issues(issues)
+
+
+async def list_issues_async(repo: str, limit: int = 10) -> list[Issue] | None:
+    """list_issues without blocking the event loop."""
+    params = {"state": "open", "per_page": PER_PAGE}
+    issues: list[Issue] = []
+    try:
+        async for items in _aiter_pages(_issues_url(repo), params, "GitHub error:"):
+            issues.extend(_parse_issue_page(items))
+            if len(issues) >= limit:
+                break
+    except GitHubError:
+        return None
+    return _show_issues(issues[:limit])
+
+
+def find_issue(repo: str, issue_number: int) -> Issue | None:
+    """Fetch one issue by number, open or closed; None if it does not exist or is a pull request."""
+    r = get_session().get(f"{_issues_url(repo)}/{issue_number}", headers=_github_headers(), timeout=30)
+    if r.status_code == 404:
+        return None
+    if r.status_code != 200:
+        print("GitHub error:", r.status_code)
+        print(r.text)
+        return None
+    data = r.json()
+    if "pull_request" in data:
+        return None
+    return Issue.from_github(data)
+
+
+def iter_org_repos(org: str) -> Iterator[dict]:
+    """Yield repos of an org that can have open issues, as {"full_name", "open_issues_count"}."""
+    url = f"{API_BASE}/orgs/{org}/repos"
+    for items in _iter_pages(url, {"type": "all", "per_page": PER_PAGE}, "GitHub repos error:"):
+        for it in items:
+            if it.get("archived") or not it.get("has_issues", True):
+                continue
+            yield {"full_name": it.get("full_name"), "open_issues_count": it.get("open_issues_count") or 0}
 
-    url = f"https://api.github.com/repos/{owner}/{name}/issues/{issue_number}/comments"
-    params = {"per_page": 100}
-    r = requests.get(url, headers=headers, params=params, timeout=30)
+
+def search_issues_page(query: str, page: int = 1) -> tuple[int, list[tuple[str, Issue]]]:
+    """One page of the issue search API: the total match count and (repo, issue) pairs."""
+    url = f"{API_BASE}/search/issues"
+    params = {"q": query, "per_page": PER_PAGE, "page": page}
+    r = get_session().get(url, headers=_github_headers(), params=params, timeout=30)
     if r.status_code != 200:
-        print("GitHub comments error:", r.status_code)
+        print("GitHub search error:", r.status_code)
         print(r.text)
+        raise GitHubError(f"GitHub search error: {r.status_code}")
+    data = r.json()
+    results = []
+    for it in data.get("items") or []:
+        if "pull_request" in it:
+            continue
+        repo = "/".join((it.get("repository_url") or "").rsplit("/", 2)[-2:])
+        results.append((repo, Issue.from_github(it)))
+    return data.get("total_count") or 0, results
+
+
+def iter_issue_comments(repo: str, issue_number: int) -> Iterator[Comment]:
+    url = f"{_issues_url(repo)}/{issue_number}/comments"
+    for items in _iter_pages(url, {"per_page": PER_PAGE}, "GitHub comments error:"):
+        yield from _parse_comment_page(items)
+
+
+def fetch_issue_comments(repo: str, issue_number: int | None) -> list[Comment] | None:
+    if issue_number is None:
+        return []
+    try:
+        return list(iter_issue_comments(repo, issue_number))
+    except GitHubError:
+        return None
+
+
+async def fetch_issue_comments_async(repo: str, issue_number: int | None) -> list[Comment] | None:
+    """fetch_issue_comments without blocking the event loop."""
+    if issue_number is None:
+        return []
+    url = f"{_issues_url(repo)}/{issue_number}/comments"
+    comments: list[Comment] = []
+    try:
+        async for items in _aiter_pages(url, {"per_page": PER_PAGE}, "GitHub comments error:"):
+            comments.extend(_parse_comment_page(items))
+    except GitHubError:
         return None
-    return r.json()
+    return comments
@@ -0,0 +1,294 @@
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from job_queue import _owner_alive, current_owner
+from workspace_store import workspace_root
+
+INTERACTIVE_PRIORITY = 100
+HOUR = 3600
+DAY = 86400
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT,
+    repo TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    holder TEXT NOT NULL,
+    created INTEGER NOT NULL DEFAULT 0,
+    started REAL NOT NULL,
+    ended REAL
+);
+CREATE INDEX IF NOT EXISTS segments_open ON segments (ended);
+CREATE INDEX IF NOT EXISTS segments_started ON segments (started);
+CREATE TABLE IF NOT EXISTS waiting (
+    holder TEXT PRIMARY KEY,
+    repo TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    since REAL NOT NULL
+);
+"""
+
+_local = threading.local()
+
+
+def ledger_path() -> Path:
+    return workspace_root() / "governor.sqlite3"
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    path = path or ledger_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def limits() -> dict:
+    """Caps from the environment; 0 turns a cap off."""
+
+    def env(name: str, default: float) -> float:
+        try:
+            return float(os.getenv(name, default))
+        except ValueError:
+            return default
+
+    return {
+        "concurrent": int(env("DEVIN_MAX_CONCURRENT_SESSIONS", 4)),
+        "per_hour": int(env("DEVIN_MAX_SESSIONS_PER_HOUR", 0)),
+        "minutes_per_day": env("DEVIN_MAX_SESSION_MINUTES_PER_DAY", 0),
+        "minutes_per_repo_day": env("DEVIN_MAX_SESSION_MINUTES_PER_REPO_DAY", 0),
+    }
+
+
+def _holder() -> str:
+    return f"{current_owner()}/{threading.get_ident()}"
+
+
+@contextlib.contextmanager
+def priority(value: int):
+    """Priority for sessions created in this thread (higher goes first); queued jobs set it from their options."""
+    previous = current_priority()
+    _local.priority = value
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def current_priority() -> int:
+    return getattr(_local, "priority", INTERACTIVE_PRIORITY)
+
+
+def _sweep(conn: sqlite3.Connection, now: float):
+    """Close segments and drop waiters whose process has died."""
+    for row in conn.execute("SELECT id, holder FROM segments WHERE ended IS NULL").fetchall():
+        if not _owner_alive(row["holder"]):
+            conn.execute("UPDATE segments SET ended = ? WHERE id = ?", (now, row["id"]))
+    for row in conn.execute("SELECT holder FROM waiting").fetchall():
+        if not _owner_alive(row["holder"]):
+            conn.execute("DELETE FROM waiting WHERE holder = ?", (row["holder"],))
+
+
+def _minutes(conn: sqlite3.Connection, now: float, repo: str | None = None) -> float:
+    where = "WHERE (ended IS NULL OR ended > ?)"
+    params: list = [now - DAY]
+    if repo is not None:
+        where += " AND repo = ?"
+        params.append(repo)
+    total = 0.0
+    for row in conn.execute(f"SELECT started, ended FROM segments {where}", params):
+        total += (row["ended"] or now) - max(row["started"], now - DAY)
+    return total / 60
+
+
+def usage(conn: sqlite3.Connection, repo: str | None = None, now: float | None = None) -> dict:
+    now = now or time.time()
+    return {
+        "active": conn.execute("SELECT COUNT(*) FROM segments WHERE ended IS NULL").fetchone()[0],
+        "last_hour": conn.execute(
+            "SELECT COUNT(*) FROM segments WHERE created = 1 AND started > ?", (now - HOUR,)
+        ).fetchone()[0],
+        "minutes_today": _minutes(conn, now),
+        "repo_minutes_today": _minutes(conn, now, repo) if repo else None,
+        "waiting": conn.execute("SELECT COUNT(*) FROM waiting").fetchone()[0],
+    }
+
+
+def _blocked_by(use: dict, caps: dict) -> str | None:
+    if caps["concurrent"] and use["active"] >= caps["concurrent"]:
+        return f"{use['active']}/{caps['concurrent']} sessions running"
+    if caps["per_hour"] and use["last_hour"] >= caps["per_hour"]:
+        return f"{use['last_hour']}/{caps['per_hour']} sessions started in the last hour"
+    if caps["minutes_per_day"] and use["minutes_today"] >= caps["minutes_per_day"]:
+        return f"{use['minutes_today']:.0f}/{caps['minutes_per_day']:.0f} session-minutes used in the last 24h"
+    if caps["minutes_per_repo_day"] and (use["repo_minutes_today"] or 0) >= caps["minutes_per_repo_day"]:
+        return f"{use['repo_minutes_today']:.0f}/{caps['minutes_per_repo_day']:.0f} session-minutes used on this repo in the last 24h"
+    return None
+
+
+def _head(conn: sqlite3.Connection, caps: dict, now: float) -> str | None:
+    """The waiter that goes next: highest priority, then oldest, skipping repos out of minutes."""
+    for row in conn.execute("SELECT holder, repo FROM waiting ORDER BY priority DESC, since"):
+        if caps["minutes_per_repo_day"] and _minutes(conn, now, row["repo"]) >= caps["minutes_per_repo_day"]:
+            continue
+        return row["holder"]
+    return None
+
+
+def _attempt(conn: sqlite3.Connection, holder: str, repo: str, kind: str, prio: int, caps: dict) -> tuple[int | None, str | None]:
+    """One turn in line: (segment id, None) if this holder may start now, else (None, why not)."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _sweep(conn, now)
+        conn.execute(
+            "INSERT OR IGNORE INTO waiting (holder, repo, kind, priority, since) VALUES (?, ?, ?, ?, ?)",
+            (holder, repo, kind, prio, now),
+        )
+        reason = _blocked_by(usage(conn, repo, now), caps)
+        if reason is None and _head(conn, caps, now) != holder:
+            reason = "higher-priority work is queued ahead"
+        segment = None
+        if reason is None:
+            conn.execute("DELETE FROM waiting WHERE holder = ?", (holder,))
+            segment = conn.execute(
+                "INSERT INTO segments (repo, kind, holder, created, started) VALUES (?, ?, ?, 1, ?)",
+                (repo, kind, holder, now),
+            ).lastrowid
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    return segment, reason
+
+
+def acquire(repo: str, kind: str, wait: float = 5.0) -> int:
+    """Block until the caps allow a new session and this caller is first in line (highest priority, then oldest); returns a segment id."""
+    holder = _holder()
+    prio = current_priority()
+    caps = limits()
+    conn = connect()
+    announced = None
+    try:
+        while True:
+            segment, reason = _attempt(conn, holder, repo, kind, prio, caps)
+            if segment is not None:
+                return segment
+            if reason != announced:
+                print(f"Waiting for session budget ({reason})...")
+                announced = reason
+            time.sleep(wait)
+    except BaseException:
+        conn.execute("DELETE FROM waiting WHERE holder = ?", (holder,))
+        raise
+    finally:
+        conn.close()
+
+
+async def acquire_async(repo: str, kind: str, wait: float = 5.0) -> int:
+    """acquire() for event-loop callers: each turn is one short ledger write, and the wait between turns is an asyncio sleep."""
+    import asyncio
+
+    holder = f"{current_owner()}/task-{id(asyncio.current_task())}"
+    prio = current_priority()
+    caps = limits()
+    conn = connect()
+    announced = None
+    try:
+        while True:
+            segment, reason = _attempt(conn, holder, repo, kind, prio, caps)
+            if segment is not None:
+                return segment
+            if reason != announced:
+                print(f"Waiting for session budget ({reason})...")
+                announced = reason
+            await asyncio.sleep(wait)
+    except BaseException:
+        conn.execute("DELETE FROM waiting WHERE holder = ?", (holder,))
+        raise
+    finally:
+        conn.close()
+
+
+def bind(segment_id: int, session_id: str):
+    conn = connect()
+    try:
+        conn.execute("UPDATE segments SET session_id = ? WHERE id = ?", (session_id, segment_id))
+    finally:
+        conn.close()
+
+
+def cancel(segment_id: int):
+    """Give back a slot whose session was never created."""
+    conn = connect()
+    try:
+        conn.execute("DELETE FROM segments WHERE id = ?", (segment_id,))
+    finally:
+        conn.close()
+
+
+def resume(repo: str, kind: str, session_id: str):
+    """Account for an existing session working again (resumed poll, revision, clarification); never waits."""
+    conn = connect()
+    try:
+        if conn.execute("SELECT 1 FROM segments WHERE session_id = ? AND ended IS NULL", (session_id,)).fetchone():
+            return
+        conn.execute(
+            "INSERT INTO segments (session_id, repo, kind, holder, started) VALUES (?, ?, ?, ?, ?)",
+            (session_id, repo, kind, _holder(), time.time()),
+        )
+    finally:
+        conn.close()
+
+
+def release(session_id: str):
+    """The session stopped working (finished, blocked, or we stopped waiting for it)."""
+    conn = connect()
+    try:
+        conn.execute("UPDATE segments SET ended = ? WHERE session_id = ? AND ended IS NULL", (time.time(), session_id))
+    finally:
+        conn.close()
+
+
+def status() -> dict:
+    conn = connect()
+    try:
+        now = time.time()
+        _sweep(conn, now)
+        data = usage(conn, now=now)
+        data["limits"] = limits()
+        data["repos"] = {
+            row["repo"]: round(_minutes(conn, now, row["repo"]), 1)
+            for row in conn.execute("SELECT DISTINCT repo FROM segments WHERE ended IS NULL OR ended > ?", (now - DAY,))
+        }
+        data["queue"] = [
+            dict(row) for row in conn.execute("SELECT repo, kind, priority, since FROM waiting ORDER BY priority DESC, since")
+        ]
+    finally:
+        conn.close()
+    return data
+
+
+def print_status(data: dict):
+    caps = data["limits"]
+
+    def cap(value) -> str:
+        return f"{value:g}" if value else "no cap"
+
+    print(f"Running sessions:   {data['active']} / {cap(caps['concurrent'])}")
+    print(f"Started last hour:  {data['last_hour']} / {cap(caps['per_hour'])}")
+    print(f"Minutes last 24h:   {data['minutes_today']:.1f} / {cap(caps['minutes_per_day'])}")
+    for repo, minutes in sorted(data["repos"].items()):
+        print(f"  {repo}: {minutes:.1f} / {cap(caps['minutes_per_repo_day'])}")
+    print(f"Waiting:            {data['waiting']}")
+    for item in data["queue"]:
+        print(f"  {item['repo']} {item['kind']} (priority {item['priority']})")
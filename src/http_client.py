@@ -0,0 +1,29 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_lock = threading.Lock()
+_session = None
+_adapter_factory = None
+
+
+def get_session() -> requests.Session:
+    """Process-wide requests session so GitHub and Devin calls reuse pooled connections."""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = (_adapter_factory or HTTPAdapter)(pool_connections=4, pool_maxsize=32)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def use_adapter(factory):
+    """Route all traffic through adapters built by factory (e.g. cassette recording/replay)."""
+    global _session, _adapter_factory
+    with _lock:
+        _adapter_factory = factory
+        _session = None
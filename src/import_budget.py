@@ -0,0 +1,101 @@
+"""CLI startup budget from `python -X importtime`: run each case in a fresh interpreter, exit 1 on a breach.
+
+    python src/import_budget.py [--runs N] [--scale 2] [--verbose]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from models import Comment, Issue
+from workspace_store import save_context, save_issue, workspace_dir, workspace_root
+
+CLI = Path(__file__).resolve().parent / "__main__.py"
+FIXTURE_REPO = "import-budget/fixture"
+
+# name, argv, stdin, budget in ms, modules that must not load
+CASES = [
+    ("help", ["--help"], "", 30, {"requests", "dotenv", "sqlite3"}),
+    ("bad-args", ["--mode", "nope"], "", 30, {"requests", "dotenv", "sqlite3"}),
+    ("cached-plan", ["--mode", "plan", "--repo", FIXTURE_REPO, "--issue", "1"], "a\nx\n", 50, {"requests"}),
+    ("budget", ["--mode", "budget"], "", 60, {"requests"}),
+]
+
+
+def _run(argv: list[str], stdin: str = "") -> tuple[dict[str, int], set[str]]:
+    """One run: (top-level module -> cumulative import microseconds, every module loaded)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        # Timings are for a warm bytecode cache, as wrapper scripts see them.
+        env={k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"},
+    )
+    top, loaded = {}, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        loaded.add(name.strip())
+        # Nested imports are indented by two spaces per level.
+        if not name[1:].startswith(" "):
+            top[name.strip()] = int(cumulative)
+    return top, loaded
+
+
+def _make_fixture():
+    os.environ["DEVIN_WORKSPACE"] = tempfile.mkdtemp(prefix="import-budget-")
+    base_dir = workspace_dir(FIXTURE_REPO, 1)
+    issue = Issue(number=1, title="Import budget fixture", body="", state="open", url="")
+    save_issue(base_dir, issue)
+    save_context(base_dir, [Comment(body="fixture")])
+    (base_dir / "plan.md").write_text("1. Nothing to do.\n", encoding="utf-8")
+
+
+def _drop_fixture():
+    shutil.rmtree(workspace_root(), ignore_errors=True)
+    del os.environ["DEVIN_WORKSPACE"]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="runs per case; the fastest counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every ms budget")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    _, baseline = _run(["-c", "pass"])
+    failed = False
+    _make_fixture()
+    try:
+        for name, case_argv, stdin, budget, forbidden in CASES:
+            _, loaded = _run([str(CLI), *case_argv], stdin)  # also warms the bytecode cache
+            best = None
+            for _ in range(max(1, args.runs)):
+                top, _ = _run([str(CLI), *case_argv], stdin)
+                times = {m: us for m, us in top.items() if m not in baseline}
+                if best is None or sum(times.values()) < sum(best.values()):
+                    best = times
+            total_ms = sum(best.values()) / 1000
+            limit = budget * args.scale
+            bad = sorted(forbidden & loaded)
+            ok = total_ms <= limit and not bad
+            failed |= not ok
+            extra = f"  loads {', '.join(bad)}" if bad else ""
+            print(f"{'ok  ' if ok else 'FAIL'} {name:<12} {total_ms:7.1f} ms / {limit:.0f} ms{extra}")
+            if args.verbose:
+                for module, us in sorted(best.items(), key=lambda kv: -kv[1])[:8]:
+                    print(f"       {us / 1000:7.1f} ms  {module}")
+    finally:
+        _drop_fixture()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from github_client import GitHubError, PER_PAGE, iter_issues, iter_org_repos, search_issues_page
+from models import Issue
+from workspace_store import record_open_issues, save_issue, workspace_dir
+
+SEARCH_RESULT_CAP = 1000  # GitHub search never returns more than this per query
+SEARCH_QUERY_MAX = 256
+
+
+def ingest(org: str | None = None, repos: list[str] | None = None, strategy: str = "auto", max_workers: int = 8) -> dict:
+    """Fetch open issues for an org or a repo list into the workspace, via the search API ("search"), per-repo listings ("concurrent"), or search unless it exceeds the result cap ("auto")."""
+    start = time.time()
+    summary = {"repos": {}, "requests": 0, "errors": [], "strategy": "search"}
+
+    done = False
+    if strategy != "concurrent":
+        queries = [f"org:{org} is:issue is:open"] if org and not repos else _repo_queries(repos or [])
+        done = _ingest_search(queries, summary, max_workers, force=strategy == "search")
+
+    if not done:
+        summary["strategy"] = "concurrent"
+        if org and not repos:
+            repos = _org_repos(org, summary)
+        _ingest_concurrent(repos or [], summary, max_workers)
+
+    summary["elapsed"] = time.time() - start
+    return summary
+
+
+def _org_repos(org: str, summary: dict) -> list[str]:
+    # Repos with no open issues or PRs are skipped without spending a request.
+    try:
+        return [r["full_name"] for r in iter_org_repos(org) if r["open_issues_count"]]
+    except GitHubError as exc:
+        summary["errors"].append(str(exc))
+        return []
+
+
+def _repo_queries(repos: list[str]) -> list[str]:
+    queries = []
+    current = "is:issue is:open"
+    for repo in repos:
+        term = f" repo:{repo}"
+        if len(current) + len(term) > SEARCH_QUERY_MAX:
+            queries.append(current)
+            current = "is:issue is:open"
+        current += term
+    if current != "is:issue is:open":
+        queries.append(current)
+    return queries
+
+
+def _ingest_search(queries: list[str], summary: dict, max_workers: int, force: bool) -> bool:
+    # The first page of every query tells us the total, so the remaining pages
+    # can be requested in parallel instead of walking the Link chain.
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            firsts = list(pool.map(lambda q: search_issues_page(q, 1), queries))
+        except GitHubError as exc:
+            summary["errors"].append(str(exc))
+            return False
+        summary["requests"] += len(queries)
+
+        if not force and any(total > SEARCH_RESULT_CAP for total, _ in firsts):
+            return False
+
+        futures = {}
+        # query -> {repo: open issue numbers}, or None once a page of it failed or it hit the cap
+        seen: dict[str, dict[str, set[int]] | None] = {}
+        for query, (total, results) in zip(queries, firsts):
+            seen[query] = {} if total <= SEARCH_RESULT_CAP else None
+            _save_results(results, summary, seen[query])
+            pages = math.ceil(min(total, SEARCH_RESULT_CAP) / PER_PAGE)
+            for page in range(2, pages + 1):
+                futures[pool.submit(search_issues_page, query, page)] = query
+        for fut in as_completed(futures):
+            summary["requests"] += 1
+            query = futures[fut]
+            try:
+                _, results = fut.result()
+            except GitHubError as exc:
+                summary["errors"].append(str(exc))
+                seen[query] = None
+                continue
+            _save_results(results, summary, seen[query])
+    for query, repos in seen.items():
+        if repos is None:
+            continue
+        # A repo listed in the query with no open issues left has an empty set.
+        named = [term[len("repo:"):] for term in query.split() if term.startswith("repo:")]
+        for repo in set(named) | set(repos):
+            record_open_issues(repo, repos.get(repo, set()))
+    return True
+
+
+def _ingest_concurrent(repos: list[str], summary: dict, max_workers: int):
+    def fetch(repo: str) -> tuple[str, list[Issue]]:
+        return repo, list(iter_issues(repo))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch, repo): repo for repo in repos}
+        for fut in as_completed(futures):
+            repo = futures[fut]
+            try:
+                _, issues = fut.result()
+            except GitHubError as exc:
+                summary["errors"].append(f"{repo}: {exc}")
+                continue
+            _save_results([(repo, issue) for issue in issues], summary)
+            record_open_issues(repo, {issue.number for issue in issues})
+            print(f"  {repo}: {len(issues)} open issues")
+
+
+def _save_results(results: list[tuple[str, Issue]], summary: dict, seen: dict[str, set[int]] | None = None):
+    for repo, issue in results:
+        save_issue(workspace_dir(repo, issue.number), issue)
+        summary["repos"][repo] = summary["repos"].get(repo, 0) + 1
+        if seen is not None:
+            seen.setdefault(repo, set()).add(issue.number)
+
+
+def print_summary(summary: dict):
+    repos = summary["repos"]
+    print("\nRepo | Open issues")
+    print("-----+------------")
+    for repo in sorted(repos):
+        print(f"{repo} | {repos[repo]}")
+    total = sum(repos.values())
+    line = f"\nIngested {total} issues from {len(repos)} repos via {summary['strategy']} in {summary['elapsed']:.1f}s"
+    if summary["strategy"] == "search":
+        line += f" ({summary['requests']} search requests)"
+    print(line)
+    for err in summary["errors"]:
+        print(f"Error: {err}")
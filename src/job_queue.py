@@ -0,0 +1,517 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+
+from workspace_store import workspace_root
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    repo TEXT NOT NULL,
+    issue INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    source TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+CREATE TABLE IF NOT EXISTS job_steps (
+    job_id INTEGER NOT NULL,
+    step TEXT NOT NULL,
+    data TEXT,
+    at REAL NOT NULL,
+    PRIMARY KEY (job_id, step)
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    delivery_id TEXT PRIMARY KEY,
+    event TEXT,
+    received_at REAL NOT NULL
+);
+"""
+
+# Columns added after the first release; created on open when missing.
+_COLUMNS = {
+    "options": "TEXT",
+    "owner": "TEXT",
+    "step": "TEXT",
+    "session_id": "TEXT",
+    "lease_expires": "REAL",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "result": "TEXT",
+    "retry_at": "REAL",
+}
+
+
+class SessionPending(RuntimeError):
+    """The job's Devin session is still running after the poll timeout; its steps are kept so the next attempt resumes polling it."""
+
+    def __init__(self, session_id: str):
+        super().__init__(f"Devin session {session_id} is still running; rerun the same command to resume polling it.")
+        self.session_id = session_id
+
+
+def queue_path() -> Path:
+    """The queue database: DEVIN_QUEUE_URL=sqlite:///<path> if set, else the local workspace."""
+    url = os.getenv("DEVIN_QUEUE_URL") or ""
+    if url.startswith("sqlite:///"):
+        return Path(url[len("sqlite:///"):])
+    return workspace_root() / "queue.sqlite3"
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    """Open the queue database; safe to call from any thread or process."""
+    path = path or queue_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    # WAL needs shared memory, which network filesystems do not provide; a
+    # queue outside the local workspace is assumed to live on shared disk.
+    local = path.resolve().parent == workspace_root().resolve()
+    conn.execute(f"PRAGMA journal_mode={'WAL' if local else 'DELETE'}")
+    conn.executescript(_SCHEMA)
+    _migrate(conn)
+    return conn
+
+
+def _migrate(conn: sqlite3.Connection):
+    have = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+    for name, decl in _COLUMNS.items():
+        if name not in have:
+            try:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {decl}")
+            except sqlite3.OperationalError:
+                pass  # another process added it first
+
+
+def record_delivery(conn: sqlite3.Connection, delivery_id: str, event: str) -> bool:
+    """Remember a webhook delivery; returns False if it was already seen."""
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO deliveries (delivery_id, event, received_at) VALUES (?, ?, ?)",
+        (delivery_id, event, time.time()),
+    )
+    return cur.rowcount == 1
+
+
+def seen_delivery(conn: sqlite3.Connection, delivery_id: str) -> bool:
+    return conn.execute("SELECT 1 FROM deliveries WHERE delivery_id = ?", (delivery_id,)).fetchone() is not None
+
+
+def _enqueue(conn: sqlite3.Connection, repo: str, issue: int, mode: str, source: str | None, options: dict | None) -> int:
+    rows = conn.execute(
+        "SELECT id, options FROM jobs WHERE repo = ? AND issue = ? AND mode = ? AND state = 'queued'",
+        (repo, issue, mode),
+    )
+    for row in rows:
+        # Only the same work with the same options (e.g. fresh) is a duplicate.
+        if job_options(row) == (options or {}):
+            return row["id"]
+    now = time.time()
+    cur = conn.execute(
+        "INSERT INTO jobs (repo, issue, mode, source, options, created_at, updated_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (repo, issue, mode, source, json.dumps(options or {}), now, now),
+    )
+    return cur.lastrowid
+
+
+def enqueue(
+    conn: sqlite3.Connection,
+    repo: str,
+    issue: int,
+    mode: str,
+    source: str | None = None,
+    options: dict | None = None,
+) -> int:
+    """Queue a job unless one for the same work and options is still waiting; returns the job id."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        job_id = _enqueue(conn, repo, issue, mode, source, options)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return job_id
+
+
+def enqueue_delivery(
+    conn: sqlite3.Connection,
+    delivery_id: str,
+    event: str,
+    repo: str,
+    issue: int,
+    mode: str,
+    source: str | None = None,
+    options: dict | None = None,
+) -> int | None:
+    """enqueue() and record_delivery() in one transaction, so a failed enqueue can be redelivered; None if the delivery was already handled."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        job_id = _enqueue(conn, repo, issue, mode, source, options) if record_delivery(conn, delivery_id, event) else None
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return job_id
+
+
+def current_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_alive(owner: str | None) -> bool:
+    """Whether the host:pid[/worker] owning a running job still exists; owners on other hosts are assumed alive."""
+    if not owner:
+        return False
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid.split("/", 1)[0]), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+def recover_orphans(conn: sqlite3.Connection) -> int:
+    """Requeue running jobs whose owning process died; their recorded steps are kept."""
+    rows = conn.execute("SELECT id, owner FROM jobs WHERE state = 'running'").fetchall()
+    count = 0
+    for row in rows:
+        if _owner_alive(row["owner"]):
+            continue
+        conn.execute(
+            "UPDATE jobs SET state = 'queued', owner = NULL, updated_at = ? WHERE id = ? AND state = 'running'",
+            (time.time(), row["id"]),
+        )
+        count += 1
+    return count
+
+
+def claim_next(
+    conn: sqlite3.Connection,
+    modes: set[str] | None = None,
+    owner: str | None = None,
+    lease_seconds: float | None = None,
+) -> sqlite3.Row | None:
+    """Atomically move the oldest claimable job to running and return it; with lease_seconds, running jobs whose lease lapsed are claimable too."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        query = (
+            "SELECT * FROM jobs WHERE ((state = 'queued' AND (retry_at IS NULL OR retry_at <= ?))"
+            " OR (state = 'running' AND lease_expires IS NOT NULL AND lease_expires < ?))"
+        )
+        params: list = [now, now]
+        if modes:
+            query += f" AND mode IN ({','.join('?' * len(modes))})"
+            params.extend(sorted(modes))
+        row = conn.execute(query + " ORDER BY id LIMIT 1", params).fetchone()
+        if row:
+            lease = now + lease_seconds if lease_seconds else None
+            conn.execute(
+                "UPDATE jobs SET state = 'running', owner = ?, lease_expires = ?, attempts = attempts + 1,"
+                " updated_at = ? WHERE id = ?",
+                (owner or current_owner(), lease, now, row["id"]),
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return row
+
+
+def heartbeat(conn: sqlite3.Connection, job_id: int, owner: str, lease_seconds: float) -> bool:
+    """Extend a lease; False means the job was reclaimed by someone else."""
+    cur = conn.execute(
+        "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND owner = ?",
+        (time.time() + lease_seconds, time.time(), job_id, owner),
+    )
+    return cur.rowcount == 1
+
+
+def finish(conn: sqlite3.Connection, job_id: int, owner: str, error: str | None = None) -> bool:
+    """Mark a job done or failed, unless it now belongs to someone else (requeued, reclaimed, taken over)."""
+    state = "failed" if error else "done"
+    cur = conn.execute(
+        "UPDATE jobs SET state = ?, error = ?, lease_expires = NULL, updated_at = ? WHERE id = ? AND owner = ?",
+        (state, error, time.time(), job_id, owner),
+    )
+    return cur.rowcount == 1
+
+
+def complete(conn: sqlite3.Connection, job_id: int, owner: str, result: dict | None = None, error: str | None = None):
+    """Finish a leased job and store its result, unless the lease was lost to another worker."""
+    state = "failed" if error else "done"
+    conn.execute(
+        "UPDATE jobs SET state = ?, error = ?, result = ?, lease_expires = NULL, updated_at = ?"
+        " WHERE id = ? AND owner = ?",
+        (state, error, json.dumps(result) if result is not None else None, time.time(), job_id, owner),
+    )
+
+
+def requeue(conn: sqlite3.Connection, job_id: int, owner: str, delay: float) -> bool:
+    """Put a leased job back in the queue with its steps, claimable again after delay seconds."""
+    now = time.time()
+    cur = conn.execute(
+        "UPDATE jobs SET state = 'queued', owner = NULL, lease_expires = NULL, retry_at = ?, updated_at = ?"
+        " WHERE id = ? AND owner = ?",
+        (now + delay, now, job_id, owner),
+    )
+    return cur.rowcount == 1
+
+
+def get_job(conn: sqlite3.Connection, job_id: int) -> sqlite3.Row | None:
+    return conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+
+def job_options(job: sqlite3.Row) -> dict:
+    return json.loads(job["options"] or "{}")
+
+
+def count_by_state(conn: sqlite3.Connection) -> dict:
+    rows = conn.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state").fetchall()
+    return {row["state"]: row["n"] for row in rows}
+
+
+def latest_result(conn: sqlite3.Connection, repo: str, issue: int, mode: str) -> dict | None:
+    row = conn.execute(
+        "SELECT result FROM jobs WHERE repo = ? AND issue = ? AND mode = ? AND state = 'done' AND result IS NOT NULL"
+        " ORDER BY updated_at DESC LIMIT 1",
+        (repo, issue, mode),
+    ).fetchone()
+    return json.loads(row["result"]) if row else None
+
+
+def latest_job(conn: sqlite3.Connection, repo: str, issue: int | None, mode: str) -> sqlite3.Row | None:
+    issue = issue if issue is not None else -1
+    return conn.execute(
+        "SELECT * FROM jobs WHERE repo = ? AND issue = ? AND mode = ? ORDER BY updated_at DESC LIMIT 1",
+        (repo, issue, mode),
+    ).fetchone()
+
+
+def saved_output(conn: sqlite3.Connection, repo: str, issue: int | None, mode: str) -> dict | None:
+    """{"data", "at"} of the output_saved step of the newest finished run of this work, if any."""
+    issue = issue if issue is not None else -1
+    row = conn.execute(
+        "SELECT s.data, s.at FROM job_steps s JOIN jobs j ON j.id = s.job_id"
+        " WHERE j.repo = ? AND j.issue = ? AND j.mode = ? AND j.state = 'done' AND s.step = 'output_saved'"
+        " ORDER BY s.at DESC LIMIT 1",
+        (repo, issue, mode),
+    ).fetchone()
+    return {"data": json.loads(row["data"] or "{}"), "at": row["at"]} if row else None
+
+
+class Steps:
+    """Durable log of the pipeline steps one job has completed; each record() commits before returning."""
+
+    def __init__(self, job_id: int, path: Path | None = None, owner: str | None = None):
+        self.job_id = job_id
+        self.path = path
+        self.owner = owner or current_owner()
+
+    def get(self, step: str) -> dict | None:
+        conn = connect(self.path)
+        try:
+            row = conn.execute(
+                "SELECT data FROM job_steps WHERE job_id = ? AND step = ?",
+                (self.job_id, step),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return json.loads(row["data"] or "{}")
+
+    def record(self, step: str, **data):
+        now = time.time()
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO job_steps (job_id, step, data, at) VALUES (?, ?, ?, ?)",
+                (self.job_id, step, json.dumps(data), now),
+            )
+            conn.execute(
+                "UPDATE jobs SET step = ?, session_id = COALESCE(?, session_id), updated_at = ? WHERE id = ?",
+                (step, data.get("session_id"), now, self.job_id),
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def finish(self, error: str | None = None) -> bool:
+        conn = connect(self.path)
+        try:
+            return finish(conn, self.job_id, self.owner, error=error)
+        finally:
+            conn.close()
+
+    def take_over(self) -> int | None:
+        """Once the work's lock is held, adopt the steps of a dead run of the same work and close it as taken over; returns its id, or None."""
+        conn = connect(self.path)
+        try:
+            recover_orphans(conn)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                job = get_job(conn, self.job_id)
+                row = conn.execute(
+                    "SELECT id, step, session_id FROM jobs WHERE repo = ? AND issue = ? AND mode = ? AND id != ?"
+                    " AND step IS NOT NULL AND (state = 'queued'"
+                    " OR (state = 'running' AND lease_expires IS NOT NULL AND lease_expires < ?))"
+                    " ORDER BY id DESC LIMIT 1",
+                    (job["repo"], job["issue"], job["mode"], self.job_id, time.time()),
+                ).fetchone()
+                if row:
+                    now = time.time()
+                    conn.execute(
+                        "INSERT OR IGNORE INTO job_steps (job_id, step, data, at)"
+                        " SELECT ?, step, data, at FROM job_steps WHERE job_id = ?",
+                        (self.job_id, row["id"]),
+                    )
+                    conn.execute(
+                        "UPDATE jobs SET step = COALESCE(step, ?), session_id = COALESCE(session_id, ?), updated_at = ?"
+                        " WHERE id = ?",
+                        (row["step"], row["session_id"], now, self.job_id),
+                    )
+                    conn.execute(
+                        "UPDATE jobs SET state = 'failed', error = ?, owner = NULL, lease_expires = NULL, updated_at = ?"
+                        " WHERE id = ?",
+                        (f"taken over by job {self.job_id}", now, row["id"]),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        return row["id"] if row else None
+
+    def finished_job(self, since: float) -> dict | None:
+        """Another job of the same work that finished since then (the holder we waited on), if any."""
+        conn = connect(self.path)
+        try:
+            job = get_job(conn, self.job_id)
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE repo = ? AND issue = ? AND mode = ? AND id != ? AND state = 'done'"
+                " AND updated_at >= ? ORDER BY updated_at DESC LIMIT 1",
+                (job["repo"], job["issue"], job["mode"], self.job_id, since),
+            ).fetchone()
+        finally:
+            conn.close()
+        return dict(row) if row else None
+
+    def adopt(self, job_id: int, step: str) -> dict | None:
+        """Copy one step of another job into this one; returns its data."""
+        data = Steps(job_id, self.path).get(step)
+        if data is not None:
+            self.record(step, **data)
+        return data
+
+
+def resume_or_start(repo: str, issue: int | None, mode: str, source: str = "cli") -> Steps:
+    """Steps for a direct (non-queued) run, picking up a crashed earlier run of the same work."""
+    issue = issue if issue is not None else -1
+    conn = connect()
+    try:
+        recover_orphans(conn)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE repo = ? AND issue = ? AND mode = ? AND state = 'queued' AND step IS NOT NULL"
+                " ORDER BY id DESC LIMIT 1",
+                (repo, issue, mode),
+            ).fetchone()
+            now = time.time()
+            if row:
+                job_id = row["id"]
+                conn.execute(
+                    "UPDATE jobs SET state = 'running', owner = ?, updated_at = ? WHERE id = ?",
+                    (current_owner(), now, job_id),
+                )
+            else:
+                cur = conn.execute(
+                    "INSERT INTO jobs (repo, issue, mode, state, source, options, owner, created_at, updated_at)"
+                    " VALUES (?, ?, ?, 'running', ?, '{}', ?, ?, ?)",
+                    (repo, issue, mode, source, current_owner(), now, now),
+                )
+                job_id = cur.lastrowid
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    return Steps(job_id)
+
+
+class SQLiteBackend:
+    """Queue backend over this module's SQLite database (local or on a shared disk)."""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or queue_path()
+
+    def enqueue(self, repo: str, issue: int, mode: str, source: str | None = None, options: dict | None = None) -> int:
+        conn = connect(self.path)
+        try:
+            return enqueue(conn, repo, issue, mode, source=source, options=options)
+        finally:
+            conn.close()
+
+    def claim(self, owner: str, lease_seconds: float, modes: set[str] | None = None) -> dict | None:
+        conn = connect(self.path)
+        try:
+            recover_orphans(conn)
+            row = claim_next(conn, modes, owner=owner, lease_seconds=lease_seconds)
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        job["options"] = job_options(row)
+        return job
+
+    def heartbeat(self, job_id: int, owner: str, lease_seconds: float) -> bool:
+        conn = connect(self.path)
+        try:
+            return heartbeat(conn, job_id, owner, lease_seconds)
+        finally:
+            conn.close()
+
+    def complete(self, job_id: int, owner: str, result: dict | None = None, error: str | None = None):
+        conn = connect(self.path)
+        try:
+            complete(conn, job_id, owner, result=result, error=error)
+        finally:
+            conn.close()
+
+    def requeue(self, job_id: int, owner: str, delay: float) -> bool:
+        conn = connect(self.path)
+        try:
+            return requeue(conn, job_id, owner, delay)
+        finally:
+            conn.close()
+
+    def latest_result(self, repo: str, issue: int, mode: str) -> dict | None:
+        conn = connect(self.path)
+        try:
+            return latest_result(conn, repo, issue, mode)
+        finally:
+            conn.close()
+
+    def steps(self, job_id: int, owner: str | None = None) -> Steps:
+        return Steps(job_id, self.path, owner)
+
+    def counts(self) -> dict:
+        conn = connect(self.path)
+        try:
+            return count_by_state(conn)
+        finally:
+            conn.close()
@@ -0,0 +1,79 @@
+import json
+import os
+import socket
+import time
+from pathlib import Path
+
+from workspace_store import workspace_root
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; locking is skipped there
+    fcntl = None
+
+
+def lock_path(repo: str, issue_number: int | None, mode: str) -> Path:
+    repo_slug = repo.replace("/", "_")
+    issue_part = f"issue-{issue_number}" if issue_number is not None else "issue-unknown"
+    return workspace_root() / ".locks" / f"{repo_slug}.{issue_part}.{mode}.lock"
+
+
+class Flight:
+    """An exclusive flock on one (repo, issue, mode) lock file; the kernel drops it when the holder exits."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.waited = False
+        self._fh = None
+
+    def acquire(self, on_wait=None):
+        """Take the lock, blocking while another process holds it; on_wait(owner_info) is called once if we have to wait."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "a+", encoding="utf-8")
+        if fcntl is None:
+            return self
+        try:
+            fcntl.flock(self._fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.waited = True
+            if on_wait:
+                on_wait(self.owner())
+            fcntl.flock(self._fh, fcntl.LOCK_EX)
+        self.note()
+        return self
+
+    def owner(self) -> dict:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8") or "{}")
+        except (OSError, ValueError):
+            return {}
+
+    def note(self, **info):
+        """Record who holds the lock (and e.g. its session id) for waiting processes."""
+        if info:
+            data = self.owner()
+            data.update(info)
+        else:
+            data = {"pid": os.getpid(), "host": socket.gethostname(), "since": time.time()}
+        self._fh.seek(0)
+        self._fh.truncate()
+        self._fh.write(json.dumps(data))
+        self._fh.flush()
+
+    def release(self):
+        if self._fh is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fh, fcntl.LOCK_UN)
+        self._fh.close()
+        self._fh = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def single_flight(repo: str, issue_number: int | None, mode: str, on_wait=None) -> Flight:
+    return Flight(lock_path(repo, issue_number, mode)).acquire(on_wait)
@@ -0,0 +1,105 @@
+from dataclasses import asdict, dataclass, field
+
+
+@dataclass(slots=True)
+class Comment:
+    """The subset of a GitHub issue comment that selection and prompts read."""
+
+    id: int | None = None
+    author: str | None = None
+    author_type: str | None = None
+    association: str | None = None
+    created_at: str | None = None
+    url: str | None = None
+    body: str = ""
+
+    @classmethod
+    def from_github(cls, data: dict) -> "Comment":
+        user = data.get("user") or {}
+        return cls(
+            id=data.get("id"),
+            author=user.get("login"),
+            author_type=user.get("type"),
+            association=data.get("author_association"),
+            created_at=data.get("created_at"),
+            url=data.get("html_url"),
+            body=data.get("body") or "",
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Comment":
+        # Workspaces written before the projected schema hold raw GitHub objects.
+        if "user" in data or "html_url" in data:
+            return cls.from_github(data)
+        return cls(
+            id=data.get("id"),
+            author=data.get("author"),
+            author_type=data.get("author_type"),
+            association=data.get("association"),
+            created_at=data.get("created_at"),
+            url=data.get("url"),
+            body=data.get("body") or "",
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class Issue:
+    """The subset of a GitHub issue that the CLI, prompts and workspace read."""
+
+    number: int | None = None
+    title: str | None = None
+    body: str = ""
+    url: str | None = None
+    state: str | None = None
+    author: str | None = None
+    author_association: str | None = None
+    labels: list[str] = field(default_factory=list)
+    assignees: list[str] = field(default_factory=list)
+    comments: int = 0
+    created_at: str | None = None
+    updated_at: str | None = None
+
+    @classmethod
+    def from_github(cls, data: dict) -> "Issue":
+        user = data.get("user") or {}
+        labels = data.get("labels") or []
+        assignees = data.get("assignees") or []
+        return cls(
+            number=data.get("number"),
+            title=data.get("title"),
+            body=data.get("body") or "",
+            url=data.get("html_url"),
+            state=data.get("state"),
+            author=user.get("login"),
+            author_association=data.get("author_association"),
+            labels=[l.get("name", "").strip() for l in labels if isinstance(l, dict) and l.get("name")],
+            assignees=[a.get("login", "").strip() for a in assignees if isinstance(a, dict) and a.get("login")],
+            comments=data.get("comments") or 0,
+            created_at=data.get("created_at"),
+            updated_at=data.get("updated_at"),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Issue":
+        if "html_url" in data:
+            return cls.from_github(data)
+        return cls(
+            number=data.get("number"),
+            title=data.get("title"),
+            body=data.get("body") or "",
+            url=data.get("url"),
+            state=data.get("state"),
+            author=data.get("author"),
+            author_association=data.get("author_association"),
+            labels=list(data.get("labels") or []),
+            assignees=list(data.get("assignees") or []),
+            comments=data.get("comments") or 0,
+            created_at=data.get("created_at"),
+            updated_at=data.get("updated_at"),
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
@@ -0,0 +1,140 @@
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from executor import _run_git, prepare_checkout
+from locks import single_flight
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+# Lines of context git apply needs to match around a hunk; hunks closer than
+# this on the old side will not apply on top of each other cleanly.
+CONTEXT = 3
+
+
+@dataclass(slots=True)
+class Hunk:
+    start: int
+    length: int
+
+    @property
+    def end(self) -> int:
+        return self.start + max(self.length, 1) - 1
+
+    def near(self, other: "Hunk", margin: int = CONTEXT) -> bool:
+        return self.start <= other.end + margin and other.start <= self.end + margin
+
+
+@dataclass(slots=True)
+class FilePatch:
+    path: str
+    hunks: list[Hunk] = field(default_factory=list)
+    added: int = 0
+    removed: int = 0
+
+
+def extract_diff(text: str) -> str:
+    """The unified diff inside a session's output, without surrounding prose or fences."""
+    lines = text.splitlines()
+    start = next((i for i, line in enumerate(lines) if line.startswith(("diff --git", "--- "))), None)
+    if start is None:
+        return ""
+    body = [line for line in lines[start:] if not line.startswith("```")]
+    return "\n".join(body).rstrip("\n") + "\n"
+
+
+def parse_diff(text: str) -> list[FilePatch]:
+    """Files, old-side hunk ranges and line counts of a unified diff; hunk bodies are consumed by their @@ counts, never taken for headers."""
+    files = []
+    current = None
+    old_path = None
+    old_left = new_left = 0
+    for line in text.splitlines():
+        if (old_left > 0 or new_left > 0) and line[:1] in {"+", "-", " ", "\\", ""}:
+            tag = line[:1]
+            if tag == "-":
+                old_left -= 1
+                current.removed += 1
+            elif tag == "+":
+                new_left -= 1
+                current.added += 1
+            elif tag != "\\":
+                # Context; some tools strip the leading space from blank context lines.
+                old_left -= 1
+                new_left -= 1
+            continue
+        old_left = new_left = 0
+        if line.startswith("--- "):
+            old_path = line[4:].split("\t", 1)[0]
+        elif line.startswith("+++ "):
+            new_path = line[4:].split("\t", 1)[0]
+            path = old_path if new_path == "/dev/null" else new_path
+            if path and path[:2] in {"a/", "b/"}:
+                path = path[2:]
+            current = FilePatch(path)
+            files.append(current)
+        elif current is not None:
+            match = _HUNK_RE.match(line)
+            if match:
+                length = int(match.group(2)) if match.group(2) is not None else 1
+                current.hunks.append(Hunk(int(match.group(1)), length))
+                old_left = length
+                new_left = int(match.group(4)) if match.group(4) is not None else 1
+    return files
+
+
+def diffstat(text: str) -> list[tuple[str, int, int]]:
+    """(path, lines added, lines removed) per file of a unified diff, like git diff --numstat."""
+    stats: dict[str, list[int]] = {}
+    for fp in parse_diff(text):
+        totals = stats.setdefault(fp.path, [0, 0])
+        totals[0] += fp.added
+        totals[1] += fp.removed
+    return [(path, added, removed) for path, (added, removed) in stats.items()]
+
+
+def hunk_index(patches: dict[int, str]) -> dict[str, list[tuple[int, Hunk]]]:
+    """path -> [(issue, hunk)] across every patch in the batch."""
+    index: dict[str, list[tuple[int, Hunk]]] = {}
+    for issue, text in patches.items():
+        for fp in parse_diff(text):
+            index.setdefault(fp.path, []).extend((issue, h) for h in fp.hunks)
+    return index
+
+
+def overlaps(index: dict[str, list[tuple[int, Hunk]]]) -> list[tuple[str, int, Hunk, int, Hunk]]:
+    """Pairs of hunks from different issues that touch the same lines (or their context)."""
+    found = []
+    for path, entries in index.items():
+        entries = sorted(entries, key=lambda e: e[1].start)
+        for i, (issue_a, hunk_a) in enumerate(entries):
+            for issue_b, hunk_b in entries[i + 1 :]:
+                if hunk_b.start > hunk_a.end + CONTEXT:
+                    break
+                if issue_a != issue_b and hunk_a.near(hunk_b):
+                    found.append((path, issue_a, hunk_a, issue_b, hunk_b))
+    return found
+
+
+def combined_apply(repo: str, patches: dict[int, str]) -> tuple[list[int], dict[int, str], str]:
+    """Apply the patches in issue order on a scratch worktree of the default branch; returns (applied, {failed issue: error}, combined diff)."""
+    with single_flight(repo, None, "checkout"):
+        repo_dir, branch = prepare_checkout(repo)
+        scratch = Path(tempfile.mkdtemp(prefix="devin-batch-")) / "tree"
+        _run_git(["-C", str(repo_dir), "worktree", "add", "--detach", str(scratch), f"origin/{branch}"])
+    applied, failed = [], {}
+    try:
+        for issue in sorted(patches):
+            patch_file = scratch.parent / f"issue-{issue}.patch"
+            patch_file.write_text(patches[issue], encoding="utf-8")
+            try:
+                _run_git(["-C", str(scratch), "apply", "--index", str(patch_file)], capture_output=True)
+                applied.append(issue)
+            except RuntimeError as exc:
+                failed[issue] = str(exc)
+        combined = _run_git(["-C", str(scratch), "diff", "--cached"], capture_output=True).stdout
+    finally:
+        _run_git(["-C", str(repo_dir), "worktree", "remove", "--force", str(scratch)])
+        shutil.rmtree(scratch.parent, ignore_errors=True)
+    return applied, failed, combined
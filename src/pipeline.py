@@ -0,0 +1,167 @@
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import job_queue
+from workspace_store import workspace_dir
+
+_REF_RE = re.compile(r"^(?:https://github\.com/)?([\w.-]+/[\w.-]+)(?:#|/issues/)(\d+)/?$")
+
+
+def parse_ref(line: str, default_repo: str | None = None) -> tuple[str, int]:
+    """(repo, issue) from {"repo", "issue"} JSON, owner/name#N, an issue URL, or N with a default repo."""
+    text = line.strip()
+    if text.startswith("{"):
+        data = json.loads(text)
+        repo = data.get("repo") or default_repo
+        number = data.get("issue", data.get("number"))
+        if not repo or number is None:
+            raise ValueError(f"Need repo and issue: {text}")
+        return repo, int(number)
+    match = _REF_RE.match(text)
+    if match:
+        return match.group(1), int(match.group(2))
+    if text.lstrip("#").isdigit() and default_repo:
+        return default_repo, int(text.lstrip("#"))
+    raise ValueError(f"Not an issue reference: {text}")
+
+
+class _Output:
+    """stdout during a --jsonl run: writes go to stderr, keeping each thread's last line to explain a SystemExit."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def write(self, text: str) -> int:
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        if lines:
+            self._local.last = lines[-1]
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def forget(self):
+        self._local.last = None
+
+    def last_line(self) -> str | None:
+        return getattr(self._local, "last", None)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def _session_id(steps: job_queue.Steps, base_dir) -> str | None:
+    for step in ("exec_session", "plan_session"):
+        data = steps.get(step)
+        if data and data.get("session_id"):
+            return data["session_id"]
+    path = base_dir / "session.json"
+    if path.exists():
+        try:
+            return json.loads(path.read_text(encoding="utf-8")).get("session_id")
+        except ValueError:
+            return None
+    return None
+
+
+def run_issue(run_job, repo: str, issue_number: int, mode: str, fresh: bool = False) -> dict:
+    """Run one issue without prompting; returns a JSON-ready dict whose status is "done", "pending" or "error"."""
+    started = time.time()
+    record = {"repo": repo, "issue": issue_number, "mode": mode, "started_at": round(started, 3)}
+    steps = job_queue.resume_or_start(repo, issue_number, mode, source="jsonl")
+    output = sys.stdout if isinstance(sys.stdout, _Output) else None
+    if output is not None:
+        output.forget()
+    try:
+        run_job(repo, issue_number, mode, {"fresh": fresh}, steps)
+    except job_queue.SessionPending:
+        record["status"] = "pending"
+    except SystemExit as exc:
+        # The CLI prints its reason and then exits 1; that printed line is the error.
+        message = exc.code if isinstance(exc.code, str) else output and output.last_line()
+        record.update(status="error", error=message or f"exited with status {exc.code}")
+    except Exception as exc:
+        record.update(status="error", error=str(exc) or type(exc).__name__)
+    base_dir = workspace_dir(repo, issue_number)
+    record["session_id"] = _session_id(steps, base_dir)
+    if "status" not in record:
+        # Only a result this job recorded counts: plan.md or devin.patch may be left from an earlier run.
+        saved = steps.get("plan_saved" if mode == "plan" else "output_saved")
+        record["status"] = "done" if saved is not None else "pending"
+        plan_path = base_dir / "plan.md"
+        if saved is not None and mode == "plan" and plan_path.exists():
+            record["plan"] = plan_path.read_text(encoding="utf-8")
+        if saved is not None and mode == "execute":
+            record["patch_path"] = saved.get("path")
+        if saved is not None and mode == "execute-pr":
+            record["pr_url"] = saved.get("pr_url")
+    record["seconds"] = round(time.time() - started, 3)
+    return record
+
+
+def stream(lines, handle, sink, workers: int) -> bool:
+    """Feed non-blank lines to handle() on up to workers threads, writing results as JSON lines; False if sink closed early."""
+    workers = max(1, workers)
+    slots = threading.Semaphore(workers)
+    results: queue.Queue = queue.Queue()
+    broken = threading.Event()
+
+    def write():
+        while True:
+            record = results.get()
+            if record is None:
+                return
+            if not broken.is_set():
+                try:
+                    sink.write(json.dumps(record) + "\n")
+                    sink.flush()
+                except BrokenPipeError:
+                    broken.set()
+            slots.release()
+
+    def work(line: str):
+        try:
+            record = handle(line)
+        except Exception as exc:
+            record = {"input": line.strip(), "status": "error", "error": str(exc)}
+        results.put(record)
+
+    writer = threading.Thread(target=write, daemon=True)
+    writer.start()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in lines:
+            if not line.strip():
+                continue
+            slots.acquire()
+            if broken.is_set():
+                break
+            pool.submit(work, line)
+    results.put(None)
+    writer.join()
+    return not broken.is_set()
+
+
+def run(run_job, mode: str, workers: int, default_repo: str | None = None, fresh: bool = False, source=None, sink=None):
+    """--jsonl: issue references in on stdin, one JSON result line per issue out on stdout."""
+    source = source or sys.stdin
+    sink = sink or sys.stdout
+
+    def handle(line: str) -> dict:
+        repo, issue_number = parse_ref(line, default_repo)
+        return run_issue(run_job, repo, issue_number, mode, fresh)
+
+    saved, sys.stdout = sys.stdout, _Output(sys.stderr)
+    try:
+        ok = stream(source, handle, sink, workers)
+    finally:
+        sys.stdout = saved
+    if not ok and sink is saved:
+        # Downstream went away (e.g. `| head`); keep the interpreter's final flush quiet.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), saved.fileno())
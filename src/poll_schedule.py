@@ -0,0 +1,111 @@
+import sqlite3
+import time
+from pathlib import Path
+
+from workspace_store import workspace_root
+
+MIN_SAMPLES = 5
+HISTORY = 50
+DENSE = 2.0
+SPARSE = 30.0
+WINDOW_POLLS = 8
+MIN_TIMEOUT = 60.0
+
+# Turned off by cassette replays, whose virtual-clock durations are not real history.
+record_enabled = True
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_timings (
+    kind TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_timings_kind ON session_timings (kind, repo, at);
+"""
+
+
+def history_path() -> Path:
+    return workspace_root() / "poll_history.sqlite3"
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    path = path or history_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def record(kind: str, repo: str, seconds: float, outcome: str):
+    """Store how long a session took to reach a terminal status (or how long we waited before giving up)."""
+    if not record_enabled:
+        return
+    conn = connect()
+    try:
+        conn.execute(
+            "INSERT INTO session_timings (kind, repo, seconds, outcome, at) VALUES (?, ?, ?, ?, ?)",
+            (kind, repo, seconds, outcome, time.time()),
+        )
+    finally:
+        conn.close()
+
+
+def durations(kind: str, repo: str | None = None) -> list[float]:
+    """Recent durations for kind in repo, or across repos when the repo has too few."""
+    conn = connect()
+    try:
+        rows = []
+        if repo:
+            rows = conn.execute(
+                "SELECT seconds FROM session_timings WHERE kind = ? AND repo = ? ORDER BY at DESC LIMIT ?",
+                (kind, repo, HISTORY),
+            ).fetchall()
+        if len(rows) < MIN_SAMPLES:
+            rows = conn.execute(
+                "SELECT seconds FROM session_timings WHERE kind = ? ORDER BY at DESC LIMIT ?",
+                (kind, HISTORY),
+            ).fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class Schedule:
+    """When to poll next and when to give up: a fixed backoff without history, else dense polls between the 10th and 90th percentile of past durations."""
+
+    def __init__(self, samples: list[float], max_wait: float):
+        self.fixed = len(samples) < MIN_SAMPLES
+        self._backoff = 1.0
+        if self.fixed:
+            self.timeout = max_wait
+            return
+        self.p10 = _percentile(samples, 0.10)
+        self.p90 = _percentile(samples, 0.90)
+        self.timeout = max(MIN_TIMEOUT, max_wait, 2 * _percentile(samples, 0.95))
+
+    def next_interval(self, elapsed: float, started: bool = True) -> float:
+        # Until the session is seen working, a finished/blocked status may be
+        # stale (e.g. right after a revision message), so keep the short backoff.
+        if self.fixed or not started:
+            interval = min(self._backoff, SPARSE)
+            self._backoff = min(SPARSE, self._backoff * 2)
+            return interval
+        if elapsed < self.p10:
+            return max(DENSE, min(self.p10 - elapsed, max(SPARSE, self.p10 / 4)))
+        if elapsed <= self.p90:
+            gap = (self.p90 - self.p10) / WINDOW_POLLS
+        else:
+            gap = (elapsed - self.p90) / 2
+        return max(DENSE, min(SPARSE, gap))
+
+
+def schedule_for(kind: str | None, repo: str | None, max_wait: float) -> Schedule:
+    return Schedule(durations(kind, repo) if kind else [], max_wait)
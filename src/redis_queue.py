@@ -0,0 +1,266 @@
+import json
+import time
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+PREFIX = "devin"
+
+# Enqueue atomically: reuse the job still pending for this dedupe key, or
+# allocate an id and queue a new one, so two callers never both create it.
+_ENQUEUE = """
+local prefix = ARGV[1]
+local key = ARGV[2]
+local mode = ARGV[5]
+local existing = redis.call('HGET', prefix .. ':pending', key)
+if existing then
+    return tonumber(existing)
+end
+local id = redis.call('INCR', prefix .. ':seq')
+redis.call('HSET', prefix .. ':job:' .. id,
+    'id', id, 'repo', ARGV[3], 'issue', ARGV[4], 'mode', mode, 'state', 'queued', 'source', ARGV[6],
+    'options', ARGV[7], 'key', key, 'attempts', 0, 'created_at', ARGV[8], 'updated_at', ARGV[8])
+redis.call('HSET', prefix .. ':pending', key, id)
+redis.call('ZADD', prefix .. ':queued:' .. mode, id, id)
+redis.call('ZADD', prefix .. ':work:' .. ARGV[3] .. '|' .. ARGV[4] .. '|' .. mode, id, id)
+redis.call('SADD', prefix .. ':modes', mode)
+return id
+"""
+
+# Claim atomically: take the oldest queued id across the requested modes, or
+# else the job of those modes whose lease lapsed longest ago, and lease it to
+# the caller.
+# Requeued jobs wait in delayed:<mode> until their retry time comes.
+_CLAIM = """
+local now = tonumber(ARGV[1])
+local lease = tonumber(ARGV[2])
+local owner = ARGV[3]
+local prefix = ARGV[4]
+local best, best_key = nil, nil
+local wanted = {}
+for i = 5, #ARGV do
+    wanted[ARGV[i]] = true
+    local key = prefix .. ':queued:' .. ARGV[i]
+    local delayed = prefix .. ':delayed:' .. ARGV[i]
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', delayed, '-inf', now)) do
+        redis.call('ZREM', delayed, id)
+        redis.call('ZADD', key, tonumber(id), id)
+    end
+    local head = redis.call('ZRANGE', key, 0, 0)
+    if head[1] and (best == nil or tonumber(head[1]) < tonumber(best)) then
+        best, best_key = head[1], key
+    end
+end
+if best then
+    redis.call('ZREM', best_key, best)
+else
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', prefix .. ':leases', '-inf', now)) do
+        if wanted[redis.call('HGET', prefix .. ':job:' .. id, 'mode')] then
+            best = id
+            break
+        end
+    end
+    if not best then
+        return nil
+    end
+end
+local job = prefix .. ':job:' .. best
+redis.call('HDEL', prefix .. ':pending', redis.call('HGET', job, 'key'))
+redis.call('ZADD', prefix .. ':leases', now + lease, best)
+redis.call('HSET', job, 'state', 'running', 'owner', owner, 'lease_expires', now + lease, 'updated_at', now)
+redis.call('HINCRBY', job, 'attempts', 1)
+return best
+"""
+
+_HEARTBEAT = """
+local job = ARGV[4] .. ':job:' .. ARGV[1]
+if redis.call('HGET', job, 'owner') ~= ARGV[2] then
+    return 0
+end
+redis.call('ZADD', ARGV[4] .. ':leases', ARGV[3], ARGV[1])
+redis.call('HSET', job, 'lease_expires', ARGV[3])
+return 1
+"""
+
+_COMPLETE = """
+local job = ARGV[6] .. ':job:' .. ARGV[1]
+if redis.call('HGET', job, 'owner') ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', ARGV[6] .. ':leases', ARGV[1])
+redis.call('HSET', job, 'state', ARGV[3], 'error', ARGV[4], 'result', ARGV[5], 'lease_expires', '', 'updated_at', ARGV[7])
+return 1
+"""
+
+_FINISH = """
+local job = ARGV[5] .. ':job:' .. ARGV[1]
+if redis.call('HGET', job, 'owner') ~= ARGV[2] then
+    return 0
+end
+redis.call('HSET', job, 'state', ARGV[3], 'error', ARGV[4], 'updated_at', ARGV[6])
+return 1
+"""
+
+_REQUEUE = """
+local job = ARGV[4] .. ':job:' .. ARGV[1]
+if redis.call('HGET', job, 'owner') ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', ARGV[4] .. ':leases', ARGV[1])
+redis.call('ZADD', ARGV[4] .. ':delayed:' .. redis.call('HGET', job, 'mode'), ARGV[3], ARGV[1])
+redis.call('HSETNX', ARGV[4] .. ':pending', redis.call('HGET', job, 'key'), ARGV[1])
+redis.call('HSET', job, 'state', 'queued', 'owner', '', 'lease_expires', '', 'retry_at', ARGV[3])
+return 1
+"""
+
+
+# Take over atomically: adopt the steps of the newest other job of the same
+# work that is queued, or running on a lapsed lease, with a recorded step, and
+# close that job. Mirrors job_queue.Steps.take_over.
+_TAKE_OVER = """
+local prefix, me, now = ARGV[1], ARGV[2], tonumber(ARGV[3])
+local job = prefix .. ':job:' .. me
+local fields = redis.call('HMGET', job, 'repo', 'issue', 'mode')
+local mode = fields[3]
+for _, id in ipairs(redis.call('ZREVRANGE', prefix .. ':work:' .. fields[1] .. '|' .. fields[2] .. '|' .. mode, 0, -1)) do
+    local old = prefix .. ':job:' .. id
+    local o = redis.call('HMGET', old, 'state', 'step', 'lease_expires', 'key', 'session_id')
+    local lapsed = o[1] == 'running' and o[3] and o[3] ~= '' and tonumber(o[3]) < now
+    if id ~= me and o[2] and (o[1] == 'queued' or lapsed) then
+        local steps = redis.call('HGETALL', old .. ':steps')
+        for i = 1, #steps, 2 do
+            redis.call('HSETNX', job .. ':steps', steps[i], steps[i + 1])
+        end
+        redis.call('HSETNX', job, 'step', o[2])
+        if o[5] and o[5] ~= '' then
+            redis.call('HSETNX', job, 'session_id', o[5])
+        end
+        redis.call('ZREM', prefix .. ':queued:' .. mode, id)
+        redis.call('ZREM', prefix .. ':delayed:' .. mode, id)
+        redis.call('ZREM', prefix .. ':leases', id)
+        if o[4] and redis.call('HGET', prefix .. ':pending', o[4]) == id then
+            redis.call('HDEL', prefix .. ':pending', o[4])
+        end
+        redis.call('HSET', old, 'state', 'failed', 'error', 'taken over by job ' .. me, 'owner', '',
+            'lease_expires', '', 'updated_at', now)
+        return tonumber(id)
+    end
+end
+return nil
+"""
+
+
+def _work_key(repo: str, issue, mode: str) -> str:
+    return f"{PREFIX}:work:{repo}|{issue}|{mode}"
+
+
+class RedisSteps:
+    """Step log for a job held in Redis; same interface as job_queue.Steps."""
+
+    def __init__(self, backend: "RedisBackend", job_id: int, owner: str):
+        self.backend = backend
+        self.client = backend.client
+        self.job_id = job_id
+        self.owner = owner
+        self.key = f"{PREFIX}:job:{job_id}"
+
+    def get(self, step: str) -> dict | None:
+        raw = self.client.hget(f"{self.key}:steps", step)
+        return json.loads(raw) if raw is not None else None
+
+    def record(self, step: str, **data):
+        pipe = self.client.pipeline()
+        pipe.hset(f"{self.key}:steps", step, json.dumps(data))
+        fields = {"step": step, "updated_at": time.time()}
+        if data.get("session_id"):
+            fields["session_id"] = data["session_id"]
+        pipe.hset(self.key, mapping=fields)
+        pipe.execute()
+
+    def finish(self, error: str | None = None) -> bool:
+        state = "failed" if error else "done"
+        return bool(self.backend._finish(args=[self.job_id, self.owner, state, error or "", PREFIX, time.time()]))
+
+    def take_over(self) -> int | None:
+        job_id = self.backend._take_over(args=[PREFIX, self.job_id, time.time()])
+        return int(job_id) if job_id is not None else None
+
+    def finished_job(self, since: float) -> dict | None:
+        job = self.client.hgetall(self.key)
+        for job_id in self.client.zrevrange(_work_key(job["repo"], job["issue"], job["mode"]), 0, -1):
+            if int(job_id) == self.job_id:
+                continue
+            other = self.backend.job(int(job_id))
+            if other and other["state"] == "done" and float(other.get("updated_at") or 0) >= since:
+                return other
+        return None
+
+    def adopt(self, job_id: int, step: str) -> dict | None:
+        data = RedisSteps(self.backend, job_id, "").get(step)
+        if data is not None:
+            self.record(step, **data)
+        return data
+
+
+class RedisBackend:
+    """Queue backend on any server speaking the Redis protocol (Redis, Valkey, KeyDB...)."""
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError("The redis package is required for redis:// queues (pip install redis).")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self._enqueue = self.client.register_script(_ENQUEUE)
+        self._claim = self.client.register_script(_CLAIM)
+        self._heartbeat = self.client.register_script(_HEARTBEAT)
+        self._complete = self.client.register_script(_COMPLETE)
+        self._requeue = self.client.register_script(_REQUEUE)
+        self._finish = self.client.register_script(_FINISH)
+        self._take_over = self.client.register_script(_TAKE_OVER)
+
+    def enqueue(self, repo: str, issue: int, mode: str, source: str | None = None, options: dict | None = None) -> int:
+        dedupe_key = f"{repo}|{issue}|{mode}|{json.dumps(options or {}, sort_keys=True)}"
+        args = [PREFIX, dedupe_key, repo, issue, mode, source or "", json.dumps(options or {}), time.time()]
+        return int(self._enqueue(args=args))
+
+    def claim(self, owner: str, lease_seconds: float, modes: set[str] | None = None) -> dict | None:
+        modes = sorted(modes or self.client.smembers(f"{PREFIX}:modes"))
+        job_id = self._claim(args=[time.time(), lease_seconds, owner, PREFIX, *modes])
+        return self.job(int(job_id)) if job_id is not None else None
+
+    def job(self, job_id: int) -> dict | None:
+        job = self.client.hgetall(f"{PREFIX}:job:{job_id}")
+        if not job:
+            return None
+        job["id"] = int(job["id"])
+        job["issue"] = int(job["issue"])
+        job["options"] = json.loads(job.get("options") or "{}")
+        return job
+
+    def heartbeat(self, job_id: int, owner: str, lease_seconds: float) -> bool:
+        return bool(self._heartbeat(args=[job_id, owner, time.time() + lease_seconds, PREFIX]))
+
+    def complete(self, job_id: int, owner: str, result: dict | None = None, error: str | None = None):
+        state = "failed" if error else "done"
+        payload = json.dumps(result) if result is not None else ""
+        if self._complete(args=[job_id, owner, state, error or "", payload, PREFIX, time.time()]):
+            job = self.client.hgetall(f"{PREFIX}:job:{job_id}")
+            if state == "done" and payload:
+                self.client.hset(f"{PREFIX}:results", f"{job['repo']}|{job['issue']}|{job['mode']}", payload)
+
+    def requeue(self, job_id: int, owner: str, delay: float) -> bool:
+        return bool(self._requeue(args=[job_id, owner, time.time() + delay, PREFIX]))
+
+    def latest_result(self, repo: str, issue: int, mode: str) -> dict | None:
+        raw = self.client.hget(f"{PREFIX}:results", f"{repo}|{issue}|{mode}")
+        return json.loads(raw) if raw else None
+
+    def steps(self, job_id: int, owner: str) -> RedisSteps:
+        return RedisSteps(self, job_id, owner)
+
+    def counts(self) -> dict:
+        counts = {"queued": 0, "running": self.client.zcard(f"{PREFIX}:leases")}
+        for mode in self.client.smembers(f"{PREFIX}:modes"):
+            counts["queued"] += self.client.zcard(f"{PREFIX}:queued:{mode}")
+        return counts
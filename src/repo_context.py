@@ -0,0 +1,150 @@
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+from executor import _run_git, prepare_checkout
+from locks import single_flight
+from models import Comment, Issue
+from workspace_store import read_record, record_path, workspace_root, write_record
+
+DEFAULT_BUDGET = 6000
+RELATED_FILES = 8
+MAX_FILE_BYTES = 200_000
+MAX_SYMBOLS = 25
+
+_SYMBOL_PATTERNS = {
+    (".py",): re.compile(r"^(?:async\s+def|def|class)\s+(\w+)", re.M),
+    (".js", ".jsx", ".ts", ".tsx", ".mjs"): re.compile(
+        r"^(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:function\*?|class|interface|type|enum|const)\s+(\w+)", re.M
+    ),
+    (".go",): re.compile(r"^(?:func\s+(?:\([^)]*\)\s*)?|type\s+)(\w+)", re.M),
+    (".rs",): re.compile(r"^(?:pub(?:\([^)]*\))?\s+)?(?:fn|struct|enum|trait|mod|type)\s+(\w+)", re.M),
+    (".java", ".kt", ".cs", ".scala"): re.compile(
+        r"^(?:public\s+|internal\s+|abstract\s+|final\s+|sealed\s+|data\s+)*(?:class|interface|enum|object|record)\s+(\w+)", re.M
+    ),
+    (".rb",): re.compile(r"^(?:class|module|def)\s+([\w:.]+)", re.M),
+    (".c", ".h", ".cc", ".cpp", ".hpp"): re.compile(r"^(?:struct|class|enum)\s+(\w+)|^\w[\w\s\*]*?\b(\w+)\s*\([^;]*$", re.M),
+}
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+_CAMEL_RE = re.compile(r"[a-z]+|[A-Z][a-z]*|\d+")
+
+
+def enabled() -> bool:
+    """Repo maps need a local clone, so they are opt-in (--repo-map / DEVIN_REPO_MAP=1)."""
+    return os.getenv("DEVIN_REPO_MAP", "").lower() in {"1", "true", "yes"}
+
+
+def _terms(text: str) -> set[str]:
+    terms = set()
+    for word in _WORD_RE.findall(text):
+        terms.add(word.lower())
+        for part in re.split(r"_+", word):
+            terms.update(p.lower() for p in _CAMEL_RE.findall(part) if len(p) > 2)
+    return terms
+
+
+def _symbols(path: Path) -> list[str]:
+    pattern = next((p for exts, p in _SYMBOL_PATTERNS.items() if path.suffix in exts), None)
+    if pattern is None:
+        return []
+    try:
+        if path.stat().st_size > MAX_FILE_BYTES:
+            return []
+        text = path.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return []
+    names = []
+    for match in pattern.finditer(text):
+        name = next((g for g in match.groups() if g), None)
+        if name and name not in names:
+            names.append(name)
+            if len(names) >= MAX_SYMBOLS:
+                break
+    return names
+
+
+def build_map(checkout: Path) -> dict:
+    """Issue-independent map of a checkout: tracked files and their top-level symbols."""
+    files = _run_git(["-C", str(checkout), "ls-files"], capture_output=True).stdout.splitlines()
+    return {"files": {name: _symbols(checkout / name) for name in files}}
+
+
+def load_map(repo: str) -> tuple[str, dict]:
+    """Return (sha, map) for the repo's default branch, building it once per commit."""
+    # The shared checkout is reset in place, so concurrent jobs take turns.
+    with single_flight(repo, None, "checkout"):
+        checkout, _ = prepare_checkout(repo)
+        sha = _run_git(["-C", str(checkout), "rev-parse", "HEAD"], capture_output=True).stdout.strip()
+        cache_dir = workspace_root() / repo.replace("/", "_")
+        name = f"repomap-{sha}"
+        cached = read_record(cache_dir, name)
+        if cached is not None:
+            return sha, cached
+        data = build_map(checkout)
+    write_record(cache_dir, name, data)
+    for old in cache_dir.glob("repomap-*"):
+        if old != record_path(cache_dir, name):
+            old.unlink()
+    return sha, data
+
+
+def related_files(repo_map: dict, issue: Issue, comments: list[Comment] | None = None, limit: int = RELATED_FILES):
+    """Rank files by idf-weighted overlap between the issue text and each file's path and symbols."""
+    text = "\n".join([issue.title or "", issue.body or ""] + [c.body or "" for c in comments or []])
+    wanted = _terms(text)
+    lowered = text.lower()
+    files = repo_map["files"]
+    file_terms = {name: _terms(name.replace("/", " ").replace(".", " ") + " " + " ".join(syms)) for name, syms in files.items()}
+    df = Counter(t for terms in file_terms.values() for t in terms & wanted)
+    n = max(1, len(files))
+    scored = []
+    for name, terms in file_terms.items():
+        score = sum(math.log(n / df[t]) for t in terms & wanted)
+        # Paths quoted in tracebacks or prose are the strongest hint there is.
+        if name.lower() in lowered or Path(name).name.lower() in lowered:
+            score += 10
+        if score > 0:
+            scored.append((score, name))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [name for _, name in scored[:limit]]
+
+
+def _tree(files: list[str]) -> list[str]:
+    dirs = Counter(str(Path(f).parent) for f in files)
+    return [f"{d}/ ({count} files)" if d != "." else f"./ ({count} files)" for d, count in sorted(dirs.items())]
+
+
+def render(sha: str, repo_map: dict, related: list[str], budget: int = DEFAULT_BUDGET) -> str:
+    """Render the pack, dropping the least useful lines first once it would exceed budget characters."""
+    files = repo_map["files"]
+    head = f"commit: {sha}\n"
+    sections = []
+    if related:
+        lines = ["Files most related to this issue (path: top-level symbols):"]
+        lines += [f"  {name}: {', '.join(files.get(name) or []) or '-'}" for name in related]
+        sections.append(lines)
+    sections.append(["Directories:"] + [f"  {line}" for line in _tree(list(files))])
+    symbol_lines = [f"  {name}: {', '.join(syms)}" for name, syms in files.items() if syms and name not in related]
+    if symbol_lines:
+        sections.append(["Other top-level symbols:"] + symbol_lines)
+
+    out = [head]
+    used = len(head)
+    marker = "  ...\n"
+    for lines in sections:
+        for i, line in enumerate(lines):
+            # Room for the marker is always kept, and nothing follows it, so the pack never exceeds budget.
+            if used + len(line) + 1 > budget - len(marker):
+                if i > 0:
+                    out.append(marker)
+                return "".join(out)
+            out.append(line + "\n")
+            used += len(line) + 1
+    return "".join(out)
+
+
+def context_pack(repo: str, issue: Issue, comments: list[Comment] | None = None, budget: int = DEFAULT_BUDGET) -> str:
+    sha, repo_map = load_map(repo)
+    return render(sha, repo_map, related_files(repo_map, issue, comments), budget)
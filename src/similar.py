@@ -0,0 +1,217 @@
+import hashlib
+import re
+import sqlite3
+import zlib
+from array import array
+from pathlib import Path
+
+from models import Issue
+from workspace_store import load_issue, record_path, workspace_dir, workspace_root
+
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+THRESHOLD = 0.5
+
+_BIN_BITS = NUM_HASHES.bit_length() - 1
+_EMPTY = 1 << 64
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    repo TEXT NOT NULL,
+    issue INTEGER NOT NULL,
+    sig BLOB NOT NULL,
+    has_plan INTEGER NOT NULL DEFAULT 0,
+    mtime REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (repo, issue)
+);
+CREATE TABLE IF NOT EXISTS bands (
+    repo TEXT NOT NULL,
+    band INTEGER NOT NULL,
+    hash INTEGER NOT NULL,
+    issue INTEGER NOT NULL,
+    PRIMARY KEY (repo, band, hash, issue)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bands_issue ON bands (repo, issue);
+"""
+
+
+def index_path() -> Path:
+    return workspace_root() / "similar.sqlite3"
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    path = path or index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+def _shingles(text: str) -> set[int]:
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < 3:
+        return {_hash(t) for t in tokens}
+    return {_hash(" ".join(tokens[i : i + 3])) for i in range(len(tokens) - 2)}
+
+
+def signature(issue: Issue) -> array | None:
+    """One-permutation MinHash signature of an issue's title and body, densified by rotation; None if it has no words."""
+    shingles = _shingles(f"{issue.title or ''}\n{issue.body or ''}")
+    if not shingles:
+        return None
+    sig = [_EMPTY] * NUM_HASHES
+    for h in shingles:
+        b = h & (NUM_HASHES - 1)
+        v = h >> _BIN_BITS
+        if v < sig[b]:
+            sig[b] = v
+    filled = [i for i, v in enumerate(sig) if v != _EMPTY]
+    for i in range(NUM_HASHES):
+        if sig[i] == _EMPTY:
+            j = next((f for f in filled if f > i), filled[0])
+            sig[i] = (sig[j] + (j - i) % NUM_HASHES * 0x9E3779B97F4A7C15) & (_EMPTY - 1)
+    return array("Q", sig)
+
+
+def _band_hashes(sig: array) -> list[int]:
+    return [zlib.crc32(sig[i * ROWS : (i + 1) * ROWS].tobytes()) for i in range(BANDS)]
+
+
+def _similarity(a: array, b: array) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def _forget(conn: sqlite3.Connection, repo: str, issue_number: int):
+    conn.execute("DELETE FROM bands WHERE repo = ? AND issue = ?", (repo, issue_number))
+    conn.execute("DELETE FROM signatures WHERE repo = ? AND issue = ?", (repo, issue_number))
+
+
+def _write(conn: sqlite3.Connection, repo: str, issue_number: int, issue: Issue, base_dir: Path):
+    sig = signature(issue)
+    if sig is None:
+        _forget(conn, repo, issue_number)
+        return
+    conn.execute("DELETE FROM bands WHERE repo = ? AND issue = ?", (repo, issue_number))
+    path = record_path(base_dir, "issue")
+    conn.execute(
+        "INSERT OR REPLACE INTO signatures (repo, issue, sig, has_plan, mtime) VALUES (?, ?, ?, ?, ?)",
+        (repo, issue_number, sig.tobytes(), int((base_dir / "plan.md").exists()), path.stat().st_mtime if path else 0),
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO bands (repo, band, hash, issue) VALUES (?, ?, ?, ?)",
+        [(repo, band, h, issue_number) for band, h in enumerate(_band_hashes(sig))],
+    )
+
+
+def update(repo: str, issue_number: int | None):
+    """(Re)index one issue from its workspace directory, or drop it if the directory is gone."""
+    if issue_number is None:
+        return
+    base_dir = workspace_dir(repo, issue_number)
+    issue = load_issue(base_dir)
+    conn = connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        if issue is None:
+            _forget(conn, repo, issue_number)
+        else:
+            _write(conn, repo, issue_number, issue, base_dir)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+def lookup(repo: str, issue: Issue, threshold: float = THRESHOLD, with_plan: bool = True, limit: int = 5):
+    """Return [(similarity, issue_number)] of indexed issues in repo that look like this one."""
+    sig = signature(issue)
+    if sig is None:
+        return []
+    conn = connect()
+    try:
+        candidates = set()
+        for band, h in enumerate(_band_hashes(sig)):
+            candidates.update(
+                row[0]
+                for row in conn.execute("SELECT issue FROM bands WHERE repo = ? AND band = ? AND hash = ?", (repo, band, h))
+            )
+        candidates.discard(issue.number)
+        rows = []
+        ids = sorted(candidates)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i : i + 500]
+            rows += conn.execute(
+                f"SELECT issue, sig, has_plan FROM signatures WHERE repo = ? AND issue IN ({','.join('?' * len(chunk))})",
+                [repo, *chunk],
+            ).fetchall()
+    finally:
+        conn.close()
+    matches = []
+    for number, raw, has_plan in rows:
+        if with_plan and not has_plan:
+            continue
+        other = array("Q")
+        other.frombytes(raw)
+        score = _similarity(sig, other)
+        if score >= threshold:
+            matches.append((score, number))
+    matches.sort(reverse=True)
+    return matches[:limit]
+
+
+def index_workspace(root: Path | None = None) -> dict:
+    """Bring the index up to date with every saved issue; unchanged ones are skipped, vanished ones dropped."""
+    root = root or workspace_root()
+    stats = {"indexed": 0, "unchanged": 0, "removed": 0}
+    if not root.exists():
+        return stats
+    conn = connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        known = {
+            (repo.replace("/", "_"), issue): (repo, mtime, has_plan)
+            for repo, issue, mtime, has_plan in conn.execute("SELECT repo, issue, mtime, has_plan FROM signatures")
+        }
+        found = set()
+        for repo_dir in root.iterdir():
+            if not repo_dir.is_dir() or repo_dir.name.startswith("."):
+                continue
+            for issue_dir in repo_dir.glob("issue-*"):
+                path = record_path(issue_dir, "issue")
+                if path is None:
+                    continue
+                try:
+                    number = int(issue_dir.name.split("-", 1)[1])
+                except ValueError:
+                    continue
+                found.add((repo_dir.name, number))
+                seen = known.get((repo_dir.name, number))
+                if seen and seen[1:] == (path.stat().st_mtime, int((issue_dir / "plan.md").exists())):
+                    stats["unchanged"] += 1
+                    continue
+                issue = load_issue(issue_dir)
+                if issue is None:
+                    continue
+                # Directory slugs lose the owner/name slash; the record's URL keeps it.
+                repo = _repo_from_url(issue.url) or repo_dir.name.replace("_", "/", 1)
+                _write(conn, repo, number, issue, issue_dir)
+                stats["indexed"] += 1
+        for key, (repo, _, _) in known.items():
+            if key not in found:
+                _forget(conn, repo, key[1])
+                stats["removed"] += 1
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return stats
+
+
+def _repo_from_url(url: str | None) -> str | None:
+    match = re.match(r"https://github\.com/([^/]+/[^/]+)/issues/\d+", url or "")
+    return match.group(1) if match else None
@@ -0,0 +1,154 @@
+import heapq
+import time
+from datetime import datetime, timezone
+
+from comment_selection import is_bot, text_signals
+from github_client import GitHubError, iter_issues
+from models import Comment, Issue
+from workspace_store import (
+    ingested_at,
+    load_context,
+    load_issue,
+    record_open_issues,
+    save_issue,
+    workspace_dir,
+    workspace_root,
+)
+
+# Saved issues are ranked without a fetch only if a complete ingest is this recent.
+FRESH_SECONDS = 3600
+
+POSITIVE_LABELS = {"bug", "regression", "confirmed", "good first issue", "help wanted"}
+NEGATIVE_LABELS = {
+    "duplicate",
+    "invalid",
+    "wontfix",
+    "won't fix",
+    "question",
+    "discussion",
+    "needs repro",
+    "needs-repro",
+    "needs info",
+    "needs-info",
+    "stale",
+}
+
+
+def _days_since(stamp: str | None, now: datetime) -> float | None:
+    if not stamp:
+        return None
+    try:
+        then = datetime.fromisoformat(stamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return (now - then).total_seconds() / 86400
+
+
+def score_issue(issue: Issue, comments: list[Comment] | None = None, now: datetime | None = None):
+    """Return (score, reasons) for how likely a session on this issue is to pay off."""
+    now = now or datetime.now(timezone.utc)
+    score = 0
+    reasons = []
+
+    signals = text_signals(issue.body, issue.author_association)
+    if not (issue.body or "").strip():
+        score -= 3
+        reasons.append("no body")
+    if signals["keywords"]:
+        score += 3
+        reasons.append("repro")
+    if signals["code"]:
+        score += 2
+        reasons.append("code")
+    if signals["sized"]:
+        score += 1
+    if signals["maintainer"]:
+        score += 2
+        reasons.append("maintainer")
+
+    labels = {label.lower() for label in issue.labels}
+    if labels & POSITIVE_LABELS:
+        score += 2
+        reasons.append("+label")
+    bad = labels & NEGATIVE_LABELS
+    if bad:
+        score -= 5 * len(bad)
+        reasons.append("-" + ",".join(sorted(bad)))
+    if issue.assignees:
+        score -= 2
+        reasons.append("assigned")
+
+    age = _days_since(issue.created_at, now)
+    idle = _days_since(issue.updated_at, now)
+    if age is not None and age <= 30:
+        score += 1
+        reasons.append("new")
+    if idle is not None and idle > 365:
+        score -= 2
+        reasons.append("idle")
+
+    if comments:
+        humans = [c for c in comments if not is_bot(c.author, c.author_type)]
+        comment_signals = [text_signals(c.body, c.association) for c in humans]
+        if any(s["maintainer"] for s in comment_signals):
+            score += 2
+            reasons.append("maintainer reply")
+        if not signals["code"] and any(s["code"] for s in comment_signals):
+            score += 1
+            reasons.append("code in thread")
+    elif 0 < issue.comments <= 10:
+        score += 1
+    if issue.comments > 20:
+        score -= 1
+        reasons.append("long thread")
+
+    return score, reasons
+
+
+def _local_issues(repo: str):
+    repo_dir = workspace_root() / repo.replace("/", "_")
+    if not repo_dir.exists():
+        return
+    for issue_dir in repo_dir.glob("issue-*"):
+        issue = load_issue(issue_dir)
+        if issue is None or issue.state not in {None, "open"}:
+            continue
+        yield issue, load_context(issue_dir)
+
+
+def _fetched_issues(repo: str):
+    numbers = set()
+    for issue in iter_issues(repo):
+        save_issue(workspace_dir(repo, issue.number), issue)
+        numbers.add(issue.number)
+        yield issue, None
+    record_open_issues(repo, numbers)
+
+
+def rank(repo: str, top: int = 10, refresh: bool = False) -> list[tuple[int, Issue, list[str]]]:
+    """Score a repo's open issues from the saved ingest (refetched first when stale, incomplete or with refresh) and keep the top ones."""
+    now = datetime.now(timezone.utc)
+    source = _local_issues(repo)
+    stamp = ingested_at(repo)
+    if refresh or stamp is None or time.time() - stamp > FRESH_SECONDS:
+        source = _fetched_issues(repo)
+    try:
+        scored = (
+            (score, issue.number, issue, reasons)
+            for issue, comments in source
+            for score, reasons in [score_issue(issue, comments, now)]
+        )
+        best = heapq.nlargest(top, scored, key=lambda item: (item[0], -item[1]))
+    except GitHubError:
+        return []
+    return [(score, issue, reasons) for score, _, issue, reasons in best]
+
+
+def print_ranking(ranked: list[tuple[int, Issue, list[str]]]):
+    if not ranked:
+        print("No open issues to triage.")
+        return
+    print("\nScore | GitHub # | Title | Signals")
+    print("------+----------+-------+--------")
+    for score, issue, reasons in ranked:
+        print(f"{score:^5} | {issue.number:^8} | {issue.title} | {' '.join(reasons)}")
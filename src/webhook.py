@@ -0,0 +1,145 @@
+import hashlib
+import hmac
+import json
+import os
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import job_queue
+from models import Issue
+from workspace_store import save_issue, workspace_dir
+
+ISSUE_ACTIONS = {"opened", "reopened", "edited"}
+COMMENT_ACTIONS = {"created"}
+# New context for an issue that may already have a plan: plan it again.
+REPLAN_ACTIONS = {("issues", "edited"), ("issue_comment", "created")}
+
+
+def _secret() -> bytes:
+    secret = os.getenv("GITHUB_WEBHOOK_SECRET")
+    if not secret:
+        raise RuntimeError("GITHUB_WEBHOOK_SECRET is missing. Please set it in your environment.")
+    return secret.encode("utf-8")
+
+
+def sign(secret: bytes, body: bytes) -> str:
+    return "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: bytes, body: bytes, header: str | None) -> bool:
+    if not header or not header.startswith("sha256="):
+        return False
+    return hmac.compare_digest(sign(secret, body), header)
+
+
+def handle_delivery(conn, event: str, delivery_id: str, body: bytes) -> tuple[int, str]:
+    """Turn one verified delivery into a queued job; returns an HTTP status and a short message."""
+    if job_queue.seen_delivery(conn, delivery_id):
+        return 200, "duplicate delivery"
+    if event == "ping":
+        return 200, "pong"
+    if event not in {"issues", "issue_comment"}:
+        return 202, f"ignored event {event}"
+
+    try:
+        payload = json.loads(body.decode("utf-8"))
+    except ValueError:
+        return 400, "invalid JSON"
+
+    action = payload.get("action")
+    issue_data = payload.get("issue") or {}
+    repo = (payload.get("repository") or {}).get("full_name")
+    if not repo or not issue_data.get("number"):
+        return 400, "missing repository or issue"
+    if "pull_request" in issue_data:
+        return 202, "ignored pull request"
+    if event == "issues" and action not in ISSUE_ACTIONS:
+        return 202, f"ignored action {action}"
+    if event == "issue_comment" and action not in COMMENT_ACTIONS:
+        return 202, f"ignored action {action}"
+
+    issue = Issue.from_github(issue_data)
+    save_issue(workspace_dir(repo, issue.number), issue)
+    options = {"fresh": True} if (event, action) in REPLAN_ACTIONS else None
+    job_id = job_queue.enqueue_delivery(
+        conn, delivery_id, event, repo, issue.number, "plan", source=f"{event}:{delivery_id}", options=options
+    )
+    if job_id is None:
+        return 200, "duplicate delivery"
+    return 202, f"queued job {job_id}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    secret = b""
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if not verify_signature(self.secret, body, self.headers.get("X-Hub-Signature-256")):
+            self._reply(401, "bad signature")
+            return
+        event = self.headers.get("X-GitHub-Event") or ""
+        delivery_id = self.headers.get("X-GitHub-Delivery") or ""
+        if not delivery_id:
+            self._reply(400, "missing delivery id")
+            return
+        conn = job_queue.connect()
+        try:
+            status, message = handle_delivery(conn, event, delivery_id, body)
+        finally:
+            conn.close()
+        self._reply(status, message)
+
+    def _reply(self, status: int, message: str):
+        data = message.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        print(f"webhook: {format % args}")
+
+
+def serve(run_job, host: str = "127.0.0.1", port: int = 8787):
+    """Listen for GitHub deliveries and plan queued issues in the background."""
+    from workers import worker_loop
+
+    _Handler.secret = _secret()
+    server = ThreadingHTTPServer((host, port), _Handler)
+    stop = threading.Event()
+    worker = threading.Thread(target=worker_loop, args=(run_job, stop), daemon=True)
+    worker.start()
+    print(f"Listening for GitHub webhooks on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+def replay(path: Path, event: str, delivery_id: str | None = None, url: str | None = None) -> tuple[int, str]:
+    """Feed a saved payload through the receiver: POSTed and signed to url, or handled in-process."""
+    body = path.read_bytes()
+    delivery_id = delivery_id or f"replay-{uuid.uuid4()}"
+    if url:
+        import requests
+
+        headers = {
+            "Content-Type": "application/json",
+            "X-GitHub-Event": event,
+            "X-GitHub-Delivery": delivery_id,
+            "X-Hub-Signature-256": sign(_secret(), body),
+        }
+        resp = requests.post(url, data=body, headers=headers, timeout=30)
+        return resp.status_code, resp.text
+    conn = job_queue.connect()
+    try:
+        return handle_delivery(conn, event, delivery_id, body)
+    finally:
+        conn.close()
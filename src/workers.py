@@ -0,0 +1,129 @@
+import threading
+import time
+
+import job_queue
+from workspace_store import read_record, touch_dir, write_record, workspace_dir
+
+# Files a job leaves in its issue directory that other hosts may need.
+RESULT_FILES = ["plan.md", "session.json", "clarifying_questions.md", "devin.patch", "devin_final.md", "pr.txt"]
+RESULT_RECORDS = ["issue", "context"]
+# How long a job whose session outlived its poll waits before it is claimed again.
+RETRY_SECONDS = 60.0
+
+
+def open_backend(url: str | None = None):
+    """Backend for a queue URL: redis://..., sqlite:///path, or None for DEVIN_QUEUE_URL / the local queue."""
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        from redis_queue import RedisBackend
+
+        return RedisBackend(url)
+    if url and url.startswith("sqlite:///"):
+        from pathlib import Path
+
+        return job_queue.SQLiteBackend(Path(url[len("sqlite:///"):]))
+    if url:
+        raise ValueError(f"Unsupported queue URL: {url}")
+    return job_queue.SQLiteBackend()
+
+
+def collect_results(repo: str, issue_number: int) -> dict:
+    """Snapshot the issue's workspace outputs so they can live in the shared store."""
+    base_dir = workspace_dir(repo, issue_number)
+    files = {}
+    for name in RESULT_FILES:
+        path = base_dir / name
+        if path.exists():
+            files[name] = path.read_text(encoding="utf-8")
+    records = {}
+    for name in RESULT_RECORDS:
+        data = read_record(base_dir, name)
+        if data is not None:
+            records[name] = data
+    return {"files": files, "records": records}
+
+
+def hydrate(backend, repo: str, issue_number: int, mode: str):
+    """Fill in a plan made on another host before executing it here."""
+    if mode not in {"execute", "execute-pr"}:
+        return
+    base_dir = workspace_dir(repo, issue_number)
+    if (base_dir / "plan.md").exists():
+        return
+    result = backend.latest_result(repo, issue_number, "plan")
+    if not result:
+        return
+    base_dir.mkdir(parents=True, exist_ok=True)
+    touch_dir(base_dir)
+    for name, text in (result.get("files") or {}).items():
+        if name in RESULT_FILES and not (base_dir / name).exists():
+            (base_dir / name).write_text(text, encoding="utf-8")
+    for name, data in (result.get("records") or {}).items():
+        if name in RESULT_RECORDS and read_record(base_dir, name) is None:
+            write_record(base_dir, name, data)
+
+
+def _heartbeat(backend, job_id: int, owner: str, lease_seconds: float, done: threading.Event):
+    while not done.wait(lease_seconds / 3):
+        if not backend.heartbeat(job_id, owner, lease_seconds):
+            print(f"Lost lease on job {job_id}; another worker may pick it up.")
+            return
+
+
+def worker_loop(
+    run_job,
+    stop: threading.Event,
+    backend=None,
+    name: str = "0",
+    lease_seconds: float = 120.0,
+    idle_wait: float = 1.0,
+    modes: set[str] | None = None,
+):
+    """Claim and run jobs with run_job(repo, issue, mode, options, steps) until stop is set; failures fail the job, SessionPending requeues it."""
+    backend = backend or open_backend()
+    owner = f"{job_queue.current_owner()}/{name}"
+    while not stop.is_set():
+        job = backend.claim(owner, lease_seconds, modes)
+        if job is None:
+            stop.wait(idle_wait)
+            continue
+        job_id = job["id"]
+        print(f"Job {job_id}: {job['mode']} {job['repo']}#{job['issue']}")
+        done = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(backend, job_id, owner, lease_seconds, done), daemon=True)
+        beat.start()
+        error = None
+        try:
+            hydrate(backend, job["repo"], job["issue"], job["mode"])
+            run_job(job["repo"], job["issue"], job["mode"], job["options"], backend.steps(job_id, owner))
+        except job_queue.SessionPending as exc:
+            print(f"Job {job_id}: {exc.session_id} still running; polling again in {RETRY_SECONDS:.0f}s")
+            backend.requeue(job_id, owner, RETRY_SECONDS)
+            continue
+        except Exception as exc:
+            print(f"Job {job_id} failed: {exc}")
+            error = str(exc)
+        finally:
+            done.set()
+            beat.join()
+        backend.complete(job_id, owner, result=collect_results(job["repo"], job["issue"]), error=error)
+
+
+def run_workers(run_job, backend, concurrency: int, stop: threading.Event | None = None, **kwargs):
+    """Run concurrency worker loops in this process and report throughput on exit."""
+    stop = stop or threading.Event()
+    started = time.time()
+    threads = [
+        threading.Thread(target=worker_loop, args=(run_job, stop, backend, str(i)), kwargs=kwargs, daemon=True)
+        for i in range(max(1, concurrency))
+    ]
+    for t in threads:
+        t.start()
+    try:
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=0.5)
+    except KeyboardInterrupt:
+        stop.set()
+        for t in threads:
+            t.join()
+    print(f"Workers stopped after {time.time() - started:.0f}s; queue: {backend.counts()}")
@@ -0,0 +1,307 @@
+import os
+import re
+import shutil
+import sqlite3
+import tarfile
+import time
+from pathlib import Path
+
+from executor import _run_git
+from workspace_store import load_issue, workspace_root
+
+DAY = 86400
+CLOSED_AFTER_DAYS = 7
+# Entries used this recently are never evicted, whatever the budget says.
+GRACE_SECONDS = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    slug TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    touched REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_touched ON entries (touched);
+"""
+
+
+def index_path() -> Path:
+    return workspace_root() / "gc.sqlite3"
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    path = path or index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def parse_size(text: str | None) -> int | None:
+    """'500M', '20G', '1.5T' or plain bytes."""
+    if not text:
+        return None
+    match = re.fullmatch(r"\s*([\d.]+)\s*([kmgt]?)b?\s*", text.lower())
+    if not match:
+        raise ValueError(f"Bad size: {text}")
+    return int(float(match.group(1)) * 1024 ** " kmgt".index(match.group(2) or " "))
+
+
+def _du(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _kind(relpath: str) -> str | None:
+    name = relpath.rsplit("/", 1)[-1]
+    if name == "repo":
+        return "clone"
+    if name.startswith("issue-"):
+        return "issue"
+    return None
+
+
+def _bootstrap(root: Path) -> dict[str, float]:
+    """First run only: list <slug>/<entry> one level deep instead of trusting an empty journal."""
+    found = {}
+    for slug_dir in root.iterdir():
+        if not slug_dir.is_dir() or slug_dir.name.startswith(".") or slug_dir.name == "cassettes":
+            continue
+        for child in slug_dir.iterdir():
+            rel = f"{slug_dir.name}/{child.name}"
+            if child.is_dir() and _kind(rel):
+                found[rel] = child.stat().st_mtime
+    return found
+
+
+def _drain_journal(root: Path) -> dict[str, float]:
+    journal = root / ".gc-journal"
+    if not journal.exists():
+        return {}
+    # Renamed first so writers that append meanwhile start a fresh journal.
+    taken = root / f".gc-journal.{os.getpid()}"
+    try:
+        os.replace(journal, taken)
+    except FileNotFoundError:
+        return {}  # another GC took it between the check and the rename
+    touched: dict[str, float] = {}
+    for line in taken.read_text(encoding="utf-8").splitlines():
+        stamp, _, rel = line.partition("\t")
+        if rel and _kind(rel):
+            try:
+                touched[rel] = max(touched.get(rel, 0.0), float(stamp))
+            except ValueError:
+                continue
+    taken.unlink()
+    return touched
+
+
+def refresh(conn: sqlite3.Connection, root: Path, full: bool = False) -> int:
+    """Re-measure only the entries touched since the last run; returns how many."""
+    touched = _drain_journal(root)
+    if full or not conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone():
+        for rel, stamp in _bootstrap(root).items():
+            touched[rel] = max(touched.get(rel, 0.0), stamp)
+    for rel, stamp in touched.items():
+        path = root / rel
+        if not path.exists():
+            conn.execute("DELETE FROM entries WHERE path = ?", (rel,))
+            continue
+        prior = conn.execute("SELECT touched FROM entries WHERE path = ?", (rel,)).fetchone()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (path, slug, kind, bytes, touched) VALUES (?, ?, ?, ?, ?)",
+            (rel, rel.split("/", 1)[0], _kind(rel), _du(path), max(stamp, prior["touched"] if prior else 0.0)),
+        )
+    return len(touched)
+
+
+def _busy() -> set[tuple[str, int]]:
+    import job_queue
+
+    conn = job_queue.connect()
+    try:
+        rows = conn.execute("SELECT repo, issue FROM jobs WHERE state = 'running'").fetchall()
+    finally:
+        conn.close()
+    return {(row["repo"].replace("/", "_"), row["issue"]) for row in rows}
+
+
+def _worktrees(clone: Path) -> set[Path]:
+    out = _run_git(["-C", str(clone), "worktree", "list", "--porcelain"], capture_output=True).stdout
+    paths = {Path(line[len("worktree "):]).resolve() for line in out.splitlines() if line.startswith("worktree ")}
+    paths.discard(clone.resolve())
+    return paths
+
+
+def archive(root: Path, rel: str, worktree: bool) -> Path:
+    """Bundle an issue's own artifacts into <slug>/archive/issue-N[.stamp].tar.gz; worktrees keep only untracked files and their diff."""
+    slug, name = rel.split("/", 1)
+    src = root / rel
+    dest_dir = root / slug / "archive"
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    dest = dest_dir / f"{name}.tar.gz"
+    if dest.exists():
+        dest = dest_dir / f"{name}.{int(time.time())}.tar.gz"
+    with tarfile.open(dest, "w:gz") as tar:
+        if worktree:
+            others = _run_git(["-C", str(src), "ls-files", "--others"], capture_output=True).stdout.splitlines()
+            for f in others:
+                tar.add(src / f, arcname=f"{name}/{f}")
+            diff = _run_git(["-C", str(src), "diff", "HEAD"], capture_output=True).stdout
+            if diff:
+                (src / ".worktree.diff").write_text(diff, encoding="utf-8")
+                tar.add(src / ".worktree.diff", arcname=f"{name}/worktree.diff")
+        else:
+            tar.add(src, arcname=name)
+    return dest
+
+
+def _remove(root: Path, rel: str, worktree: bool):
+    path = root / rel
+    if worktree:
+        _run_git(["-C", str(root / rel.split("/", 1)[0] / "repo"), "worktree", "remove", "--force", str(path)])
+    if path.exists():
+        shutil.rmtree(path)
+
+
+def collect(
+    budget: int | None = None,
+    max_age_days: float | None = None,
+    dry_run: bool = False,
+    full: bool = False,
+) -> dict:
+    """One GC pass: prune/repack clones, archive by age only if max_age_days is set, then evict LRU to fit budget."""
+    import artifacts
+
+    root = workspace_root()
+    stats = {
+        "measured": 0,
+        "archived": [],
+        "removed_clones": [],
+        "repacked": 0,
+        "cassettes": 0,
+        "revisions": 0,
+        "blobs": 0,
+        "bytes": 0,
+    }
+    if not root.exists():
+        return stats
+    now = time.time()
+    conn = connect()
+    try:
+        stats["measured"] = refresh(conn, root, full)
+        busy = _busy()
+        worktrees: set[Path] = set()
+        for row in conn.execute("SELECT path FROM entries WHERE kind = 'clone'").fetchall():
+            clone = root / row["path"]
+            try:
+                if not dry_run:
+                    _run_git(["-C", str(clone), "worktree", "prune"])
+                    # --auto only repacks once loose objects/packs pass git's thresholds.
+                    _run_git(["-C", str(clone), "gc", "--auto", "--quiet"])
+                    stats["repacked"] += 1
+                worktrees |= _worktrees(clone)
+            except RuntimeError as exc:
+                print(f"Skipping {row['path']}: {exc}")
+
+        def evict(rel: str):
+            worktree = (root / rel).resolve() in worktrees
+            if not dry_run:
+                archive(root, rel, worktree)
+                _remove(root, rel, worktree)
+                conn.execute("DELETE FROM entries WHERE path = ?", (rel,))
+            stats["archived"].append(rel)
+
+        def evictable(row) -> bool:
+            slug, name = row["path"].split("/", 1)
+            number = name.split("-", 1)[1]
+            return now - row["touched"] > GRACE_SECONDS and not (number.isdigit() and (slug, int(number)) in busy)
+
+        issues = conn.execute("SELECT path, touched FROM entries WHERE kind = 'issue' ORDER BY touched").fetchall()
+        kept = []
+        for row in issues:
+            age = now - row["touched"]
+            closed = False
+            if max_age_days is not None and age > CLOSED_AFTER_DAYS * DAY:
+                issue = load_issue(root / row["path"])
+                closed = issue is not None and issue.state == "closed"
+            if max_age_days is not None and evictable(row) and (age > max_age_days * DAY or closed):
+                evict(row["path"])
+            else:
+                kept.append(row)
+
+        cassettes = root / "cassettes"
+        if max_age_days is not None and cassettes.exists():
+            for path in cassettes.iterdir():
+                if now - path.stat().st_mtime > max_age_days * DAY:
+                    if not dry_run:
+                        path.unlink()
+                    stats["cassettes"] += 1
+
+        # Archived issues' revisions go with them (their working plan and patch are in the archive).
+        def prune_store(evicted: list[str]) -> int:
+            if not artifacts.store_path().exists():
+                return 0
+            pruned = artifacts.prune(evicted, dry_run)
+            stats["revisions"] += pruned["revisions"]
+            stats["blobs"] += pruned["blobs"]
+            return pruned["bytes"]
+
+        store_bytes = prune_store(stats["archived"])
+        total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries").fetchone()[0] + store_bytes
+        if budget is not None and total > budget:
+            archived = len(stats["archived"])
+            for row in kept:
+                if total <= budget:
+                    break
+                if evictable(row):
+                    size = conn.execute("SELECT bytes FROM entries WHERE path = ?", (row["path"],)).fetchone()
+                    evict(row["path"])
+                    total -= size["bytes"] if size else 0
+            if len(stats["archived"]) > archived:
+                total += prune_store(stats["archived"][archived:]) - store_bytes
+        if budget is not None and total > budget:
+            # Clones can always be re-fetched, but only once no worktree depends on them.
+            for row in conn.execute("SELECT path, bytes, touched FROM entries WHERE kind = 'clone' ORDER BY touched").fetchall():
+                if total <= budget:
+                    break
+                clone = root / row["path"]
+                if now - row["touched"] <= GRACE_SECONDS or any(p.exists() for p in _worktrees(clone)):
+                    continue
+                if not dry_run:
+                    shutil.rmtree(clone)
+                    conn.execute("DELETE FROM entries WHERE path = ?", (row["path"],))
+                stats["removed_clones"].append(row["path"])
+                total -= row["bytes"]
+        stats["bytes"] = total
+    finally:
+        conn.close()
+    return stats
+
+
+def print_stats(stats: dict, budget: int | None, dry_run: bool = False):
+    verb = "Would archive" if dry_run else "Archived"
+    print(f"Re-measured {stats['measured']} entries; {stats['repacked']} clones pruned/repacked.")
+    print(f"{verb} {len(stats['archived'])} issue directories.")
+    for rel in stats["archived"]:
+        print(f"  {rel}")
+    if stats["removed_clones"]:
+        print(f"{'Would remove' if dry_run else 'Removed'} clones: {', '.join(stats['removed_clones'])}")
+    if stats["revisions"] or stats["blobs"]:
+        verb = "Would drop" if dry_run else "Dropped"
+        print(f"{verb} {stats['revisions']} plan/patch revisions and {stats['blobs']} unreferenced blobs.")
+    if stats["cassettes"]:
+        print(f"{'Would delete' if dry_run else 'Deleted'} {stats['cassettes']} old cassettes.")
+    limit = f" / budget {budget / 1024**2:.0f} MiB" if budget else ""
+    print(f"Workspace: {stats['bytes'] / 1024**2:.1f} MiB{limit}")
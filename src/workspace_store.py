@@ -0,0 +1,202 @@
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+
+from models import Comment, Issue
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+CONTEXT_SCHEMA = 2
+
+_SUFFIXES = {
+    "none": ".json",
+    "gzip": ".json.gz",
+    "zstd": ".json.zst",
+}
+
+
+def workspace_root() -> Path:
+    """.devin-workspace next to src/, or DEVIN_WORKSPACE when set (replays, benchmarks, tests)."""
+    override = os.getenv("DEVIN_WORKSPACE")
+    if override:
+        return Path(override)
+    return Path(__file__).resolve().parent.parent / ".devin-workspace"
+
+
+def workspace_dir(repo: str, issue_number: int | None) -> Path:
+    repo_slug = repo.replace("/", "_")
+    issue_part = f"issue-{issue_number}" if issue_number is not None else "issue-unknown"
+    return workspace_root() / repo_slug / issue_part
+
+
+def touch(relpath: str):
+    """Append a use of a workspace entry to the journal behind workspace_gc's LRU index."""
+    root = workspace_root()
+    try:
+        root.mkdir(parents=True, exist_ok=True)
+        with open(root / ".gc-journal", "a", encoding="utf-8") as fh:
+            fh.write(f"{time.time():.0f}\t{relpath}\n")
+    except OSError:
+        pass
+
+
+def touch_dir(base_dir: Path):
+    """touch() for a directory from workspace_dir(); call it where the entry is written or worked on, not read."""
+    try:
+        touch(base_dir.relative_to(workspace_root()).as_posix())
+    except ValueError:
+        pass
+
+
+def resolve_codec(name: str | None) -> str:
+    """A codec this process can write: unknown names become none, zstd without the package becomes gzip."""
+    name = (name or "none").strip().lower()
+    if name == "zstd" and zstandard is None:
+        return "gzip"
+    if name not in _SUFFIXES:
+        return "none"
+    return name
+
+
+def _codec() -> str:
+    """Codec for new records, from DEVIN_WORKSPACE_COMPRESSION (none, gzip, zstd)."""
+    return resolve_codec(os.getenv("DEVIN_WORKSPACE_COMPRESSION"))
+
+
+def _encode(data: dict, codec: str) -> bytes:
+    if codec == "none":
+        return json.dumps(data, indent=2).encode("utf-8")
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    if codec == "gzip":
+        return gzip.compress(raw, mtime=0)
+    return zstandard.ZstdCompressor().compress(raw)
+
+
+def _decode(path: Path) -> dict:
+    raw = path.read_bytes()
+    if path.name.endswith(".gz"):
+        raw = gzip.decompress(raw)
+    elif path.name.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed but the zstandard package is not installed")
+        raw = zstandard.ZstdDecompressor().decompress(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def record_path(base_dir: Path, name: str) -> Path | None:
+    """Return the existing on-disk file for a record, whatever its codec."""
+    for suffix in _SUFFIXES.values():
+        path = base_dir / f"{name}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def has_record(base_dir: Path, name: str) -> bool:
+    return record_path(base_dir, name) is not None
+
+
+def read_record(base_dir: Path, name: str) -> dict | None:
+    path = record_path(base_dir, name)
+    if path is None:
+        return None
+    return _decode(path)
+
+
+def write_record(base_dir: Path, name: str, data: dict, codec: str | None = None) -> Path:
+    codec = resolve_codec(codec) if codec else _codec()
+    if not base_dir.exists():
+        # New entries must reach the GC index; rewrites (ingest, triage refresh) are not use.
+        base_dir.mkdir(parents=True, exist_ok=True)
+        touch_dir(base_dir)
+    path = base_dir / f"{name}{_SUFFIXES[codec]}"
+    path.write_bytes(_encode(data, codec))
+    for suffix in _SUFFIXES.values():
+        other = base_dir / f"{name}{suffix}"
+        if other != path and other.exists():
+            other.unlink()
+    return path
+
+
+def save_issue(base_dir: Path, issue: Issue, codec: str | None = None) -> Path:
+    return write_record(base_dir, "issue", issue.to_dict(), codec=codec)
+
+
+def load_issue(base_dir: Path) -> Issue | None:
+    data = read_record(base_dir, "issue")
+    if data is None:
+        return None
+    return Issue.from_dict(data)
+
+
+def save_context(base_dir: Path, comments: list[Comment] | None, codec: str | None = None) -> Path:
+    data = {
+        "schema": CONTEXT_SCHEMA,
+        "comments": [c.to_dict() for c in comments or []],
+    }
+    return write_record(base_dir, "context", data, codec=codec)
+
+
+def load_context(base_dir: Path) -> list[Comment] | None:
+    data = read_record(base_dir, "context")
+    if data is None:
+        return None
+    return [Comment.from_dict(c) for c in data.get("comments") or []]
+
+
+def record_open_issues(repo: str, numbers: set[int]):
+    """After a complete fetch of a repo's open issues: mark saved issues missing from it closed, then stamp the time."""
+    repo_dir = workspace_root() / repo.replace("/", "_")
+    for issue_dir in repo_dir.glob("issue-*"):
+        issue = load_issue(issue_dir)
+        if issue is not None and issue.state in {None, "open"} and issue.number not in numbers:
+            issue.state = "closed"
+            save_issue(issue_dir, issue)
+    repo_dir.mkdir(parents=True, exist_ok=True)
+    (repo_dir / ".ingested").write_text(f"{time.time():.0f}\n", encoding="utf-8")
+
+
+def ingested_at(repo: str) -> float | None:
+    """When record_open_issues() last ran for repo, if ever."""
+    try:
+        return float((workspace_root() / repo.replace("/", "_") / ".ingested").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def migrate_workspace(root: Path, codec: str | None = None) -> dict:
+    """Rewrite every issue/context record under root in the projected schema; returns byte and load-time totals before and after."""
+    stats = {"issues": 0, "bytes_before": 0, "bytes_after": 0, "load_before": 0.0, "load_after": 0.0}
+    if not root.exists():
+        return stats
+    for repo_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        for issue_dir in sorted(repo_dir.glob("issue-*")):
+            if not issue_dir.is_dir():
+                continue
+            touched = False
+            for name, load, save in (
+                ("issue", load_issue, save_issue),
+                ("context", load_context, save_context),
+            ):
+                old_path = record_path(issue_dir, name)
+                if old_path is None:
+                    continue
+                stats["bytes_before"] += old_path.stat().st_size
+                start = time.perf_counter()
+                value = load(issue_dir)
+                stats["load_before"] += time.perf_counter() - start
+
+                new_path = save(issue_dir, value, codec=codec)
+                stats["bytes_after"] += new_path.stat().st_size
+                start = time.perf_counter()
+                load(issue_dir)
+                stats["load_after"] += time.perf_counter() - start
+                touched = True
+            if touched:
+                stats["issues"] += 1
+    return stats
@@ -0,0 +1,58 @@
+import time
+
+import artifacts
+import pytest
+
+PATCH = "--- a/x.py\n+++ b/x.py\n@@ -1 +1 @@\n-a\n+b\n"
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    return tmp_path
+
+
+def _blobs(root):
+    return sorted(p.parent.name + p.name for p in (root / "objects").glob("*/*"))
+
+
+def test_put_indexes_patch_diffstat(workspace):
+    rev = artifacts.put("o/r", 1, "patch", PATCH, "execute")
+    assert artifacts.files("o/r", 1, rev) == [("x.py", 1, 1)]
+
+
+def test_unchanged_content_adds_no_revision_and_rollback_adds_one(workspace):
+    assert artifacts.put("o/r", 1, "plan", "first", "plan") == 1
+    assert artifacts.put("o/r", 1, "plan", "first", "plan") == 1
+    assert artifacts.put("o/r", 1, "plan", "second", "revise") == 2
+    assert artifacts.compare("o/r", 1, "plan", 1, 2).endswith("+second")
+    assert artifacts.rollback("o/r", 1, "plan", 1) == 3
+    assert (workspace / "o_r" / "issue-1" / "plan.md").read_text() == "first"
+    assert [r["source"] for r in artifacts.history("o/r", 1, "plan")] == ["plan", "revise", "rollback:1"]
+
+
+def test_prune_evicted_issue_keeps_shared_blobs(workspace):
+    artifacts.put("o/r", 1, "plan", "shared plan", "plan")
+    artifacts.put("o/r", 1, "plan", "only one", "plan")
+    artifacts.put("o/r", 2, "plan", "shared plan", "plan")
+    assert len(_blobs(workspace)) == 2
+
+    assert artifacts.prune(["o_r/issue-1"], dry_run=True)["blobs"] == 1
+    assert len(_blobs(workspace)) == 2
+
+    result = artifacts.prune(["o_r/issue-1"])
+    assert (result["revisions"], result["blobs"]) == (2, 1)
+    assert artifacts.history("o/r", 1, "plan") == []
+    assert artifacts.get("o/r", 2, "plan", 1) == "shared plan"
+    assert len(_blobs(workspace)) == 1
+
+
+def test_prune_keeps_every_revision_of_kept_issues(workspace, monkeypatch):
+    artifacts.put("o/r", 1, "patch", PATCH, "execute")
+    artifacts.put("o/r", 1, "patch", PATCH.replace("+b", "+c"), "execute")
+    later = time.time() + 365 * 86400
+    monkeypatch.setattr(artifacts.time, "time", lambda: later)
+    result = artifacts.prune([])
+    assert (result["revisions"], result["blobs"]) == (0, 0)
+    assert [item["rev"] for item in artifacts.history("o/r", 1, "patch")] == [1, 2]
+    assert result["bytes"] > 0
@@ -0,0 +1,75 @@
+import gzip
+import json
+import time
+
+import cassette
+import devin_client
+import http_client
+import poll_schedule
+import workspace_store
+from models import Issue
+
+
+def _cassette(path, entries):
+    with gzip.open(path, "wt", encoding="utf-8") as fh:
+        for entry in entries:
+            fh.write(json.dumps(entry) + "\n")
+
+
+def _entry(method, url, content, t=0.0):
+    return {"t": t, "ms": 1.0, "method": method, "url": url, "body": None, "status": 200, "headers": {}, "content": content}
+
+
+def _replay(monkeypatch, tmp_path, entries):
+    monkeypatch.setattr(devin_client, "time", time)
+    monkeypatch.delenv("DEVIN_API_KEY", raising=False)
+    monkeypatch.setattr(poll_schedule, "record_enabled", True)
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path / "real"))
+    monkeypatch.setattr(http_client, "_adapter_factory", http_client._adapter_factory)
+    monkeypatch.setattr(http_client, "_session", None)
+    path = tmp_path / "run.jsonl.gz"
+    _cassette(path, entries)
+    return cassette.replay(path)
+
+
+def test_replay_uses_a_scratch_workspace_and_skips_poll_history(monkeypatch, tmp_path):
+    scratch = _replay(monkeypatch, tmp_path, [])
+    assert workspace_store.workspace_root() == scratch
+    assert scratch != tmp_path / "real"
+    assert poll_schedule.record_enabled is False
+    poll_schedule.record("plan", "o/r", 12.0, "finished")
+    assert not (scratch / "poll_history.sqlite3").exists()
+    assert not (tmp_path / "real").exists()
+
+
+def test_replay_repeats_the_last_get_response(monkeypatch, tmp_path):
+    url = "https://api.devin.ai/v1/session/s1"
+    _replay(monkeypatch, tmp_path, [_entry("GET", url, '{"status": "running"}'), _entry("GET", url, '{"status": "done"}')])
+    adapter = cassette.ReplayAdapter()
+    request = cassette.requests.Request("GET", url).prepare()
+    assert adapter.send(request).json()["status"] == "running"
+    assert adapter.send(request).json()["status"] == "done"
+    assert adapter.send(request).json()["status"] == "done"
+
+
+def test_replay_starts_from_the_recorded_workspace_inputs(monkeypatch, tmp_path):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path / "recorded"))
+    base_dir = workspace_store.workspace_dir("o/r", 7)
+    workspace_store.save_issue(base_dir, Issue(number=7, title="Bug", body="", state="open", url=""))
+    (base_dir / "plan.md").write_text("1. Fix it.\n", encoding="utf-8")
+    inputs = cassette._inputs("o/r", 7)
+
+    scratch = _replay(monkeypatch, tmp_path, [{"inputs": inputs}])
+    seeded = workspace_store.workspace_dir("o/r", 7)
+    assert seeded.is_relative_to(scratch)
+    assert (seeded / "plan.md").read_text(encoding="utf-8") == "1. Fix it.\n"
+    assert workspace_store.load_issue(seeded).title == "Bug"
+
+
+def test_replay_needs_no_api_key_and_only_fakes_the_clients_clock(monkeypatch, tmp_path):
+    _replay(monkeypatch, tmp_path, [])
+    assert devin_client._get_devin_headers()["Authorization"] == "Bearer replay"
+    before = time.time()
+    devin_client.time.sleep(3600)
+    assert devin_client.time.time() >= before + 3600
+    assert time.time() < before + 60
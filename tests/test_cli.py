@@ -0,0 +1,46 @@
+import cli
+import job_queue
+import workspace_store
+
+
+def _finished_job(mode, **saved):
+    steps = job_queue.resume_or_start("o/r", 1, mode)
+    if saved:
+        steps.record("output_saved", **saved)
+    steps.finish()
+    conn = job_queue.connect()
+    try:
+        return job_queue.get_job(conn, steps.job_id)
+    finally:
+        conn.close()
+
+
+def test_saved_execution_ignores_stale_workspace_files(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    base_dir = workspace_store.workspace_dir("o/r", 1)
+    base_dir.mkdir(parents=True)
+    (base_dir / "devin.patch").write_text("stale", encoding="utf-8")
+    (base_dir / "pr.txt").write_text("https://github.com/o/r/pull/1", encoding="utf-8")
+
+    cli._show_saved_execution(_finished_job("execute", path=None))
+    assert capsys.readouterr().out == "Execution finished without a patch.\n"
+
+    cli._show_saved_execution(_finished_job("execute-pr", pr_url=None, reason="tests failed"))
+    assert capsys.readouterr().out == "PR creation failed.\nReason: tests failed\n"
+
+    cli._show_saved_execution(_finished_job("execute-pr", pr_url="https://github.com/o/r/pull/2"))
+    assert capsys.readouterr().out == "PR URL: https://github.com/o/r/pull/2\n"
+
+
+def test_attached_run_adopts_the_holders_result(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    holder = _finished_job("execute", path="/w/devin.patch")
+    steps = job_queue.resume_or_start("o/r", 1, "execute")
+    assert steps.job_id != holder["id"]
+    cli._adopt_result(steps, holder, "output_saved")
+    assert steps.get("output_saved") == {"path": "/w/devin.patch"}
+    conn = job_queue.connect()
+    try:
+        assert job_queue.get_job(conn, steps.job_id)["state"] == "done"
+    finally:
+        conn.close()
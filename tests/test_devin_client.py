@@ -0,0 +1,143 @@
+import devin_client
+import poll_schedule
+import pytest
+
+
+class _Response:
+    status_code = 200
+    text = ""
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class _Session:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+
+    def get(self, url, headers=None, timeout=None):
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        return _Response({"status_enum": status})
+
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    monkeypatch.setenv("DEVIN_API_KEY", "k")
+    now = [1000.0]
+    monkeypatch.setattr(devin_client.time, "time", lambda: now[0])
+    monkeypatch.setattr(devin_client.time, "sleep", lambda s: now.__setitem__(0, now[0] + s))
+    return now
+
+
+def _poll(monkeypatch, statuses, **kwargs):
+    session = _Session(statuses)
+    monkeypatch.setattr(devin_client, "get_session", lambda: session)
+    return devin_client.poll_devin_session("s-1", kind="plan", repo="o/r", **kwargs)
+
+
+def test_duration_counts_from_session_creation(clock, monkeypatch):
+    status, _ = _poll(monkeypatch, ["working", "finished"], started_at=900.0)
+    assert status == "finished"
+    assert poll_schedule.durations("plan", "o/r") == [pytest.approx(101.0)]
+
+
+def test_resumed_polls_are_not_recorded(clock, monkeypatch):
+    _poll(monkeypatch, ["working", "finished"], started_at=900.0, history=False)
+    assert poll_schedule.durations("plan", "o/r") == []
+
+
+def test_history_never_shrinks_the_callers_wait():
+    schedule = poll_schedule.Schedule([10.0] * 20, max_wait=3600)
+    assert schedule.timeout == 3600
+    assert poll_schedule.Schedule([2000.0] * 20, max_wait=3600).timeout == 4000
+
+
+def _segments():
+    import governor
+
+    conn = governor.connect()
+    try:
+        return [tuple(row) for row in conn.execute("SELECT session_id, repo, kind, ended IS NULL FROM segments")]
+    finally:
+        conn.close()
+
+
+def test_async_create_waits_at_the_callers_priority(tmp_path, monkeypatch):
+    import asyncio
+
+    import governor
+
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    monkeypatch.setattr(devin_client, "create_devin_session", lambda prompt: "s-9")
+    seen = []
+    real = governor._attempt
+    monkeypatch.setattr(governor, "_attempt", lambda conn, holder, repo, kind, prio, caps: seen.append(prio) or real(conn, holder, repo, kind, prio, caps))
+    with governor.priority(7):
+        assert asyncio.run(devin_client.create_devin_session_async("p", "o/r", "plan")) == "s-9"
+    assert seen == [7]
+    assert _segments() == [("s-9", "o/r", "plan", 1)]
+
+
+def test_async_sessions_past_the_concurrency_cap_run_in_sequence(tmp_path, monkeypatch):
+    import asyncio
+    import itertools
+
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    monkeypatch.setenv("DEVIN_API_KEY", "k")
+    monkeypatch.setenv("DEVIN_MAX_CONCURRENT_SESSIONS", "2")
+    ids = itertools.count()
+    monkeypatch.setattr(devin_client, "create_devin_session", lambda prompt: f"s-{next(ids)}")
+    monkeypatch.setattr(devin_client._Poll, "interval", lambda self: 0)
+
+    async def run():
+        for _ in range(5):
+            session = _Session(["working", "finished"])
+            monkeypatch.setattr(devin_client, "get_session", lambda: session)
+            session_id = await asyncio.wait_for(devin_client.create_devin_session_async("p", "o/r", "plan"), 5)
+            status, _ = await devin_client.poll_devin_session_async(session_id, kind="plan", repo="o/r", history=False)
+            assert status == "finished"
+
+    asyncio.run(run())
+    assert [row[3] for row in _segments()] == [0] * 5
+
+
+def test_async_create_gives_the_slot_back_on_failure(tmp_path, monkeypatch):
+    import asyncio
+
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+
+    def fail(prompt):
+        raise devin_client.DevinError("boom")
+
+    monkeypatch.setattr(devin_client, "create_devin_session", fail)
+    with pytest.raises(devin_client.DevinError):
+        asyncio.run(devin_client.create_devin_session_async("p", "o/r", "plan"))
+    assert _segments() == []
+
+
+def test_a_cancelled_budget_wait_leaves_the_line(tmp_path, monkeypatch):
+    import asyncio
+
+    import governor
+
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    monkeypatch.setenv("DEVIN_MAX_CONCURRENT_SESSIONS", "1")
+    governor.acquire("o/r", "plan")
+
+    async def run():
+        task = asyncio.ensure_future(governor.acquire_async("o/r", "plan", wait=0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    conn = governor.connect()
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM waiting").fetchone()[0] == 0
+    finally:
+        conn.close()
@@ -0,0 +1,72 @@
+import github_client
+
+
+class _Response:
+    def __init__(self, status_code, data=None, next_url=None):
+        self.status_code = status_code
+        self._data = data
+        self.text = ""
+        self.links = {"next": {"url": next_url}} if next_url else {}
+
+    def json(self):
+        return self._data
+
+
+class _Session:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+
+def test_find_issue_fetches_the_issue_directly(monkeypatch):
+    session = _Session(_Response(200, {"number": 7, "title": "Closed bug", "state": "closed"}))
+    monkeypatch.setattr(github_client, "get_session", lambda: session)
+    issue = github_client.find_issue("o/r", 7)
+    assert issue.number == 7 and issue.state == "closed"
+    assert session.urls == ["https://api.github.com/repos/o/r/issues/7"]
+
+
+def test_find_issue_skips_pull_requests_and_missing(monkeypatch):
+    monkeypatch.setattr(github_client, "get_session", lambda: _Session(_Response(200, {"number": 8, "pull_request": {}})))
+    assert github_client.find_issue("o/r", 8) is None
+    monkeypatch.setattr(github_client, "get_session", lambda: _Session(_Response(404)))
+    assert github_client.find_issue("o/r", 9) is None
+
+
+def test_iter_issues_follows_the_link_header_and_skips_pull_requests(monkeypatch):
+    session = _Session(
+        _Response(200, [{"number": 1}, {"number": 2, "pull_request": {}}], next_url="https://api.github.com/p2"),
+        _Response(200, [{"number": 3}]),
+    )
+    monkeypatch.setattr(github_client, "get_session", lambda: session)
+    assert [i.number for i in github_client.iter_issues("o/r")] == [1, 3]
+    assert session.urls == ["https://api.github.com/repos/o/r/issues", "https://api.github.com/p2"]
+
+
+def test_iter_issues_stops_at_the_limit_without_fetching_more(monkeypatch):
+    session = _Session(_Response(200, [{"number": 1}, {"number": 2}], next_url="https://api.github.com/p2"))
+    monkeypatch.setattr(github_client, "get_session", lambda: session)
+    assert [i.number for i in github_client.iter_issues("o/r", limit=2)] == [1, 2]
+    assert len(session.urls) == 1
+
+
+def test_fetch_issue_comments_returns_none_on_an_error_page(monkeypatch):
+    monkeypatch.setattr(github_client, "get_session", lambda: _Session(_Response(500)))
+    assert github_client.fetch_issue_comments("o/r", 1) is None
+
+
+def test_async_comments_follow_the_link_header(monkeypatch):
+    import asyncio
+
+    session = _Session(
+        _Response(200, [{"id": 1, "body": "a"}], next_url="https://api.github.com/p2"),
+        _Response(200, [{"id": 2, "body": "b"}]),
+    )
+    monkeypatch.setattr(github_client, "get_session", lambda: session)
+    comments = asyncio.run(github_client.fetch_issue_comments_async("o/r", 4))
+    assert [c.id for c in comments] == [1, 2]
+    assert session.urls[0] == "https://api.github.com/repos/o/r/issues/4/comments"
@@ -0,0 +1,63 @@
+import socket
+import subprocess
+import sys
+
+import governor
+import pytest
+from job_queue import current_owner
+
+CAPS = {"concurrent": 1, "per_hour": 0, "minutes_per_day": 0, "minutes_per_repo_day": 0}
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    conn = governor.connect()
+    yield conn
+    conn.close()
+
+
+def _holder(name):
+    return f"{current_owner()}/{name}"
+
+
+def test_concurrency_cap_holds_the_next_session_until_release(conn):
+    first, _ = governor._attempt(conn, _holder("a"), "o/r", "plan", 0, CAPS)
+    governor.bind(first, "devin-a")
+    segment, reason = governor._attempt(conn, _holder("b"), "o/r", "plan", 0, CAPS)
+    assert segment is None and reason == "1/1 sessions running"
+    governor.release("devin-a")
+    segment, reason = governor._attempt(conn, _holder("b"), "o/r", "plan", 0, CAPS)
+    assert segment is not None and reason is None
+
+
+def test_higher_priority_waiters_go_first(conn):
+    governor.bind(governor._attempt(conn, _holder("running"), "o/r", "plan", 0, CAPS)[0], "devin-1")
+    governor._attempt(conn, _holder("low"), "o/r", "plan", 0, CAPS)
+    governor._attempt(conn, _holder("high"), "o/r", "plan", governor.INTERACTIVE_PRIORITY, CAPS)
+    governor.release("devin-1")
+    assert governor._attempt(conn, _holder("low"), "o/r", "plan", 0, CAPS) == (None, "higher-priority work is queued ahead")
+    assert governor._attempt(conn, _holder("high"), "o/r", "plan", governor.INTERACTIVE_PRIORITY, CAPS)[0] is not None
+
+
+def test_a_repo_out_of_minutes_does_not_hold_up_others(conn):
+    caps = dict(CAPS, concurrent=0, minutes_per_repo_day=30)
+    governor.resume("o/busy", "plan", "devin-old")
+    conn.execute("UPDATE segments SET started = started - 3600")
+    assert governor._attempt(conn, _holder("busy"), "o/busy", "plan", 100, caps)[0] is None
+    assert governor._attempt(conn, _holder("other"), "o/other", "plan", 0, caps)[0] is not None
+
+
+def test_segments_and_waiters_of_dead_processes_are_swept(conn):
+    pid = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True).stdout.strip()
+    dead = f"{socket.gethostname()}:{pid}/0"
+    conn.execute("INSERT INTO segments (repo, kind, holder, created, started) VALUES ('o/r', 'plan', ?, 1, 0)", (dead,))
+    conn.execute("INSERT INTO waiting (holder, repo, kind, priority, since) VALUES (?, 'o/r', 'plan', 999, 0)", (dead,))
+    assert governor._attempt(conn, _holder("a"), "o/r", "plan", 0, CAPS)[0] is not None
+    assert governor.usage(conn)["waiting"] == 0
+
+
+def test_priority_is_scoped_to_the_block():
+    with governor.priority(5):
+        assert governor.current_priority() == 5
+    assert governor.current_priority() == governor.INTERACTIVE_PRIORITY
@@ -0,0 +1,11 @@
+import import_budget
+import pytest
+
+
+@pytest.mark.parametrize("name", ["help", "bad-args"])
+def test_cli_startup_skips_forbidden_modules(name, tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    _, case_argv, stdin, _, forbidden = next(case for case in import_budget.CASES if case[0] == name)
+    top, loaded = import_budget._run([str(import_budget.CLI), *case_argv], stdin)
+    assert top
+    assert not forbidden & loaded
@@ -0,0 +1,59 @@
+import ingest
+import workspace_store
+from models import Issue
+
+
+def _hit(repo, number):
+    return repo, Issue(number=number, title=f"#{number}", state="open")
+
+
+def test_search_saves_every_page_and_closes_issues_no_longer_open(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    monkeypatch.setattr(ingest, "PER_PAGE", 2)
+    stale = workspace_store.workspace_dir("o/b", 9)
+    workspace_store.save_issue(stale, Issue(number=9, state="open"))
+    pages = {1: [_hit("o/a", 1), _hit("o/a", 2)], 2: [_hit("o/a", 3)]}
+    requests = []
+
+    def search(query, page):
+        requests.append((query, page))
+        return 3, pages[page]
+
+    monkeypatch.setattr(ingest, "search_issues_page", search)
+    summary = ingest.ingest(repos=["o/a", "o/b"], strategy="auto")
+
+    assert summary["strategy"] == "search"
+    assert summary["repos"] == {"o/a": 3}
+    assert sorted(p for _, p in requests) == [1, 2]
+    assert workspace_store.load_issue(workspace_store.workspace_dir("o/a", 3)).number == 3
+    assert workspace_store.load_issue(stale).state == "closed"
+    assert workspace_store.ingested_at("o/b") is not None
+
+
+def test_auto_lists_repos_when_search_exceeds_the_cap(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    monkeypatch.setattr(ingest, "search_issues_page", lambda q, p: (ingest.SEARCH_RESULT_CAP + 1, []))
+    monkeypatch.setattr(
+        ingest, "iter_org_repos",
+        lambda org: iter([{"full_name": "o/a", "open_issues_count": 1}, {"full_name": "o/empty", "open_issues_count": 0}]),
+    )
+    listed = []
+
+    def iter_issues(repo):
+        listed.append(repo)
+        return iter([Issue(number=5, state="open")])
+
+    monkeypatch.setattr(ingest, "iter_issues", iter_issues)
+    summary = ingest.ingest(org="o")
+
+    assert summary["strategy"] == "concurrent"
+    assert listed == ["o/a"]
+    assert summary["repos"] == {"o/a": 1}
+
+
+def test_long_repo_lists_are_split_into_several_queries():
+    repos = [f"org/repository-{i:03d}" for i in range(40)]
+    queries = ingest._repo_queries(repos)
+    assert len(queries) > 1
+    assert all(len(q) <= ingest.SEARCH_QUERY_MAX for q in queries)
+    assert sum(q.count("repo:") for q in queries) == 40
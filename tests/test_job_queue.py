@@ -0,0 +1,107 @@
+import socket
+import subprocess
+import sys
+
+import job_queue
+
+
+def test_saved_output_only_from_finished_runs(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    running = job_queue.resume_or_start("o/r", 1, "execute")
+    running.record("output_saved", path="/tmp/first.patch")
+    conn = job_queue.connect()
+    try:
+        assert job_queue.saved_output(conn, "o/r", 1, "execute") is None
+        running.finish()
+        saved = job_queue.saved_output(conn, "o/r", 1, "execute")
+        assert saved["data"] == {"path": "/tmp/first.patch"}
+        assert job_queue.saved_output(conn, "o/r", 1, "plan") is None
+    finally:
+        conn.close()
+
+
+def _dead_owner():
+    proc = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    return f"{socket.gethostname()}:{proc.stdout.strip()}"
+
+
+def test_waiter_takes_over_the_session_of_a_holder_that_died(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    holder = job_queue.resume_or_start("o/r", 1, "plan")
+    holder.record("plan_session", session_id="devin-1")
+    # The waiter resolved its Steps while the holder was still alive, then blocked on the flight.
+    waiter = job_queue.resume_or_start("o/r", 1, "plan")
+    waiter.record("fetched")
+    assert waiter.job_id != holder.job_id
+    conn = job_queue.connect()
+    try:
+        conn.execute("UPDATE jobs SET owner = ? WHERE id = ?", (_dead_owner(), holder.job_id))
+    finally:
+        conn.close()
+
+    assert waiter.take_over() == holder.job_id
+    assert waiter.get("plan_session") == {"session_id": "devin-1"}
+    assert waiter.get("fetched") == {}
+    conn = job_queue.connect()
+    try:
+        old = job_queue.get_job(conn, holder.job_id)
+        assert (old["state"], old["error"]) == ("failed", f"taken over by job {waiter.job_id}")
+        assert job_queue.get_job(conn, waiter.job_id)["session_id"] == "devin-1"
+    finally:
+        conn.close()
+    assert waiter.take_over() is None
+
+
+def test_take_over_leaves_a_live_holder_alone(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    holder = job_queue.resume_or_start("o/r", 1, "plan")
+    holder.record("plan_session", session_id="devin-1")
+    waiter = job_queue.resume_or_start("o/r", 1, "plan")
+    assert waiter.take_over() is None
+    assert waiter.get("plan_session") is None
+
+
+def test_enqueue_dedupes_only_identical_options(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    conn = job_queue.connect()
+    try:
+        first = job_queue.enqueue(conn, "o/r", 1, "plan", options={"fresh": False})
+        assert job_queue.enqueue(conn, "o/r", 1, "plan", options={"fresh": False}) == first
+        fresh = job_queue.enqueue(conn, "o/r", 1, "plan", options={"fresh": True})
+        assert fresh != first
+        assert job_queue.enqueue(conn, "o/r", 1, "plan", options={"fresh": True}) == fresh
+    finally:
+        conn.close()
+
+
+def test_finish_is_fenced_by_owner(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    backend = job_queue.SQLiteBackend()
+    job_id = backend.enqueue("o/r", 1, "plan")
+    assert backend.claim("host:1/0", 60)["id"] == job_id
+    assert backend.requeue(job_id, "host:1/0", 0)
+    assert backend.claim("host:2/0", 60)["id"] == job_id
+    assert not backend.steps(job_id, "host:1/0").finish()
+    conn = job_queue.connect()
+    try:
+        assert job_queue.get_job(conn, job_id)["state"] == "running"
+    finally:
+        conn.close()
+    assert backend.steps(job_id, "host:2/0").finish()
+
+
+def test_a_rerun_resumes_the_steps_of_a_crashed_direct_run(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    crashed = job_queue.resume_or_start("o/r", 4, "plan")
+    crashed.record("plan_session", session_id="devin-4")
+    conn = job_queue.connect()
+    try:
+        conn.execute("UPDATE jobs SET owner = ? WHERE id = ?", (_dead_owner(), crashed.job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+    rerun = job_queue.resume_or_start("o/r", 4, "plan")
+    assert rerun.job_id == crashed.job_id
+    assert rerun.get("plan_session") == {"session_id": "devin-4"}
+    assert job_queue.resume_or_start("o/r", 4, "execute").job_id != crashed.job_id
@@ -0,0 +1,31 @@
+import threading
+
+import locks
+
+
+def test_second_flight_waits_and_sees_the_holders_note(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    holder = locks.single_flight("o/r", 1, "plan")
+    holder.note(session_id="devin-1")
+    seen, acquired = [], threading.Event()
+
+    def wait():
+        with locks.single_flight("o/r", 1, "plan", on_wait=seen.append) as flight:
+            assert flight.waited
+            acquired.set()
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    assert not acquired.wait(0.2)
+    holder.release()
+    waiter.join(5)
+    assert acquired.is_set()
+    assert len(seen) == 1 and seen[0]["session_id"] == "devin-1"
+
+
+def test_flights_for_other_work_do_not_wait(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    with locks.single_flight("o/r", 1, "plan"):
+        with locks.single_flight("o/r", 1, "execute") as other:
+            assert not other.waited
+            assert "session_id" not in other.owner()
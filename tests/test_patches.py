@@ -0,0 +1,114 @@
+import patches
+
+TWO_FILES = """\
+--- a/x.py
++++ b/x.py
+@@ -1,3 +1,3 @@
+ keep
+-old
++new
+ keep
+--- a/y.py
++++ b/y.py
+@@ -10,2 +10,3 @@
+ keep
++added
+ keep
+"""
+
+CONTENT_LOOKS_LIKE_HEADERS = """\
+diff --git a/notes.md b/notes.md
+--- a/notes.md
++++ b/notes.md
+@@ -4,2 +4,3 @@
+--- removed rule
++++ add
++--- also added
+ tail
+"""
+
+
+def test_parse_diff_splits_files_without_diff_git_lines():
+    files = patches.parse_diff(TWO_FILES)
+    assert [(fp.path, [(h.start, h.length) for h in fp.hunks]) for fp in files] == [
+        ("x.py", [(1, 3)]),
+        ("y.py", [(10, 2)]),
+    ]
+
+
+def test_parse_diff_ignores_header_like_content_lines():
+    files = patches.parse_diff(CONTENT_LOOKS_LIKE_HEADERS)
+    assert [fp.path for fp in files] == ["notes.md"]
+    assert [(h.start, h.length) for h in files[0].hunks] == [(4, 2)]
+
+
+def test_parse_diff_new_and_deleted_files():
+    text = "--- /dev/null\n+++ b/new.py\n@@ -0,0 +1 @@\n+x\n--- a/gone.py\n+++ /dev/null\n@@ -1 +0,0 @@\n-x\n"
+    assert [fp.path for fp in patches.parse_diff(text)] == ["new.py", "gone.py"]
+
+
+def test_parse_diff_no_newline_marker():
+    text = "--- a/a.txt\n+++ b/a.txt\n@@ -1 +1 @@\n-a\n\\ No newline at end of file\n+b\n\\ No newline at end of file\n"
+    files = patches.parse_diff(text)
+    assert [(fp.path, len(fp.hunks)) for fp in files] == [("a.txt", 1)]
+
+
+def test_diffstat_keeps_files_apart_without_diff_git_lines():
+    assert patches.diffstat(TWO_FILES) == [("x.py", 1, 1), ("y.py", 1, 0)]
+
+
+def test_diffstat_counts_header_like_content_lines():
+    assert patches.diffstat(CONTENT_LOOKS_LIKE_HEADERS) == [("notes.md", 2, 1)]
+
+
+def test_diffstat_merges_repeated_files():
+    text = TWO_FILES + "--- a/x.py\n+++ b/x.py\n@@ -20 +20,2 @@\n-a\n+b\n+c\n"
+    assert patches.diffstat(text) == [("x.py", 3, 2), ("y.py", 1, 0)]
+
+
+def _patch(path, start, old, new):
+    return f"--- a/{path}\n+++ b/{path}\n@@ -{start},1 +{start},1 @@\n-{old}\n+{new}\n"
+
+
+def test_overlaps_pairs_only_nearby_hunks_of_different_issues():
+    index = patches.hunk_index({
+        1: _patch("x.py", 10, "a", "b"),
+        2: _patch("x.py", 12, "c", "d"),
+        3: _patch("x.py", 200, "e", "f"),
+    })
+    assert [(path, a, b) for path, a, _, b, _ in patches.overlaps(index)] == [("x.py", 1, 2)]
+
+
+LINES = [f"line {i}" for i in range(1, 10)]
+
+
+def _edit(number, new):
+    before, old, after = LINES[number - 2 : number + 1]
+    return f"--- a/x.py\n+++ b/x.py\n@@ -{number - 1},3 +{number - 1},3 @@\n {before}\n-{old}\n+{new}\n {after}\n"
+
+
+def test_combined_apply_skips_patches_that_conflict_with_earlier_ones(tmp_path, monkeypatch):
+    import subprocess
+
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path / "ws"))
+    for key, value in {"GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@x", "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@x"}.items():
+        monkeypatch.setenv(key, value)
+    origin, clone = tmp_path / "origin", tmp_path / "clone"
+    origin.mkdir()
+    (origin / "x.py").write_text("".join(f"{line}\n" for line in LINES))
+    for cmd in (["init", "-q", "-b", "main"], ["add", "x.py"], ["commit", "-qm", "init"]):
+        subprocess.run(["git", "-C", str(origin), *cmd], check=True)
+    subprocess.run(["git", "clone", "-q", str(origin), str(clone)], check=True)
+    monkeypatch.setattr(patches, "prepare_checkout", lambda repo: (clone, "main"))
+
+    applied, failed, combined = patches.combined_apply("o/r", {
+        1: _edit(2, "uno"),
+        2: _edit(2, "eins"),
+        3: _edit(7, "tres"),
+    })
+
+    assert applied == [1, 3]
+    assert list(failed) == [2]
+    assert "+uno" in combined and "+tres" in combined and "eins" not in combined
+    worktrees = subprocess.run(["git", "-C", str(clone), "worktree", "list"], capture_output=True, text=True).stdout
+    assert len(worktrees.splitlines()) == 1
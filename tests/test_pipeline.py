@@ -0,0 +1,81 @@
+import io
+import json
+import sys
+
+import pipeline
+import pytest
+import workspace_store
+
+
+def _run(run_job, mode="plan", fresh=False):
+    sink = io.StringIO()
+    pipeline.run(run_job, mode, 1, source=io.StringIO("o/r#1\n"), sink=sink, fresh=fresh)
+    return json.loads(sink.getvalue())
+
+
+def test_a_stale_plan_on_disk_is_not_reported_as_done(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    base_dir = workspace_store.workspace_dir("o/r", 1)
+    base_dir.mkdir(parents=True)
+    (base_dir / "plan.md").write_text("old plan", encoding="utf-8")
+
+    record = _run(lambda repo, issue, mode, options, steps: None, fresh=True)
+    assert record["status"] == "pending"
+    assert "plan" not in record
+
+    def saves(repo, issue, mode, options, steps):
+        (base_dir / "plan.md").write_text("new plan", encoding="utf-8")
+        steps.record("plan_saved")
+
+    record = _run(saves, fresh=True)
+    assert record["status"] == "done"
+    assert record["plan"] == "new plan"
+
+
+def test_system_exit_reports_what_was_printed(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+
+    def exits(repo, issue, mode, options, steps):
+        print("No saved plan found. Run plan mode first.")
+        sys.exit(1)
+
+    record = _run(exits, mode="execute")
+    assert record["status"] == "error"
+    assert record["error"] == "No saved plan found. Run plan mode first."
+
+
+def test_parse_ref_accepts_every_reference_form():
+    assert pipeline.parse_ref("o/r#3") == ("o/r", 3)
+    assert pipeline.parse_ref("https://github.com/o/r/issues/4") == ("o/r", 4)
+    assert pipeline.parse_ref('{"repo": "o/r", "issue": 5}') == ("o/r", 5)
+    assert pipeline.parse_ref("#6", default_repo="o/r") == ("o/r", 6)
+    with pytest.raises(ValueError):
+        pipeline.parse_ref("6")
+
+
+def test_stream_reports_failed_lines_and_skips_blank_ones():
+    def handle(line):
+        if line.startswith("bad"):
+            raise ValueError("Not an issue reference: bad")
+        return {"input": line.strip(), "status": "done"}
+
+    sink = io.StringIO()
+    assert pipeline.stream(["a\n", "\n", "bad\n", "b\n"], handle, sink, workers=2)
+    records = sorted((json.loads(line) for line in sink.getvalue().splitlines()), key=lambda r: r["input"])
+    assert [(r["input"], r["status"]) for r in records] == [("a", "done"), ("b", "done"), ("bad", "error")]
+
+
+def test_stream_stops_reading_once_the_sink_is_closed():
+    class Closed(io.StringIO):
+        def write(self, text):
+            raise BrokenPipeError
+
+    read = []
+
+    def lines():
+        for n in range(100):
+            read.append(n)
+            yield f"o/r#{n}\n"
+
+    assert not pipeline.stream(lines(), lambda line: {"input": line}, Closed(), workers=1)
+    assert len(read) < 100
@@ -0,0 +1,27 @@
+import poll_schedule
+
+
+def test_without_history_the_fixed_backoff_and_max_wait_apply():
+    schedule = poll_schedule.Schedule([100.0] * (poll_schedule.MIN_SAMPLES - 1), max_wait=300)
+    assert schedule.timeout == 300
+    assert [schedule.next_interval(0) for _ in range(7)] == [1, 2, 4, 8, 16, 30, 30]
+
+
+def test_history_concentrates_polls_where_sessions_usually_finish():
+    samples = [600.0 + 10 * i for i in range(20)]  # 600..790 s
+    schedule = poll_schedule.Schedule(samples, max_wait=300)
+    assert schedule.timeout == 2 * poll_schedule._percentile(samples, 0.95)
+    early = schedule.next_interval(10)
+    window = schedule.next_interval(700)
+    assert early > poll_schedule.SPARSE
+    assert poll_schedule.DENSE <= window < early
+    assert schedule.next_interval(0, started=False) == 1
+
+
+def test_durations_fall_back_to_every_repo_with_too_few_samples(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    for i in range(poll_schedule.MIN_SAMPLES):
+        poll_schedule.record("plan", "o/other", 100.0 + i, "finished")
+    poll_schedule.record("plan", "o/r", 50.0, "finished")
+    assert len(poll_schedule.durations("plan", "o/r")) == poll_schedule.MIN_SAMPLES + 1
+    assert poll_schedule.durations("execute", "o/r") == []
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis runs the Lua scripts through lupa
+
+import cli
+import devin_client
+import github_client
+import redis_queue
+import workers
+from models import Issue
+from workspace_store import save_context, save_issue, workspace_dir
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis_queue.redis.Redis, "from_url", lambda url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs)
+    )
+    return redis_queue.RedisBackend("redis://fake")
+
+
+def _fake_devin(monkeypatch):
+    created = []
+
+    def create(prompt):
+        created.append(prompt)
+        return f"devin-{len(created)}"
+
+    def poll(session_id, **kwargs):
+        if "required_status" in kwargs:  # planning
+            return "finished", {"output_text": "1. Fix the bug."}
+        return "finished", {"output_text": "--- a/x.py\n+++ b/x.py\n@@ -1 +1 @@\n-a\n+b\n"}
+
+    monkeypatch.setattr(devin_client, "create_devin_session", create)
+    monkeypatch.setattr(devin_client, "poll_devin_session", poll)
+    monkeypatch.setattr(github_client, "fetch_issue_comments", lambda repo, number: [])
+    return created
+
+
+def test_plan_then_execute_jobs_run_end_to_end(backend, monkeypatch):
+    created = _fake_devin(monkeypatch)
+    save_issue(workspace_dir("o/r", 1), Issue(number=1, title="Bug", body="It breaks", state="open", url=""))
+    save_context(workspace_dir("o/r", 1), [])
+    plan_id = backend.enqueue("o/r", 1, "plan")
+    exec_id = backend.enqueue("o/r", 1, "execute")
+    stop = threading.Event()
+    ran = []
+
+    def run_job(repo, issue, mode, options, steps):
+        ran.append(mode)
+        try:
+            cli._run_job(repo, issue, mode, options, steps)
+        finally:
+            if len(ran) == 2:
+                stop.set()
+
+    workers.worker_loop(run_job, stop, backend, idle_wait=0)
+
+    assert ran == ["plan", "execute"]
+    assert len(created) == 2
+    assert backend.job(plan_id)["state"] == "done"
+    assert backend.job(exec_id)["state"] == "done"
+    assert backend.steps(plan_id, "").get("plan_saved") == {}
+    assert backend.steps(exec_id, "").get("output_saved")["path"].endswith("devin.patch")
+    assert "plan.md" in backend.latest_result("o/r", 1, "plan")["files"]
+    assert backend.counts() == {"queued": 0, "running": 0}
+
+
+def test_enqueue_dedupes_a_pending_job(backend):
+    first = backend.enqueue("o/r", 1, "plan")
+    assert backend.enqueue("o/r", 1, "plan") == first
+    assert backend.enqueue("o/r", 1, "plan", options={"fresh": True}) != first
+
+
+def test_expired_leases_are_only_claimed_for_requested_modes(backend):
+    job_id = backend.enqueue("o/r", 1, "execute")
+    assert backend.claim("w1", -1, {"execute"})["id"] == job_id  # lease already lapsed
+    assert backend.claim("w2", 60, {"plan"}) is None
+    assert backend.claim("w2", 60, {"execute"})["owner"] == "w2"
+
+
+def test_take_over_adopts_a_lapsed_run(backend):
+    old = backend.enqueue("o/r", 1, "plan")
+    backend.claim("w1", -1)
+    backend.steps(old, "w1").record("plan_session", session_id="devin-1")
+    new = backend.enqueue("o/r", 1, "plan", options={"fresh": True})
+    backend.client.zrem(f"{redis_queue.PREFIX}:queued:plan", new)  # as if claimed
+    steps = backend.steps(new, "w2")
+
+    assert steps.take_over() == old
+    assert steps.get("plan_session") == {"session_id": "devin-1"}
+    job = backend.job(old)
+    assert (job["state"], job["error"]) == ("failed", f"taken over by job {new}")
+    assert backend.claim("w3", 60) is None
+    assert steps.take_over() is None
+
+
+def test_finished_job_and_adopt_report_the_holders_result(backend):
+    holder = backend.enqueue("o/r", 1, "execute")
+    backend.claim("w1", 60)
+    started = time.time()
+    holder_steps = backend.steps(holder, "w1")
+    holder_steps.record("output_saved", path="/w/devin.patch")
+    holder_steps.finish()
+    waiter = backend.steps(backend.enqueue("o/r", 1, "execute", options={"fresh": True}), "w2")
+
+    job = waiter.finished_job(started)
+    assert job["id"] == holder
+    assert waiter.adopt(job["id"], "output_saved") == {"path": "/w/devin.patch"}
+    assert waiter.get("output_saved") == {"path": "/w/devin.patch"}
+    assert waiter.finished_job(time.time() + 1) is None
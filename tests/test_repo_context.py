@@ -0,0 +1,33 @@
+import cli
+import repo_context
+from models import Issue
+
+
+def _map(n):
+    return {"files": {f"pkg{i}/mod{i}.py": [f"symbol_{i}_{j}" for j in range(5)] for i in range(n)}}
+
+
+def test_render_never_exceeds_the_budget():
+    repo_map = _map(40)
+    related = list(repo_map["files"])[:8]
+    for budget in range(60, 3000, 37):
+        text = repo_context.render("abc123", repo_map, related, budget)
+        assert len(text) <= budget, budget
+
+
+def test_render_stops_after_the_first_truncated_section():
+    repo_map = _map(40)
+    text = repo_context.render("abc123", repo_map, list(repo_map["files"])[:20], 400)
+    assert text.endswith("  ...\n")
+    assert "Directories:" not in text
+
+
+def test_repo_map_skips_when_git_is_missing(monkeypatch, capsys):
+    def missing(*args, **kwargs):
+        raise FileNotFoundError("git")
+
+    monkeypatch.setattr(repo_context, "enabled", lambda: True)
+    monkeypatch.setattr(repo_context, "load_map", missing)
+    issue = Issue(number=1, title="t", body="", state="open", url="")
+    assert cli._repo_map("o/r", issue, None) is None
+    assert "Skipping repo map" in capsys.readouterr().out
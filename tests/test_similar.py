@@ -0,0 +1,64 @@
+import shutil
+
+import pytest
+import similar
+from models import Issue
+from workspace_store import save_issue, workspace_dir
+
+CRASH = (
+    "Crash when uploading a large file",
+    "Uploading a file larger than 2GB to the storage bucket raises OverflowError in the chunked "
+    "uploader and the whole request fails with a 500 error. Smaller files upload fine.",
+)
+
+
+@pytest.fixture(autouse=True)
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    return tmp_path
+
+
+def _save(number, title, body, plan=True):
+    base_dir = workspace_dir("o/r", number)
+    save_issue(base_dir, Issue(number=number, title=title, body=body, state="open", url=""))
+    if plan:
+        (base_dir / "plan.md").write_text("1. Fix it.\n", encoding="utf-8")
+    similar.update("o/r", number)
+
+
+def _query(title, body):
+    return Issue(number=99, title=title, body=body, state="open", url="")
+
+
+def test_near_duplicate_is_found_and_unrelated_is_not():
+    _save(1, *CRASH)
+    _save(2, "Dark mode colors", "The settings page ignores the dark theme and renders white text on white.")
+    matches = similar.lookup("o/r", _query(CRASH[0], CRASH[1].replace("Smaller files upload fine.", "Small ones work.")))
+    assert [number for _, number in matches] == [1]
+    assert matches[0][0] >= similar.THRESHOLD
+
+
+def test_issues_without_a_plan_are_skipped_unless_asked_for():
+    _save(1, *CRASH, plan=False)
+    assert similar.lookup("o/r", _query(*CRASH)) == []
+    assert [n for _, n in similar.lookup("o/r", _query(*CRASH), with_plan=False)] == [1]
+
+
+def test_index_follows_edits_and_removals(workspace):
+    _save(1, *CRASH)
+    _save(1, "Dark mode colors", "The settings page ignores the dark theme and renders white text on white.")
+    assert similar.lookup("o/r", _query(*CRASH)) == []
+
+    _save(2, *CRASH)
+    shutil.rmtree(workspace_dir("o/r", 2))
+    similar.update("o/r", 2)
+    assert similar.lookup("o/r", _query(*CRASH)) == []
+
+
+def test_index_workspace_drops_vanished_issues(workspace):
+    _save(1, *CRASH)
+    _save(2, "Dark mode colors", "The settings page ignores the dark theme and renders white text on white.")
+    shutil.rmtree(workspace_dir("o/r", 1))
+    stats = similar.index_workspace()
+    assert (stats["unchanged"], stats["removed"]) == (1, 1)
+    assert similar.lookup("o/r", _query(*CRASH)) == []
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+import triage
+from models import Issue
+from workspace_store import load_issue, record_open_issues, save_issue, workspace_dir
+
+
+@pytest.fixture
+def fetches(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    calls = []
+
+    def iter_issues(repo):
+        calls.append(repo)
+        yield Issue(number=2, title="still open", body="steps to reproduce", state="open")
+
+    monkeypatch.setattr(triage, "iter_issues", iter_issues)
+    return calls
+
+
+def _save(number, state="open"):
+    save_issue(workspace_dir("o/r", number), Issue(number=number, title=f"#{number}", body="x", state=state))
+
+
+def test_local_issues_without_a_complete_ingest_are_refetched(fetches):
+    _save(1)
+    ranked = triage.rank("o/r")
+    assert fetches == ["o/r"]
+    assert [issue.number for _, issue, _ in ranked] == [2]
+    assert load_issue(workspace_dir("o/r", 1)).state == "closed"
+
+
+def test_fresh_ingest_is_ranked_locally(fetches):
+    _save(1)
+    _save(3, state="closed")
+    record_open_issues("o/r", {1})
+    assert [issue.number for _, issue, _ in triage.rank("o/r")] == [1]
+    assert fetches == []
+
+
+def test_stale_ingest_is_refetched(fetches, monkeypatch):
+    _save(1)
+    record_open_issues("o/r", {1})
+    later = time.time() + triage.FRESH_SECONDS + 1
+    monkeypatch.setattr(triage.time, "time", lambda: later)
+    triage.rank("o/r")
+    assert fetches == ["o/r"]
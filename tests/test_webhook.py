@@ -0,0 +1,72 @@
+import json
+import sqlite3
+
+import job_queue
+import pytest
+import webhook
+
+BODY = json.dumps({
+    "action": "opened",
+    "issue": {"number": 7, "title": "Bug", "body": "", "state": "open", "html_url": ""},
+    "repository": {"full_name": "o/r"},
+}).encode("utf-8")
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    conn = job_queue.connect()
+    yield conn
+    conn.close()
+
+
+def test_delivery_is_queued_once(conn):
+    status, message = webhook.handle_delivery(conn, "issues", "d-1", BODY)
+    assert (status, message) == (202, "queued job 1")
+    assert webhook.handle_delivery(conn, "issues", "d-1", BODY) == (200, "duplicate delivery")
+    assert job_queue.count_by_state(conn) == {"queued": 1}
+
+
+def test_failed_delivery_is_not_recorded(conn, monkeypatch):
+    enqueue = job_queue._enqueue
+    assert webhook.handle_delivery(conn, "issues", "d-2", b"{not json")[0] == 400
+
+    def broken(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(job_queue, "_enqueue", broken)
+    with pytest.raises(sqlite3.OperationalError):
+        webhook.handle_delivery(conn, "issues", "d-2", BODY)
+    monkeypatch.setattr(job_queue, "_enqueue", enqueue)
+    assert not job_queue.seen_delivery(conn, "d-2")
+    assert webhook.handle_delivery(conn, "issues", "d-2", BODY)[0] == 202
+
+
+def test_edits_and_comments_queue_a_fresh_plan(conn):
+    webhook.handle_delivery(conn, "issues", "d-3", BODY)
+    edited = json.loads(BODY)
+    edited["action"] = "edited"
+    comment = dict(edited, action="created", comment={"body": "Also fails on Windows"})
+    webhook.handle_delivery(conn, "issues", "d-4", json.dumps(edited).encode("utf-8"))
+    webhook.handle_delivery(conn, "issue_comment", "d-5", json.dumps(comment).encode("utf-8"))
+    rows = conn.execute("SELECT source, options FROM jobs ORDER BY id").fetchall()
+    # The edit and the comment share one pending fresh job.
+    assert [(row["source"], job_queue.job_options(row)) for row in rows] == [
+        ("issues:d-3", {}),
+        ("issues:d-4", {"fresh": True}),
+    ]
+
+
+def test_signature_must_match_the_body():
+    header = webhook.sign(b"s3cret", BODY)
+    assert webhook.verify_signature(b"s3cret", BODY, header)
+    assert not webhook.verify_signature(b"s3cret", BODY + b" ", header)
+    assert not webhook.verify_signature(b"other", BODY, header)
+    assert not webhook.verify_signature(b"s3cret", BODY, None)
+
+
+def test_other_events_and_actions_are_ignored(conn):
+    closed = BODY.replace(b'"opened"', b'"closed"')
+    assert webhook.handle_delivery(conn, "issues", "d-2", closed) == (202, "ignored action closed")
+    assert webhook.handle_delivery(conn, "push", "d-3", BODY)[0] == 202
+    assert job_queue.count_by_state(conn) == {}
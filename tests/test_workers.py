@@ -0,0 +1,86 @@
+import threading
+
+import daemon
+import job_queue
+import pytest
+import workers
+
+
+def test_pending_session_requeues_job_with_its_steps(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    backend = job_queue.SQLiteBackend()
+    job_id = backend.enqueue("o/r", 1, "plan")
+    stop = threading.Event()
+
+    def run_job(repo, issue, mode, options, steps):
+        steps.record("plan_session", session_id="devin-1")
+        stop.set()
+        raise job_queue.SessionPending("devin-1")
+
+    workers.worker_loop(run_job, stop, backend, idle_wait=0)
+
+    conn = job_queue.connect()
+    try:
+        job = job_queue.get_job(conn, job_id)
+    finally:
+        conn.close()
+    assert job["state"] == "queued" and job["owner"] is None
+    assert job["retry_at"] > job["updated_at"]
+    assert backend.steps(job_id).get("plan_session") == {"session_id": "devin-1"}
+    assert backend.claim("someone", 60) is None  # not before its retry time
+
+
+def test_daemon_wait_reports_requeued_job(monkeypatch):
+    states = iter([{"state": "running"}, {"state": "queued", "retry_at": 123.0, "session_id": "devin-1"}])
+    monkeypatch.setattr(daemon, "_request", lambda url, payload=None: next(states))
+    assert daemon.wait("http://x", 1, interval=0)["state"] == "queued"
+
+
+def test_daemon_wait_gives_up_after_repeated_failures(monkeypatch):
+    def down(url, payload=None):
+        raise daemon.DaemonError("unreachable")
+
+    monkeypatch.setattr(daemon, "_request", down)
+    with pytest.raises(daemon.DaemonError):
+        daemon.wait("http://x", 1, interval=0)
+
+
+def test_daemon_wait_times_out_with_last_seen_job(monkeypatch):
+    monkeypatch.setattr(daemon, "_request", lambda url, payload=None: {"state": "running"})
+    assert daemon.wait("http://x", 1, interval=0, timeout=0) == {"state": "running"}
+
+
+def test_daemon_api_queues_jobs_and_lists_their_artifacts(tmp_path, monkeypatch):
+    from http.server import ThreadingHTTPServer
+
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    (tmp_path / "o_r" / "issue-3").mkdir(parents=True)
+    index = daemon.WorkspaceIndex(tmp_path)
+    monkeypatch.setattr(daemon._Handler, "index", index)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), daemon._Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%d" % server.server_address[1]
+    try:
+        job_id = daemon.submit(url, "o/r", 3, "plan")
+        assert daemon._request(f"{url}/jobs/{job_id}")["artifacts"] == []
+
+        (tmp_path / "o_r" / "issue-3" / "plan.md").write_text("plan")
+        index.refresh("o/r", 3)
+        job = daemon._request(f"{url}/jobs/{job_id}")
+        assert (job["state"], job["artifacts"]) == ("queued", ["plan.md"])
+        with pytest.raises(daemon.DaemonError, match="HTTP 400"):
+            daemon.submit(url, "o/r", 3, "merge")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_a_lapsed_lease_is_claimed_by_another_worker(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    backend = job_queue.SQLiteBackend()
+    job_id = backend.enqueue("o/r", 2, "plan")
+    assert backend.claim("remote-host:1/0", 60)["id"] == job_id
+    assert backend.claim("remote-host:2/0", 60) is None
+    assert backend.heartbeat(job_id, "remote-host:1/0", -1)
+    assert backend.claim("remote-host:2/0", 60)["id"] == job_id
+    assert not backend.heartbeat(job_id, "remote-host:1/0", 60)
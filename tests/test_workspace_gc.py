@@ -0,0 +1,77 @@
+import os
+import time
+
+import artifacts
+import job_queue
+import pytest
+import workspace_gc
+from models import Issue
+from workspace_store import save_issue, workspace_dir
+
+DAY = 86400
+
+
+def test_drain_journal_when_another_gc_took_it(tmp_path, monkeypatch):
+    (tmp_path / ".gc-journal").write_text("100\to_r/issue-1\n", encoding="utf-8")
+
+    def raced(src, dst):
+        os.unlink(src)
+        raise FileNotFoundError(src)
+
+    monkeypatch.setattr(workspace_gc.os, "replace", raced)
+    assert workspace_gc._drain_journal(tmp_path) == {}
+
+
+def test_drain_journal_keeps_latest_stamp(tmp_path):
+    (tmp_path / ".gc-journal").write_text("100\to_r/issue-1\n300\to_r/issue-1\n200\to_r/repo\n", encoding="utf-8")
+    assert workspace_gc._drain_journal(tmp_path) == {"o_r/issue-1": 300.0, "o_r/repo": 200.0}
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """o/r issues 1-4: 1 untouched for 40 days, 2 fresh, 3 old but being worked on, 4 closed 10 days ago."""
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    now = time.time()
+    for number, age, state in [(1, 40, "open"), (2, 0, "open"), (3, 40, "open"), (4, 10, "closed")]:
+        base_dir = workspace_dir("o/r", number)
+        save_issue(base_dir, Issue(number=number, title=f"Issue {number}", body="", state=state, url=""))
+        (base_dir / "plan.md").write_text("x" * 10_000, encoding="utf-8")
+        os.utime(base_dir, (now - age * DAY, now - age * DAY))
+    (tmp_path / ".gc-journal").unlink()  # setup writes count as touches; go by the mtimes above
+    job_queue.resume_or_start("o/r", 3, "execute")  # running in this (live) process
+    return tmp_path
+
+
+def _left(root):
+    return sorted(p.name for p in (root / "o_r").glob("issue-*"))
+
+
+def test_plain_gc_archives_nothing(workspace):
+    stats = workspace_gc.collect()
+    assert stats["archived"] == []
+    assert _left(workspace) == ["issue-1", "issue-2", "issue-3", "issue-4"]
+
+
+def test_max_age_archives_stale_and_closed_issues_but_not_busy_ones(workspace):
+    artifacts.put("o/r", 1, "plan", "old plan", "plan")
+    artifacts.put("o/r", 2, "plan", "first", "plan")
+    artifacts.put("o/r", 2, "plan", "second", "plan")
+
+    assert workspace_gc.collect(max_age_days=30, dry_run=True)["archived"] == ["o_r/issue-1", "o_r/issue-4"]
+    assert _left(workspace) == ["issue-1", "issue-2", "issue-3", "issue-4"]
+
+    stats = workspace_gc.collect(max_age_days=30)
+    assert sorted(stats["archived"]) == ["o_r/issue-1", "o_r/issue-4"]
+    assert _left(workspace) == ["issue-2", "issue-3"]
+    assert sorted(p.name for p in (workspace / "o_r" / "archive").iterdir()) == ["issue-1.tar.gz", "issue-4.tar.gz"]
+    assert artifacts.history("o/r", 1, "plan") == []
+    assert [item["rev"] for item in artifacts.history("o/r", 2, "plan")] == [1, 2]
+
+
+def test_budget_evicts_least_recently_used_first(workspace):
+    stats = workspace_gc.collect(budget=25_000)
+    # Issue 1 goes first; issue 3 is busy, issue 4 is next by age, issue 2 is inside the grace period.
+    assert stats["archived"] == ["o_r/issue-1", "o_r/issue-4"]
+    assert _left(workspace) == ["issue-2", "issue-3"]
+    assert stats["bytes"] <= 25_000
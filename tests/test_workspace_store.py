@@ -0,0 +1,55 @@
+import workspace_store
+
+
+def test_explicit_zstd_falls_back_to_gzip_without_package(tmp_path, monkeypatch):
+    monkeypatch.setattr(workspace_store, "zstandard", None)
+    path = workspace_store.write_record(tmp_path, "issue", {"number": 1}, codec="zstd")
+    assert path.name == "issue.json.gz"
+    assert workspace_store.read_record(tmp_path, "issue") == {"number": 1}
+
+
+def test_unknown_codec_writes_plain_json(tmp_path):
+    path = workspace_store.write_record(tmp_path, "issue", {"number": 2}, codec="lz4")
+    assert path.name == "issue.json"
+
+
+def _journal(root):
+    path = root / ".gc-journal"
+    return [line.split("\t")[1] for line in path.read_text().splitlines()] if path.exists() else []
+
+
+def test_workspace_dir_is_a_pure_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    assert workspace_store.workspace_dir("o/r", 3) == tmp_path / "o_r" / "issue-3"
+    assert _journal(tmp_path) == []
+
+
+def test_only_new_entries_are_journaled_on_write(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVIN_WORKSPACE", str(tmp_path))
+    base_dir = workspace_store.workspace_dir("o/r", 3)
+    workspace_store.write_record(base_dir, "issue", {"number": 3})
+    workspace_store.write_record(base_dir, "issue", {"number": 3, "title": "again"})
+    assert _journal(tmp_path) == ["o_r/issue-3"]
+    workspace_store.touch_dir(base_dir)
+    assert _journal(tmp_path) == ["o_r/issue-3", "o_r/issue-3"]
+
+
+def test_migrate_rewrites_raw_github_records(tmp_path):
+    issue_dir = tmp_path / "o_r" / "issue-4"
+    raw_issue = {
+        "number": 4, "title": "Crash", "body": "trace", "html_url": "https://x/4", "state": "open",
+        "user": {"login": "ann", "avatar_url": "https://a"}, "labels": [{"name": "bug", "color": "f00"}],
+        "reactions": {"+1": 3}, "comments": 1,
+    }
+    raw_comment = {"id": 9, "user": {"login": "bob", "type": "User"}, "html_url": "https://x/4#9", "body": "same here"}
+    workspace_store.write_record(issue_dir, "issue", raw_issue, codec="none")
+    workspace_store.write_record(issue_dir, "context", {"comments": [raw_comment]}, codec="none")
+
+    stats = workspace_store.migrate_workspace(tmp_path, codec="none")
+
+    assert stats["issues"] == 1
+    stored = workspace_store.read_record(issue_dir, "issue")
+    assert "reactions" not in stored and stored["author"] == "ann" and stored["labels"] == ["bug"]
+    context = workspace_store.read_record(issue_dir, "context")
+    assert context["schema"] == workspace_store.CONTEXT_SCHEMA
+    assert workspace_store.load_context(issue_dir)[0].author == "bob"